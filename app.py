@@ -1,11 +1,19 @@
 import os
 import sys
+
+import startup
+
+# Perfil de inicialização (AUTOMACAO_PERFIL_INICIO=1 ou --perfil-inicio): precisa
+# estar ativo antes das demais importações. O processo auxiliar (spawn) importa
+# este arquivo como __mp_main__ e não mede nada.
+if __name__ == "__main__":
+    startup.install_profiler_if_requested()
+
+import multiprocessing
 import threading
-import queue
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from tkinter.scrolledtext import ScrolledText
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Sequence
 
 try:
     from ttkbootstrap import Style as BootstrapStyle  # type: ignore[import]
@@ -15,9 +23,15 @@ except Exception:
     BootstrapStyle = None  # type: ignore[assignment]
     HAS_BOOTSTRAP = False
 
+import config_service
 import core
 import storage
-from ui_components import create_card, setup_styles
+import task_executor
+import worker_host
+from ui_components import FrameLatencyMonitor, LogView, UIEventPump, VirtualTable, create_card, setup_styles
+from unified_index import UnifiedIndex, parse_date_filter, parse_value_filter
+
+EMSYS_LOG_FILE = os.path.join("logs", "execucao_emsys.log")
 
 
 class App:
@@ -31,35 +45,73 @@ class App:
         # Ícone
         self._setup_icon()
 
-        # Fila para logs/progresso (threads -> UI)
-        self.event_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        # Fila para logs/progresso (threads -> UI). O put() acorda a UI na hora;
+        # progresso e status que se acumulam viram um único evento.
+        self.event_queue = UIEventPump(
+            self.root,
+            self._dispatch_event,
+            coalesce={
+                "progress": self._merge_progress_events,
+                "set_status_goodcard": None,
+                "jobs_changed": None,
+                "stats": None,
+            },
+        )
+
+        # Executor compartilhado das ações: threads fixas, uma tarefa por tipo
+        self.executor = task_executor.TaskExecutor(
+            max_workers=4,
+            on_change=lambda: self.event_queue.put({"type": "ui", "action": "jobs_changed"}),
+        )
+        self._jobs_tick_scheduled = False
+
+        # PDFs, capturas do Good Card e unificação rodam num processo auxiliar;
+        # aqui ficam só a orquestração e a interface
+        # O processo sobe logo depois da janela aparecer (ou na primeira chamada)
+        self.worker = worker_host.get_host()
+        self.worker_stopping: Optional[threading.Thread] = None
+        self.root.after(300, self.worker.start)
+        self.latency = FrameLatencyMonitor(self.root)
+        self.latency.start()
 
         # Estado em memória
         self.goodcard_tabs: List[Dict[str, str]] = []
         self.goodcard_selected_url: Optional[str] = None
         self.unified_items: List[Dict[str, Any]] = []
-        self.emsys_thread: Optional[threading.Thread] = None
+        # Grade da aba Relatórios: índice da última unificação e linhas filtradas
+        self.unified_index: Optional[UnifiedIndex] = None
+        self._grid_rows: Sequence[int] = []
+        self._grid_sort = "dt"
+        self._grid_desc = False
+        self.emsys_job: Optional[task_executor.Job] = None
         self._emsys_cancel_event: Optional[threading.Event] = None
+        self._collector_stop: Optional[threading.Event] = None
+        self._collector_url: Optional[str] = None
 
         # Variáveis de status
         self.status_goodcard = tk.StringVar(value="Desconectado do Chrome (CDP).")
         self.status_goodcard_capture = tk.StringVar(value="Nenhuma captura Good Card ainda.")
         self.status_valecard = tk.StringVar(value="Nenhum PDF Vale Card processado.")
         self.status_redefrota = tk.StringVar(value="Nenhum PDF Rede Frota processado.")
+        self.status_import_pdfs = tk.StringVar(value="Nenhum PDF importado pela detecção automática.")
         self.status_unificado = tk.StringVar(value="Capturas ainda não unificadas.")
         self.status_emsys_calibracao = tk.StringVar(value="Calibração não realizada.")
         self.status_emsys_exec = tk.StringVar(value="EMSYS aguardando execução.")
+        self.status_conciliacao = tk.StringVar(value="Nenhuma prévia de conciliação ainda.")
 
         self.goodcard_tabs_var = tk.StringVar(value="")
+        self.goodcard_autoscroll_var = tk.BooleanVar(value=True)
+        # Captura completa: não descarta o que já foi capturado nem para no trecho já capturado
+        self.goodcard_completa_var = tk.BooleanVar(value=False)
         self.emsys_progress_var = tk.StringVar(value="Marcado: 0/0")
         self.emsys_last_value_var = tk.StringVar(value="Último valor marcado: -")
+        self.emsys_rate_var = tk.StringVar(value="Vazão: -")
+        self.emsys_eta_var = tk.StringVar(value="Tempo: -")
+        self.conciliacao_tolerancia_var = tk.StringVar(value="")
 
         # Splash opcional
         self._show_splash_then_build_ui()
 
-        # Agendar processamento de eventos de thread
-        self.root.after(200, self._process_event_queue)
-
     # --------------------------------------------------------------------- UI base
     def _setup_icon(self):
         try:
@@ -128,9 +180,23 @@ class App:
                 pass
             self._build_main_ui()
             self.root.deiconify()
+            self._warn_config_errors()
 
         self.root.after(2200, finish_splash)
 
+    def _warn_config_errors(self):
+        """
+        Avisa (uma vez, ao abrir) sobre arquivos de configuração que não
+        puderam ser lidos; nesse caso o aplicativo usa os valores padrão.
+        """
+        problems = config_service.errors()
+        if problems:
+            messagebox.showwarning(
+                "Configuração",
+                "Não consegui ler estes arquivos de configuração; usando os valores padrão:\n\n"
+                + "\n".join(problems.values()),
+            )
+
     def _build_main_ui(self):
         setup_styles(self.root)
 
@@ -145,12 +211,14 @@ class App:
         self.tab_captura = ttk.Frame(notebook)
         self.tab_emsys = ttk.Frame(notebook)
         self.tab_relatorios = ttk.Frame(notebook)
+        self.tab_tarefas = ttk.Frame(notebook)
         self.tab_config = ttk.Frame(notebook)
 
         notebook.add(self.tab_inicio, text="Início")
         notebook.add(self.tab_captura, text="Captura")
         notebook.add(self.tab_emsys, text="EMSYS")
         notebook.add(self.tab_relatorios, text="Relatórios")
+        notebook.add(self.tab_tarefas, text="Tarefas")
         notebook.add(self.tab_config, text="Configuração/Ajuda")
 
         # Construir conteúdo de cada aba
@@ -158,6 +226,7 @@ class App:
         self._build_tab_captura()
         self._build_tab_emsys()
         self._build_tab_relatorios()
+        self._build_tab_tarefas()
         self._build_tab_config()
 
     # --------------------------------------------------------------------- Abas
@@ -288,6 +357,12 @@ class App:
             btns_gc,
             text="Abrir nova aba do portal",
             command=self._action_goodcard_open_portal,
+        ).pack(side="left", padx=(0, 4))
+
+        ttk.Button(
+            btns_gc,
+            text="Importar HTML salvo...",
+            command=self._action_goodcard_import_html,
         ).pack(side="left")
 
         # Combobox para abas
@@ -302,11 +377,60 @@ class App:
         )
         self.combo_tabs.pack(side="left", padx=(4, 0))
 
+        capture_frame = ttk.Frame(card_gc)
+        capture_frame.grid(row=5, column=0, sticky="w", pady=(4, 0))
+
         ttk.Button(
-            card_gc,
+            capture_frame,
             text="Capturar da aba selecionada",
             command=self._action_goodcard_capture_selected,
-        ).grid(row=5, column=0, sticky="w", pady=(4, 0))
+        ).pack(side="left", padx=(0, 4))
+
+        ttk.Button(
+            capture_frame,
+            text="Capturar todas as páginas",
+            command=self._action_goodcard_crawl_selected,
+        ).pack(side="left", padx=(0, 4))
+
+        ttk.Button(
+            capture_frame,
+            text="Capturar via rede (JSON)",
+            command=self._action_goodcard_capture_network,
+        ).pack(side="left", padx=(0, 4))
+
+        ttk.Button(
+            capture_frame,
+            text="Capturar várias abas...",
+            command=self._action_goodcard_capture_many,
+        ).pack(side="left")
+
+        # Coleta contínua para tabelas virtualizadas
+        collector_frame = ttk.Frame(card_gc)
+        collector_frame.grid(row=6, column=0, sticky="w", pady=(4, 0))
+
+        ttk.Button(
+            collector_frame,
+            text="Iniciar coleta contínua",
+            command=self._action_goodcard_collector_start,
+        ).pack(side="left", padx=(0, 4))
+
+        ttk.Button(
+            collector_frame,
+            text="Salvar coleta",
+            command=self._action_goodcard_collector_save,
+        ).pack(side="left", padx=(0, 8))
+
+        ttk.Checkbutton(
+            collector_frame,
+            text="Rolar a lista automaticamente",
+            variable=self.goodcard_autoscroll_var,
+        ).pack(side="left", padx=(0, 8))
+
+        ttk.Checkbutton(
+            collector_frame,
+            text="Captura completa (não pula o já capturado)",
+            variable=self.goodcard_completa_var,
+        ).pack(side="left")
 
         # Card Vale Card
         card_vc, btns_vc = create_card(
@@ -356,6 +480,18 @@ class App:
         ttk.Button(btns_unif, text="Unificar capturas", command=self._action_unificar).pack(side="left", padx=(0, 4))
         ttk.Button(btns_unif, text="Limpar capturas", command=self._action_limpar_capturas).pack(side="left")
 
+        # Card Importar PDFs (detecção automática)
+        card_imp, btns_imp = create_card(
+            frame,
+            "Importar PDFs (detecção automática)",
+            "Selecione PDFs de qualquer operadora suportada (Vale Card, Rede Frota ou plug-ins). "
+            "O tipo de extrato é detectado pela primeira página de cada arquivo.",
+            status_var=self.status_import_pdfs,
+        )
+        card_imp.grid(row=2, column=0, padx=6, pady=6, sticky="nsew")
+
+        ttk.Button(btns_imp, text="Importar PDFs", command=self._action_importar_pdfs).pack(side="left")
+
     def _build_tab_emsys(self):
         frame = self.tab_emsys
         frame.columnconfigure(0, weight=1)
@@ -414,14 +550,44 @@ class App:
         prog_frame.grid(row=4, column=0, sticky="we", pady=(6, 4))
         ttk.Label(prog_frame, textvariable=self.emsys_progress_var).pack(anchor="w")
         ttk.Label(prog_frame, textvariable=self.emsys_last_value_var).pack(anchor="w")
+        ttk.Label(prog_frame, textvariable=self.emsys_rate_var).pack(anchor="w")
+        ttk.Label(prog_frame, textvariable=self.emsys_eta_var).pack(anchor="w")
 
         # Log rolável
         log_label = ttk.Label(card_run, text="Log da execução:")
         log_label.grid(row=5, column=0, sticky="w")
-        self.text_log = ScrolledText(card_run, height=10, width=70, state="disabled")
+        # Só as últimas linhas ficam na tela; o log completo vai para EMSYS_LOG_FILE
+        self.text_log = LogView(card_run, max_lines=2000, log_file=EMSYS_LOG_FILE, height=10, width=70)
         self.text_log.grid(row=6, column=0, sticky="nsew", pady=(4, 0))
         card_run.rowconfigure(6, weight=1)
 
+        # Card Prévia da conciliação (sem automação)
+        card_rec, btns_rec = create_card(
+            frame,
+            "Prévia da conciliação",
+            "Compare as capturas unificadas com o grid do EMSYS antes de rodar a marcação. "
+            "Exporte o grid para um arquivo de texto ou copie-o (Ctrl+A, Ctrl+C) e use a área de transferência.",
+            status_var=self.status_conciliacao,
+        )
+        card_rec.grid(row=1, column=0, padx=6, pady=6, sticky="nsew")
+
+        ttk.Button(btns_rec, text="Arquivo exportado...", command=self._action_conciliar_arquivo).pack(
+            side="left", padx=(0, 4)
+        )
+        ttk.Button(btns_rec, text="Área de transferência", command=self._action_conciliar_clipboard).pack(
+            side="left", padx=(0, 4)
+        )
+        ttk.Button(
+            btns_rec,
+            text="Abrir relatório",
+            command=lambda: self._open_file(core.RECONCILE_REPORT_FILE),
+        ).pack(side="left")
+
+        tol_frame = ttk.Frame(card_rec)
+        tol_frame.grid(row=4, column=0, sticky="w", pady=(4, 0))
+        ttk.Label(tol_frame, text="Tolerância de datas (dias, vazio = só valor):").pack(side="left")
+        ttk.Entry(tol_frame, textvariable=self.conciliacao_tolerancia_var, width=5).pack(side="left", padx=(4, 0))
+
     def _build_tab_relatorios(self):
         frame = self.tab_relatorios
         frame.columnconfigure(0, weight=1)
@@ -478,6 +644,98 @@ class App:
         card_csv.grid(row=2, column=0, padx=6, pady=6, sticky="nsew")
         ttk.Button(btns_csv, text="Exportar CSV", command=self._action_export_csv).pack(side="left")
 
+        # Card grade das capturas unificadas
+        self.status_grade = tk.StringVar(value="Unifique as capturas para ver as transações aqui.")
+        card_g, btns_g = create_card(
+            frame,
+            "Capturas unificadas",
+            "Transações da última unificação. Filtre por origem, período (dd/mm/aaaa) e valor; "
+            "clique no cabeçalho de uma coluna para ordenar.",
+            status_var=self.status_grade,
+        )
+        card_g.grid(row=3, column=0, columnspan=2, padx=6, pady=6, sticky="nsew")
+        frame.rowconfigure(3, weight=1)
+        card_g.columnconfigure(0, weight=1)
+
+        self.grade_origem_var = tk.StringVar(value="Todas")
+        self.grade_de_var = tk.StringVar()
+        self.grade_ate_var = tk.StringVar()
+        self.grade_vmin_var = tk.StringVar()
+        self.grade_vmax_var = tk.StringVar()
+        ttk.Label(btns_g, text="Origem:").pack(side="left")
+        self.grade_origem_combo = ttk.Combobox(
+            btns_g, textvariable=self.grade_origem_var, values=["Todas"], state="readonly", width=14
+        )
+        self.grade_origem_combo.pack(side="left", padx=(2, 8))
+        self.grade_origem_combo.bind("<<ComboboxSelected>>", lambda e: self._action_filtrar_grade())
+        for label, var, width in (
+            ("De:", self.grade_de_var, 11),
+            ("Até:", self.grade_ate_var, 11),
+            ("Valor mín.:", self.grade_vmin_var, 10),
+            ("Valor máx.:", self.grade_vmax_var, 10),
+        ):
+            ttk.Label(btns_g, text=label).pack(side="left")
+            entry = ttk.Entry(btns_g, textvariable=var, width=width)
+            entry.pack(side="left", padx=(2, 8))
+            entry.bind("<Return>", lambda e: self._action_filtrar_grade())
+        ttk.Button(btns_g, text="Filtrar", command=self._action_filtrar_grade).pack(side="left")
+        ttk.Button(btns_g, text="Limpar", command=self._action_limpar_filtros_grade).pack(side="left", padx=(6, 0))
+
+        self.grade = VirtualTable(
+            card_g,
+            columns=(
+                ("dt", "Data / Hora", 150, "w"),
+                ("bruto", "Valor bruto (R$)", 120, "e"),
+                ("origem", "Origem", 120, "w"),
+                ("id", "ID", 160, "w"),
+            ),
+            row_fn=self._grid_row_values,
+            on_sort=self._action_ordenar_grade,
+        )
+        self.grade.grid(row=4, column=0, sticky="nsew", pady=(6, 0))
+        card_g.rowconfigure(4, weight=1)
+        self.grade.set_sort_indicator(self._grid_sort, self._grid_desc)
+
+    def _build_tab_tarefas(self):
+        frame = self.tab_tarefas
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(0, weight=1)
+
+        card, btns = create_card(
+            frame,
+            "Tarefas",
+            "Ações rodando, na fila e as últimas concluídas. Clicar de novo numa ação que ainda não terminou "
+            "não roda o trabalho duas vezes. Cancelar tira a tarefa da fila; tarefas longas já em execução "
+            "(marcação do EMSYS, coleta contínua) param no próximo ponto seguro.",
+        )
+        card.grid(row=0, column=0, padx=6, pady=6, sticky="nsew")
+        card.columnconfigure(0, weight=1)
+        card.rowconfigure(4, weight=1)
+
+        self.jobs_tree = ttk.Treeview(
+            card,
+            columns=("tarefa", "estado", "tempo"),
+            show="headings",
+            height=12,
+            selectmode="browse",
+        )
+        self.jobs_tree.heading("tarefa", text="Tarefa")
+        self.jobs_tree.heading("estado", text="Situação")
+        self.jobs_tree.heading("tempo", text="Tempo")
+        self.jobs_tree.column("tarefa", width=280)
+        self.jobs_tree.column("estado", width=160)
+        self.jobs_tree.column("tempo", width=80, anchor="e")
+        self.jobs_tree.grid(row=4, column=0, sticky="nsew", pady=(6, 0))
+
+        ttk.Button(btns, text="Cancelar selecionada", command=self._action_cancelar_tarefa).pack(side="left")
+
+        self.latencia_var = tk.StringVar(value="Latência da interface: medindo...")
+        ttk.Label(card, textvariable=self.latencia_var, style="CardStatus.TLabel").grid(
+            row=5, column=0, sticky="w", pady=(6, 0)
+        )
+        self._refresh_jobs_table()
+        self._latency_tick()
+
     def _build_tab_config(self):
         frame = self.tab_config
         frame.columnconfigure(0, weight=1)
@@ -498,6 +756,26 @@ class App:
 
         ttk.Button(btns_cfg, text="Salvar URL", command=self._action_salvar_goodcard_url).pack(side="left")
 
+        # Card Good Card - Backend de conexão
+        card_backend, btns_backend = create_card(
+            frame,
+            "Good Card - Conexão com o Chrome",
+            "cdp: cliente embutido, mais rápido para listar abas e capturar a aba selecionada.\n"
+            "playwright: usado sempre na varredura, captura via rede, coleta contínua e várias abas.",
+        )
+        card_backend.grid(row=1, column=0, padx=6, pady=6, sticky="nsew")
+
+        self.goodcard_backend_var = tk.StringVar(value=core.get_goodcard_backend())
+        ttk.Combobox(
+            card_backend,
+            textvariable=self.goodcard_backend_var,
+            values=list(core.GOODCARD_BACKENDS),
+            state="readonly",
+            width=14,
+        ).grid(row=4, column=0, sticky="w", pady=(4, 4))
+
+        ttk.Button(btns_backend, text="Salvar conexão", command=self._action_salvar_goodcard_backend).pack(side="left")
+
         # Card Ajuda
         card_help, _ = create_card(
             frame,
@@ -507,21 +785,41 @@ class App:
             r'--remote-debugging-port=9222 --user-data-dir=C:\chrome-automacao' "\n\n"
             "Certifique-se também de ter executado:\n"
             " - pip install -r requirements.txt\n"
-            " - python -m playwright install\n",
+            " - python -m playwright install  (só para as capturas via Playwright)\n",
         )
-        card_help.grid(row=1, column=0, padx=6, pady=6, sticky="nsew")
+        card_help.grid(row=2, column=0, padx=6, pady=6, sticky="nsew")
 
     # --------------------------------------------------------------------- Ações (handlers)
-    def _run_in_thread(self, target, *args, **kwargs):
-        t = threading.Thread(target=target, args=args, kwargs=kwargs, daemon=True)
-        t.start()
-        return t
+    def _submit(self, kind: str, label: str, target, *args, key: str = "") -> task_executor.Job:
+        """
+        Envia o trabalho ao executor compartilhado. key identifica a entrada
+        da ação (arquivo, aba, texto): um novo clique com a mesma entrada
+        enquanto a ação ainda roda (ou espera) é juntado à tarefa existente, e
+        o usuário é avisado; com outra entrada vira uma tarefa nova.
+        """
+        job = self.executor.submit(kind, target, *args, label=label, key=key)
+        if job.fn is not target:
+            messagebox.showinfo(
+                "Tarefas",
+                f"\"{job.label}\" já está em andamento com os mesmos dados; "
+                "acompanhe na aba Tarefas.",
+            )
+        return job
+
+    @staticmethod
+    def _paths_key(paths: Sequence[str]) -> str:
+        return "|".join(sorted(os.path.abspath(p) for p in paths))
 
     # -------- Good Card
     def _action_goodcard_check_cdp(self):
         def worker():
-            ok, err = core.goodcard_check_cdp()
+            ok, err = self.worker.call("goodcard_check_cdp")
             if ok:
+                # Deixa a conexão CDP aquecida para as próximas ações do Good Card
+                try:
+                    self.worker.call("goodcard_start_session")
+                except Exception:
+                    pass
                 self.event_queue.put(
                     {"type": "ui", "action": "set_status_goodcard", "text": "Chrome (CDP) acessível em 127.0.0.1:9222."}
                 )
@@ -542,12 +840,12 @@ class App:
                     }
                 )
 
-        self._run_in_thread(worker)
+        self._submit("goodcard_check_cdp", "Good Card: verificar conexão", worker)
 
     def _action_goodcard_list_tabs(self):
         def worker():
             try:
-                tabs = core.goodcard_list_tabs()
+                tabs = self.worker.call("goodcard_list_tabs")
             except Exception as e:
                 self.event_queue.put(
                     {
@@ -561,12 +859,12 @@ class App:
 
             self.event_queue.put({"type": "ui", "action": "update_goodcard_tabs", "tabs": tabs})
 
-        self._run_in_thread(worker)
+        self._submit("goodcard_list_tabs", "Good Card: listar abas", worker)
 
     def _action_goodcard_open_portal(self):
         def worker():
             try:
-                core.goodcard_open_portal_tab()
+                self.worker.call("goodcard_open_portal_tab")
                 self.event_queue.put(
                     {
                         "type": "ui",
@@ -586,13 +884,13 @@ class App:
                     }
                 )
 
-        self._run_in_thread(worker)
+        self._submit("goodcard_open_portal", "Good Card: abrir portal", worker)
 
-    def _action_goodcard_capture_selected(self):
+    def _goodcard_selected_url(self) -> Optional[str]:
         selection = self.goodcard_tabs_var.get()
         if not selection:
             messagebox.showwarning("Good Card", "Selecione primeiro uma aba na lista.")
-            return
+            return None
 
         # A string da combo é "Título | URL"
         url = None
@@ -604,11 +902,18 @@ class App:
 
         if not url:
             messagebox.showerror("Good Card", "Não consegui identificar a URL da aba selecionada.")
+            return None
+        return url
+
+    def _action_goodcard_capture_selected(self):
+        url = self._goodcard_selected_url()
+        incremental = not self.goodcard_completa_var.get()
+        if not url:
             return
 
         def worker():
             try:
-                rows = core.goodcard_capture_from_url(url)
+                result = self.worker.call("goodcard_capture_from_url", url, incremental=incremental)
             except Exception as e:
                 self.event_queue.put(
                     {
@@ -620,36 +925,415 @@ class App:
                 )
                 return
 
+            rows = result.get("rows") or []
+            ignoradas = result.get("ignoradas", 0)
             if not rows:
+                msg = "Nenhuma transação foi encontrada na aba selecionada."
+                if ignoradas:
+                    msg = f"Nenhuma transação nova: as {ignoradas} da aba já tinham sido capturadas."
                 self.event_queue.put(
                     {
                         "type": "ui",
                         "action": "info_message",
                         "title": "Captura Good Card",
-                        "message": "Nenhuma transação foi encontrada na aba selecionada.",
+                        "message": msg,
+                    }
+                )
+                return
+
+            self._save_goodcard_rows(rows, ignoradas)
+
+        self._submit("goodcard_capture_selected", "Good Card: capturar aba", worker, key=url)
+
+    def _action_goodcard_crawl_selected(self):
+        url = self._goodcard_selected_url()
+        incremental = not self.goodcard_completa_var.get()
+        if not url:
+            return
+
+        def progress(paginas: int, linhas: int):
+            self.event_queue.put(
+                {
+                    "type": "ui",
+                    "action": "set_status_goodcard",
+                    "text": f"Varrendo páginas do portal... {paginas} página(s), {linhas} transação(ões) novas.",
+                }
+            )
+
+        def worker():
+            try:
+                result = self.worker.call(
+                    "goodcard_crawl_from_url", url, progress_cb=progress, incremental=incremental
+                )
+            except Exception as e:
+                self.event_queue.put(
+                    {
+                        "type": "ui",
+                        "action": "error_message",
+                        "title": "Erro na captura Good Card",
+                        "message": str(e),
+                    }
+                )
+                return
+
+            rows = result.get("rows") or []
+            ignoradas = result.get("ignoradas", 0)
+            resumo = f"{result.get('paginas', 0)} página(s) lidas; parada: {result.get('motivo', '')}."
+            self.event_queue.put({"type": "ui", "action": "set_status_goodcard", "text": resumo})
+            if not rows:
+                self.event_queue.put(
+                    {
+                        "type": "ui",
+                        "action": "info_message",
+                        "title": "Captura Good Card",
+                        "message": "Nenhuma transação nova foi encontrada.\n" + resumo,
+                    }
+                )
+                return
+
+            # Todas as páginas vão para um único arquivo de captura
+            self._save_goodcard_rows(rows, ignoradas)
+
+        self._submit("goodcard_crawl_selected", "Good Card: todas as páginas", worker, key=url)
+
+    def _action_goodcard_capture_network(self):
+        url = self._goodcard_selected_url()
+        incremental = not self.goodcard_completa_var.get()
+        if not url:
+            return
+
+        self.status_goodcard.set("Recarregando a aba e lendo as respostas JSON do portal...")
+
+        def worker():
+            try:
+                result = self.worker.call("goodcard_capture_from_network", url, incremental=incremental)
+            except Exception as e:
+                self.event_queue.put(
+                    {
+                        "type": "ui",
+                        "action": "error_message",
+                        "title": "Erro na captura Good Card",
+                        "message": str(e),
+                    }
+                )
+                return
+
+            rows = result.get("rows") or []
+            ignoradas = result.get("ignoradas", 0)
+            resumo = (
+                f"{result.get('respostas', 0)} resposta(s) JSON lidas, "
+                f"{result.get('paginas_extras', 0)} página(s) extras buscadas na API."
+            )
+            self.event_queue.put({"type": "ui", "action": "set_status_goodcard", "text": resumo})
+            if not rows:
+                msg = "Nenhuma lista de transações foi encontrada nas respostas do portal.\nUse a captura pela tabela nessa aba."
+                if ignoradas:
+                    msg = f"Nenhuma transação nova: as {ignoradas} recebidas do portal já tinham sido capturadas."
+                self.event_queue.put(
+                    {
+                        "type": "ui",
+                        "action": "info_message",
+                        "title": "Captura Good Card",
+                        "message": msg,
+                    }
+                )
+                return
+
+            self._save_goodcard_rows(rows, ignoradas)
+
+        self._submit("goodcard_capture_network", "Good Card: captura via rede", worker, key=url)
+
+    def _action_goodcard_capture_many(self):
+        if not self.goodcard_tabs:
+            messagebox.showwarning("Good Card", "Liste primeiro as abas do Chrome (botão 'Listar abas').")
+            return
+
+        win = tk.Toplevel(self.root)
+        win.title("Capturar várias abas")
+        win.transient(self.root)
+        win.grab_set()
+
+        ttk.Label(
+            win,
+            text="Marque as abas do portal (uma por login/filial) e dê um nome de filial a cada uma.\n"
+            "O nome identifica a filial nas capturas; use sempre o mesmo para o mesmo login.\n"
+            "Todas são capturadas ao mesmo tempo e gravadas num único arquivo.",
+            justify="left",
+        ).pack(anchor="w", padx=10, pady=(10, 4))
+
+        # Nomes usados da última vez, pelo título da aba
+        filiais_salvas: Dict[str, str] = dict(storage.load_settings().get("goodcard_filiais") or {})
+        grid = ttk.Frame(win)
+        grid.pack(fill="both", expand=True, padx=10)
+        grid.columnconfigure(1, weight=1)
+        ttk.Label(grid, text="Aba").grid(row=0, column=1, sticky="w")
+        ttk.Label(grid, text="Filial").grid(row=0, column=2, sticky="w", padx=(8, 0))
+        escolhas = []
+        for i, tab in enumerate(self.goodcard_tabs, start=1):
+            title = tab.get("title", "")
+            marcada = tk.BooleanVar(value=False)
+            filial = tk.StringVar(value=filiais_salvas.get(title, ""))
+            ttk.Checkbutton(grid, variable=marcada).grid(row=i, column=0, sticky="w")
+            ttk.Label(grid, text=f"{title or '(sem título)'} | {tab.get('url', '')}"[:90]).grid(
+                row=i, column=1, sticky="w"
+            )
+            ttk.Entry(grid, textvariable=filial, width=24).grid(row=i, column=2, sticky="w", padx=(8, 0), pady=1)
+            escolhas.append((tab, marcada, filial))
+
+        def confirmar():
+            tabs = []
+            for tab, marcada, filial in escolhas:
+                if not marcada.get():
+                    continue
+                nome = filial.get().strip()
+                if not nome:
+                    messagebox.showwarning(
+                        "Good Card", f"Informe a filial da aba \"{tab.get('title') or tab.get('url')}\".", parent=win
+                    )
+                    return
+                tabs.append(dict(tab, filial=nome))
+            if not tabs:
+                messagebox.showwarning("Good Card", "Selecione pelo menos uma aba.", parent=win)
+                return
+            nomes = [core.goodcard_tab_origem(t["filial"]) for t in tabs]
+            if len(set(nomes)) != len(nomes):
+                messagebox.showwarning("Good Card", "Cada aba precisa de uma filial diferente.", parent=win)
+                return
+            for t in tabs:
+                if t.get("title"):
+                    filiais_salvas[t["title"]] = t["filial"]
+            try:
+                storage.update_settings(goodcard_filiais=filiais_salvas)
+            except config_service.ConfigError:
+                # Só perde o preenchimento da próxima vez; a captura segue
+                pass
+            win.destroy()
+            self.status_goodcard.set(f"Capturando {len(tabs)} aba(s) em paralelo...")
+            self._submit(
+                "goodcard_capture_many",
+                "Good Card: várias abas",
+                worker,
+                tabs,
+                not self.goodcard_completa_var.get(),
+                key="|".join(sorted(t["filial"] for t in tabs)),
+            )
+
+        def worker(tabs, incremental):
+            try:
+                result = self.worker.call("goodcard_capture_tabs", tabs, incremental=incremental)
+            except Exception as e:
+                self.event_queue.put(
+                    {
+                        "type": "ui",
+                        "action": "error_message",
+                        "title": "Erro na captura Good Card",
+                        "message": str(e),
+                    }
+                )
+                return
+            self.event_queue.put({"type": "ui", "action": "goodcard_multi_captured", "result": result})
+
+        btns = ttk.Frame(win)
+        btns.pack(fill="x", padx=10, pady=10)
+        ttk.Button(btns, text="Capturar selecionadas", command=confirmar).pack(side="right")
+        ttk.Button(btns, text="Cancelar", command=win.destroy).pack(side="right", padx=(0, 4))
+
+    def _action_goodcard_import_html(self):
+        html_paths = filedialog.askopenfilenames(
+            title="Selecione as páginas do Good Card salvas (.html)",
+            filetypes=[("Páginas HTML", "*.html *.htm"), ("Todos os arquivos", "*.*")],
+        )
+        if not html_paths:
+            return
+
+        self.status_goodcard.set(f"Lendo {len(html_paths)} arquivo(s) HTML...")
+
+        def worker():
+            try:
+                result = self.worker.call("import_goodcard_html", list(html_paths))
+            except Exception as e:
+                self.event_queue.put(
+                    {
+                        "type": "ui",
+                        "action": "error_message",
+                        "title": "Erro ao importar HTML",
+                        "message": str(e),
                     }
                 )
                 return
 
-            fn = save_path = core.save_capture_txt(rows, "GoodCard")  # type: ignore[attr-defined]
+            arquivos = result.get("arquivos") or []
+            erros = [f"{a['arquivo']}: {a['erro']}" for a in arquivos if a.get("erro")]
+            vazios = [a["arquivo"] for a in arquivos if not a.get("erro") and not a.get("count")]
+            self.event_queue.put(
+                {
+                    "type": "ui",
+                    "action": "set_status_goodcard",
+                    "text": f"{len(arquivos)} arquivo(s) HTML lidos; {len(vazios)} sem transações novas; {len(erros)} com erro.",
+                }
+            )
+            if erros:
+                self.event_queue.put(
+                    {
+                        "type": "ui",
+                        "action": "warning_message",
+                        "title": "Importar HTML",
+                        "message": "Arquivos com erro:\n" + "\n".join(erros),
+                    }
+                )
+
+            rows = result.get("rows") or []
+            if not rows:
+                self.event_queue.put(
+                    {
+                        "type": "ui",
+                        "action": "info_message",
+                        "title": "Importar HTML",
+                        "message": "Nenhuma tabela de transações do Good Card foi encontrada nos arquivos.",
+                    }
+                )
+                return
 
             dmin, dmax = core.date_range_from_rows(rows)  # type: ignore[attr-defined]
             if dmin and dmax:
                 intervalo = f"{dmin.strftime('%d/%m/%Y %H:%M:%S')}  até  {dmax.strftime('%d/%m/%Y %H:%M:%S')}"
             else:
                 intervalo = "N/D"
-
             self.event_queue.put(
                 {
                     "type": "ui",
                     "action": "goodcard_captured",
                     "count": len(rows),
-                    "file": save_path,
+                    "file": result.get("file"),
                     "intervalo": intervalo,
                 }
             )
 
-        self._run_in_thread(worker)
+        self._submit("goodcard_import_html", "Good Card: importar HTML", worker, key=self._paths_key(html_paths))
+
+    def _action_goodcard_collector_start(self):
+        url = self._goodcard_selected_url()
+        if not url:
+            return
+        if self._collector_stop is not None:
+            self._collector_stop.set()
+
+        auto_scroll = bool(self.goodcard_autoscroll_var.get())
+        self._collector_url = url
+        # Para o acompanhamento (Salvar coleta, reinício ou fechar a janela)
+        stop_event = task_executor.CancelToken()
+        self._collector_stop = stop_event
+
+        def worker():
+            try:
+                self.worker.call("goodcard_collector_start", url, auto_scroll=auto_scroll)
+            except Exception as e:
+                self.event_queue.put(
+                    {
+                        "type": "ui",
+                        "action": "error_message",
+                        "title": "Erro na coleta Good Card",
+                        "message": str(e),
+                    }
+                )
+                return
+            # O acompanhamento dura até a coleta ser salva: roda numa thread
+            # própria para não prender uma das threads do executor
+            threading.Thread(
+                target=self._collector_monitor, args=(url, stop_event), name="goodcard-coleta", daemon=True
+            ).start()
+
+        self._submit("goodcard_collector", "Good Card: coleta contínua", worker, key=url)
+
+    def _collector_monitor(self, url: str, stop_event: threading.Event):
+        """
+        Acompanha a contagem da coleta contínua até stop_event ser acionado.
+        """
+        while not stop_event.wait(1.0):
+            try:
+                st = self.worker.call("goodcard_collector_status", url)
+            except Exception:
+                continue
+            if st.get("rolando"):
+                fase = "rolando a lista"
+            elif st.get("concluida"):
+                fase = "fim da lista, clique em Salvar coleta"
+            else:
+                fase = "role a lista no portal"
+            self.event_queue.put(
+                {
+                    "type": "ui",
+                    "action": "set_status_goodcard",
+                    "text": f"Coleta contínua: {st.get('linhas', 0)} transação(ões) vistas ({fase}).",
+                }
+            )
+
+    def _action_goodcard_collector_save(self):
+        url = self._collector_url
+        incremental = not self.goodcard_completa_var.get()
+        if not url or self._collector_stop is None:
+            messagebox.showwarning("Good Card", "Inicie primeiro a coleta contínua em uma aba.")
+            return
+        self._collector_stop.set()
+        self._collector_stop = None
+        self._collector_url = None
+
+        def worker():
+            try:
+                result = self.worker.call("goodcard_collector_collect", url, stop=True, incremental=incremental)
+            except Exception as e:
+                self.event_queue.put(
+                    {
+                        "type": "ui",
+                        "action": "error_message",
+                        "title": "Erro na coleta Good Card",
+                        "message": str(e),
+                    }
+                )
+                return
+
+            rows = result.get("rows") or []
+            ignoradas = result.get("ignoradas", 0)
+            if not rows:
+                msg = "A coleta contínua não encontrou nenhuma transação."
+                if ignoradas:
+                    msg = f"Nenhuma transação nova: as {ignoradas} coletadas já tinham sido capturadas."
+                self.event_queue.put(
+                    {
+                        "type": "ui",
+                        "action": "info_message",
+                        "title": "Captura Good Card",
+                        "message": msg,
+                    }
+                )
+                return
+
+            self._save_goodcard_rows(rows, ignoradas)
+
+        self._submit("goodcard_collector_save", "Good Card: salvar coleta", worker)
+
+    def _save_goodcard_rows(self, rows: List[Dict[str, str]], ignoradas: int = 0):
+        """
+        Grava as vendas num arquivo de captura e avisa a interface (chamado nas threads de captura).
+        """
+        save_path = self.worker.call("save_goodcard_capture", rows, "GoodCard")
+
+        dmin, dmax = core.date_range_from_rows(rows)  # type: ignore[attr-defined]
+        if dmin and dmax:
+            intervalo = f"{dmin.strftime('%d/%m/%Y %H:%M:%S')}  até  {dmax.strftime('%d/%m/%Y %H:%M:%S')}"
+        else:
+            intervalo = "N/D"
+
+        self.event_queue.put(
+            {
+                "type": "ui",
+                "action": "goodcard_captured",
+                "count": len(rows),
+                "file": save_path,
+                "intervalo": intervalo,
+                "ignoradas": ignoradas,
+            }
+        )
 
     # -------- Vale Card
     def _action_valecard_pdf(self):
@@ -662,8 +1346,8 @@ class App:
 
         def worker():
             try:
-                rows = core.valecard_capture_from_pdf(pdf_path)  # type: ignore[attr-defined]
-                desp = core.valecard_somar_despesas_pdf(pdf_path)  # type: ignore[attr-defined]
+                rows = self.worker.call("valecard_capture_from_pdf", pdf_path)
+                desp = self.worker.call("valecard_somar_despesas_pdf", pdf_path)
             except Exception as e:
                 self.event_queue.put(
                     {
@@ -677,26 +1361,14 @@ class App:
 
             saved_file = None
             if rows:
-                saved_file = core.save_capture_txt(rows, "ValeCard")  # type: ignore[attr-defined]
+                saved_file = self.worker.call("save_capture_txt", rows, "ValeCard")
 
             # Atualizar arquivo de despesas (mantendo compatibilidade)
             total_abs = abs(desp.get("total_despesas", 0.0))
             taxa_abs = abs(desp.get("total_taxa_adm", 0.0))
             outras_abs = abs(desp.get("total_outras", 0.0))
             try:
-                with open(core.VALE_DESP_FILE, "w", encoding="utf-8") as f:  # type: ignore[attr-defined]
-                    json.dump(
-                        {
-                            "total_despesas_abs": total_abs,
-                            "taxa_adm_abs": taxa_abs,
-                            "outras_abs": outras_abs,
-                            "arquivo": pdf_path,
-                            "atualizado_em": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
-                        },
-                        f,
-                        ensure_ascii=False,
-                        indent=2,
-                    )
+                self.worker.call("save_valecard_despesas", desp, pdf_path)
             except Exception:
                 pass
 
@@ -719,11 +1391,7 @@ class App:
                 }
             )
 
-        # Imports locais para evitar ciclos no topo do arquivo
-        import json  # type: ignore
-        from datetime import datetime  # type: ignore
-
-        self._run_in_thread(worker)
+        self._submit("valecard_pdf", "Vale Card: ler PDF", worker, key=self._paths_key([pdf_path]))
 
     def _action_valecard_multiple_pdfs(self):
         pdf_paths = filedialog.askopenfilenames(
@@ -734,20 +1402,15 @@ class App:
             return
 
         def worker():
-            import json as _json
-            from datetime import datetime as _dt
-
             all_rows = []
             seen = set()
-            total_despesas = 0.0
-            total_taxa_adm = 0.0
-            total_outras = 0.0
+            despesas = None
             errors = []
 
             for pdf_path in pdf_paths:
                 try:
-                    rows = core.valecard_capture_from_pdf(pdf_path)
-                    desp = core.valecard_somar_despesas_pdf(pdf_path)
+                    rows = self.worker.call("valecard_capture_from_pdf", pdf_path)
+                    desp = self.worker.call("valecard_somar_despesas_pdf", pdf_path)
                 except Exception as e:
                     errors.append(f"{os.path.basename(pdf_path)}: {e}")
                     continue
@@ -758,9 +1421,7 @@ class App:
                         seen.add(key)
                         all_rows.append(r)
 
-                total_despesas += desp.get("total_despesas", 0.0)
-                total_taxa_adm += desp.get("total_taxa_adm", 0.0)
-                total_outras += desp.get("total_outras", 0.0)
+                despesas = core.merge_despesas(despesas, desp)
 
             if errors:
                 self.event_queue.put(
@@ -772,6 +1433,10 @@ class App:
                     }
                 )
 
+            total_despesas = despesas.get("total_despesas", 0.0) if despesas else 0.0
+            total_taxa_adm = despesas.get("total_taxa_adm", 0.0) if despesas else 0.0
+            total_outras = despesas.get("total_outras", 0.0) if despesas else 0.0
+
             if not all_rows and not (total_despesas or total_taxa_adm or total_outras):
                 self.event_queue.put(
                     {
@@ -785,7 +1450,7 @@ class App:
 
             saved_file = None
             if all_rows:
-                saved_file = core.save_capture_txt(all_rows, "ValeCard")
+                saved_file = self.worker.call("save_capture_txt", all_rows, "ValeCard")
 
             soma_vendas = sum(core.brl_to_float(r.get("bruto", "")) for r in all_rows)
             dmin, dmax = core.date_range_from_rows(all_rows) if all_rows else (None, None)
@@ -798,22 +1463,11 @@ class App:
             taxa_abs = abs(total_taxa_adm)
             outras_abs = abs(total_outras)
 
-            try:
-                with open(core.VALE_DESP_FILE, "w", encoding="utf-8") as f:
-                    _json.dump(
-                        {
-                            "total_despesas_abs": total_desp_abs,
-                            "taxa_adm_abs": taxa_abs,
-                            "outras_abs": outras_abs,
-                            "arquivo": f"{len(pdf_paths)} PDF(s) agregados",
-                            "atualizado_em": _dt.now().strftime("%d/%m/%Y %H:%M:%S"),
-                        },
-                        f,
-                        ensure_ascii=False,
-                        indent=2,
-                    )
-            except Exception:
-                pass
+            if despesas is not None:
+                try:
+                    self.worker.call("save_valecard_despesas", despesas, f"{len(pdf_paths)} PDF(s) agregados")
+                except Exception:
+                    pass
 
             self.event_queue.put(
                 {
@@ -830,7 +1484,7 @@ class App:
                 }
             )
 
-        self._run_in_thread(worker)
+        self._submit("valecard_multiple_pdfs", "Vale Card: ler vários PDFs", worker, key=self._paths_key(pdf_paths))
 
     # -------- Rede Frota
     def _action_redefrota_pdf(self):
@@ -843,7 +1497,7 @@ class App:
 
         def worker():
             try:
-                rows = core.redefrota_capture_from_pdf(pdf_path)  # type: ignore[attr-defined]
+                rows = self.worker.call("redefrota_capture_from_pdf", pdf_path)
             except Exception as e:
                 self.event_queue.put(
                     {
@@ -866,7 +1520,7 @@ class App:
                 )
                 return
 
-            save_path = core.save_capture_txt(rows, "RedeFrota")  # type: ignore[attr-defined]
+            save_path = self.worker.call("save_capture_txt", rows, "RedeFrota")
             dmin, dmax = core.date_range_from_rows(rows)  # type: ignore[attr-defined]
             if dmin and dmax:
                 intervalo = f"{dmin.strftime('%d/%m/%Y %H:%M:%S')}  até  {dmax.strftime('%d/%m/%Y %H:%M:%S')}"
@@ -883,14 +1537,46 @@ class App:
                 }
             )
 
-        self._run_in_thread(worker)
+        self._submit("redefrota_pdf", "Rede Frota: ler PDF", worker, key=self._paths_key([pdf_path]))
+
+    # -------- Importar PDFs (detecção automática)
+    def _action_importar_pdfs(self):
+        pdf_paths = filedialog.askopenfilenames(
+            title="Selecione os PDFs (Vale Card, Rede Frota...)",
+            filetypes=[("PDF", "*.pdf"), ("Todos os arquivos", "*.*")],
+        )
+        if not pdf_paths:
+            return
+
+        def worker():
+            try:
+                result = self.worker.call("import_statement_pdfs", list(pdf_paths))
+            except Exception as e:
+                self.event_queue.put(
+                    {
+                        "type": "ui",
+                        "action": "error_message",
+                        "title": "Erro ao importar PDFs",
+                        "message": str(e),
+                    }
+                )
+                return
+
+            self.event_queue.put({"type": "ui", "action": "pdfs_imported", "result": result, "num_pdfs": len(pdf_paths)})
+
+        self._submit("importar_pdfs", "Importar PDFs", worker, key=self._paths_key(pdf_paths))
 
     # -------- Unificar / Limpar capturas / CSV
     def _action_unificar(self):
         def worker():
             try:
-                summary = core.summarize_unified_captures()
+                snap = core.get_unified_snapshot(loader=self._load_unified)
                 vale = core.load_valecard_despesas()
+                # Índice da grade montado aqui, fora do loop do Tk, uma vez por versão
+                index = None
+                if self.unified_index is None or self.unified_index.version != snap["version"]:
+                    index = UnifiedIndex(snap["items"], version=snap["version"])
+                    index.order("dt")
             except Exception as e:
                 self.event_queue.put(
                     {
@@ -906,12 +1592,13 @@ class App:
                 {
                     "type": "ui",
                     "action": "unified",
-                    "summary": summary,
+                    "version": snap["version"],
                     "vale": vale,
+                    "index": index,
                 }
             )
 
-        self._run_in_thread(worker)
+        self._submit("unificar", "Unificar capturas", worker)
 
     def _action_limpar_capturas(self):
         if not messagebox.askyesno(
@@ -921,7 +1608,8 @@ class App:
             return
 
         def worker():
-            count = core.clear_captures()
+            count = self.worker.call("clear_captures")
+            core.invalidate_unified_snapshot()
             self.event_queue.put(
                 {
                     "type": "ui",
@@ -931,14 +1619,15 @@ class App:
                 }
             )
 
-        self._run_in_thread(worker)
+        self._submit("limpar_capturas", "Limpar capturas", worker)
 
     def _action_export_csv(self):
         csv_path = os.path.join(os.getcwd(), "capturas_unificadas.csv")
 
         def worker():
             try:
-                info = core.export_unified_to_csv(csv_path)
+                snap = core.get_unified_snapshot(loader=self._load_unified)
+                info = core.export_unified_to_csv(csv_path, items=snap["items"])
             except Exception as e:
                 self.event_queue.put(
                     {
@@ -959,7 +1648,58 @@ class App:
                 }
             )
 
-        self._run_in_thread(worker)
+        self._submit("export_csv", "Exportar CSV", worker)
+
+    def _load_unified(self) -> Dict[str, Any]:
+        # Leitura das capturas no processo auxiliar (quando o snapshot precisa ser refeito)
+        return self.worker.call("summarize_unified_captures")
+
+    # -------- Grade das capturas unificadas
+    def _grid_row_values(self, i: int):
+        return self.unified_index.row_values(self._grid_rows[i])
+
+    def _action_filtrar_grade(self):
+        index = self.unified_index
+        if index is None:
+            return
+        try:
+            filtros = {
+                "dt_min": parse_date_filter(self.grade_de_var.get()),
+                "dt_max": parse_date_filter(self.grade_ate_var.get(), end=True),
+                "cents_min": parse_value_filter(self.grade_vmin_var.get()),
+                "cents_max": parse_value_filter(self.grade_vmax_var.get()),
+            }
+        except ValueError as e:
+            messagebox.showwarning("Capturas unificadas", str(e))
+            return
+        origem = self.grade_origem_var.get()
+        self._grid_rows = index.query(
+            origem=None if origem == "Todas" else origem,
+            sort=self._grid_sort,
+            desc=self._grid_desc,
+            **filtros,
+        )
+        self.grade.set_count(len(self._grid_rows))
+        soma = index.total_cents(self._grid_rows) / 100
+        self.status_grade.set(
+            f"Exibindo {len(self._grid_rows)} de {len(index)} transações | Soma bruta: R$ {soma:.2f}"
+        )
+
+    def _action_limpar_filtros_grade(self):
+        self.grade_origem_var.set("Todas")
+        for var in (self.grade_de_var, self.grade_ate_var, self.grade_vmin_var, self.grade_vmax_var):
+            var.set("")
+        self._action_filtrar_grade()
+
+    def _action_ordenar_grade(self, column: str):
+        if column not in ("dt", "bruto", "origem"):
+            return
+        if column == self._grid_sort:
+            self._grid_desc = not self._grid_desc
+        else:
+            self._grid_sort, self._grid_desc = column, False
+        self.grade.set_sort_indicator(self._grid_sort, self._grid_desc)
+        self._action_filtrar_grade()
 
     # -------- EMSYS
     def _action_capturar_ponto_grid(self):
@@ -996,11 +1736,68 @@ class App:
         self.status_emsys_calibracao.set("Calibração salva com sucesso.")
         messagebox.showinfo("Calibrar EMSYS", "Calibração salva com sucesso.")
 
+    def _conciliacao_tolerancia(self) -> Optional[int]:
+        raw = self.conciliacao_tolerancia_var.get().strip()
+        if not raw:
+            return None
+        try:
+            return max(0, int(raw))
+        except ValueError:
+            raise ValueError("A tolerância de datas deve ser um número inteiro de dias.")
+
+    def _action_conciliar_arquivo(self):
+        path = filedialog.askopenfilename(
+            title="Selecione o grid do EMSYS exportado",
+            filetypes=[("Texto", "*.txt *.tsv *.csv"), ("Todos os arquivos", "*.*")],
+        )
+        if not path:
+            return
+        self._run_conciliacao(export_path=path)
+
+    def _action_conciliar_clipboard(self):
+        try:
+            text = self.root.clipboard_get()
+        except tk.TclError:
+            messagebox.showwarning("Prévia da conciliação", "A área de transferência está vazia.")
+            return
+        self._run_conciliacao(text=text)
+
+    def _run_conciliacao(self, export_path: Optional[str] = None, text: Optional[str] = None):
+        try:
+            tolerancia = self._conciliacao_tolerancia()
+        except ValueError as e:
+            messagebox.showerror("Prévia da conciliação", str(e))
+            return
+
+        self.status_conciliacao.set("Conciliando...")
+
+        def worker():
+            try:
+                result = self.worker.call(
+                    "reconcile_with_emsys", export_path=export_path, text=text, tolerance_days=tolerancia
+                )
+            except Exception as e:
+                self.event_queue.put(
+                    {
+                        "type": "ui",
+                        "action": "error_message",
+                        "title": "Erro na prévia da conciliação",
+                        "message": str(e),
+                    }
+                )
+                self.event_queue.put({"type": "ui", "action": "reconciled", "totais": None})
+                return
+
+            self.event_queue.put({"type": "ui", "action": "reconciled", "totais": result["totais"]})
+
+        entrada = os.path.abspath(export_path) if export_path else f"texto:{hash(text)}"
+        self._submit("conciliacao", "Prévia da conciliação", worker, key=f"{entrada}|{tolerancia}")
+
     def _action_rodar_emsys(self):
-        # Garante que temos capturas unificadas na memória
+        # Usa o snapshot das capturas unificadas (só relê se as capturas mudaram)
         def worker_prepare_and_run():
             try:
-                summary = core.summarize_unified_captures()
+                snap = core.get_unified_snapshot(loader=self._load_unified)
             except Exception as e:
                 self.event_queue.put(
                     {
@@ -1012,8 +1809,7 @@ class App:
                 )
                 return
 
-            items = summary.get("items") or []
-            if not items:
+            if not snap.get("items"):
                 self.event_queue.put(
                     {
                         "type": "ui",
@@ -1029,11 +1825,11 @@ class App:
                 {
                     "type": "ui",
                     "action": "confirm_rodar_emsys",
-                    "items": items,
+                    "version": snap["version"],
                 }
             )
 
-        self._run_in_thread(worker_prepare_and_run)
+        self._submit("emsys_preparar", "EMSYS: preparar marcação", worker_prepare_and_run)
 
     def _action_parar_emsys(self):
         """
@@ -1049,12 +1845,51 @@ class App:
             if hasattr(self, "btn_emsys_stop"):
                 self.btn_emsys_stop.configure(state="disabled")
 
+    # -------- Tarefas
+    def _action_cancelar_tarefa(self):
+        sel = self.jobs_tree.selection()
+        if not sel:
+            messagebox.showwarning("Tarefas", "Selecione uma tarefa na lista.")
+            return
+        if not self.executor.cancel(int(sel[0])):
+            messagebox.showinfo("Tarefas", "Essa tarefa já terminou.")
+
+    def _refresh_jobs_table(self):
+        if not hasattr(self, "jobs_tree"):
+            return
+        jobs = self.executor.snapshot()
+        selected = self.jobs_tree.selection()
+        self.jobs_tree.delete(*self.jobs_tree.get_children())
+        for job in jobs:
+            minutos, segundos = divmod(int(job["tempo"]), 60)
+            estado = job["estado"] + (f": {job['erro']}" if job["erro"] else "")
+            self.jobs_tree.insert(
+                "", "end", iid=str(job["id"]), values=(job["tarefa"], estado, f"{minutos:02d}:{segundos:02d}")
+            )
+        if selected and self.jobs_tree.exists(selected[0]):
+            self.jobs_tree.selection_set(selected[0])
+
+        # Enquanto houver tarefa ativa, o tempo decorrido é atualizado a cada segundo
+        if any(job["ativa"] for job in jobs) and not self._jobs_tick_scheduled:
+            self._jobs_tick_scheduled = True
+            self.root.after(1000, self._jobs_tick)
+
+    def _jobs_tick(self):
+        self._jobs_tick_scheduled = False
+        self._refresh_jobs_table()
+
+    def _latency_tick(self):
+        st = self.latency.stats()
+        worker = "processo auxiliar ativo" if self.worker.is_running() else "sem processo auxiliar"
+        self.latencia_var.set(
+            f"Latência da interface (10 s): p95 {st['p95_ms']:.0f} ms, máx. {st['janela_max_ms']:.0f} ms | "
+            f"acima de {st['limite_ms']:.0f} ms: {st['estouros']} vez(es) | {worker}"
+        )
+        self.root.after(1000, self._latency_tick)
+
     # --------------------------------------------------------------------- Utilitários de UI
     def _append_log(self, text: str):
-        self.text_log.configure(state="normal")
-        self.text_log.insert("end", text + "\n")
-        self.text_log.see("end")
-        self.text_log.configure(state="disabled")
+        self.text_log.append(text)
 
     def _open_file(self, filename: str):
         path = os.path.join(os.getcwd(), filename)
@@ -1079,29 +1914,63 @@ class App:
 
     def _action_salvar_goodcard_url(self):
         url = self.goodcard_url_var.get().strip()
-        storage.save_settings({"goodcard_fallback_url": url})
+        # Mescla com as demais configurações (ex.: despesas_categorias) em vez de sobrescrever
+        try:
+            core.set_goodcard_fallback_url(url)
+        except config_service.ConfigError as e:
+            messagebox.showerror("Configuração", str(e))
+            return
         messagebox.showinfo("Configuração", "URL de fallback do Good Card salva com sucesso.")
 
-    # --------------------------------------------------------------------- Processamento da fila de eventos
-    def _process_event_queue(self):
-        while True:
-            try:
-                ev = self.event_queue.get_nowait()
-            except queue.Empty:
-                break
+    def _action_salvar_goodcard_backend(self):
+        backend = self.goodcard_backend_var.get().strip()
+        try:
+            core.set_goodcard_backend(backend)
+        except (ValueError, config_service.ConfigError) as e:
+            messagebox.showerror("Configuração", str(e))
+            return
+        messagebox.showinfo("Configuração", f"Conexão do Good Card: {backend}.")
 
-            if ev.get("type") == "ui":
-                self._handle_ui_event(ev)
-            elif ev.get("type") in ("start", "progress", "log", "end", "error"):
-                # Eventos vindos do core.run_emsys_marking_with_progress
-                self._handle_emsys_event(ev)
+    def on_close(self):
+        """
+        Fecha a janela cancelando as tarefas e encerrando o processo auxiliar
+        (que fecha a sessão CDP persistente) e o log em arquivo. A espera pelo
+        processo auxiliar fica em segundo plano, sem segurar a janela.
+        """
+        self.latency.stop()
+        if self._collector_stop is not None:
+            self._collector_stop.set()
+        self.executor.shutdown()
+        try:
+            self.worker_stopping = worker_host.shutdown_host(wait=False)
+        except Exception:
+            pass
+        if hasattr(self, "text_log"):
+            self.text_log.close()
+        self.root.destroy()
 
-        self.root.after(200, self._process_event_queue)
+    # --------------------------------------------------------------------- Processamento da fila de eventos
+    def _dispatch_event(self, ev: Dict[str, Any]):
+        if ev.get("type") == "ui":
+            self._handle_ui_event(ev)
+        elif ev.get("type") in ("start", "progress", "stats", "log", "end", "error"):
+            # Eventos vindos do core.run_emsys_marking_with_progress
+            self._handle_emsys_event(ev)
+
+    @staticmethod
+    def _merge_progress_events(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+        # Mantém o estado mais recente, mas guarda todos os valores para o log
+        merged = dict(new)
+        merged["valores"] = old.get("valores", [old.get("valor", "")]) + [new.get("valor", "")]
+        return merged
 
     def _handle_ui_event(self, ev: Dict[str, Any]):
         action = ev.get("action")
 
-        if action == "set_status_goodcard":
+        if action == "jobs_changed":
+            self._refresh_jobs_table()
+
+        elif action == "set_status_goodcard":
             self.status_goodcard.set(ev.get("text", ""))
 
         elif action == "error_message":
@@ -1133,12 +2002,35 @@ class App:
             count = ev.get("count", 0)
             file = ev.get("file")
             intervalo = ev.get("intervalo", "")
+            ignoradas = ev.get("ignoradas", 0)
+            extra = f" ({ignoradas} já capturadas foram ignoradas)" if ignoradas else ""
             self.status_goodcard_capture.set(
-                f"Capturadas {count} transações do Good Card. Arquivo: {file}. Intervalo: {intervalo}"
+                f"Capturadas {count} transações novas do Good Card{extra}. Arquivo: {file}. Intervalo: {intervalo}"
             )
             messagebox.showinfo(
                 "Captura Good Card",
-                f"Capturadas {count} transações.\nArquivo salvo em:\n{file}\n\nIntervalo: {intervalo}",
+                f"Capturadas {count} transações novas{extra}.\nArquivo salvo em:\n{file}\n\nIntervalo: {intervalo}",
+            )
+
+        elif action == "goodcard_multi_captured":
+            result = ev.get("result") or {}
+            abas = result.get("abas") or []
+            total = len(result.get("rows") or [])
+            file = result.get("file")
+            linhas = []
+            for aba in abas:
+                if aba.get("erro"):
+                    linhas.append(f"{aba['origem']}: erro - {aba['erro']}")
+                else:
+                    extra = f" ({aba['ignoradas']} já capturadas)" if aba.get("ignoradas") else ""
+                    linhas.append(f"{aba['origem']}: {aba['count']} transações novas{extra}")
+            self.status_goodcard_capture.set(
+                f"Capturadas {total} transações novas de {len(abas)} aba(s). Arquivo: {file or 'N/D'}"
+            )
+            self.status_goodcard.set(f"{len(abas)} aba(s) capturadas.")
+            messagebox.showinfo(
+                "Captura Good Card - várias abas",
+                "\n".join(linhas) + f"\n\nArquivo salvo: {file or 'nenhuma transação nova'}",
             )
 
         elif action == "valecard_processed":
@@ -1181,8 +2073,34 @@ class App:
                 f"Capturadas {count} transações Rede Frota. Arquivo: {file}. Intervalo: {intervalo}"
             )
 
+        elif action == "pdfs_imported":
+            result = ev.get("result") or {}
+            num_pdfs = ev.get("num_pdfs", 0)
+            por_origem = result.get("por_origem") or {}
+            errors = result.get("errors") or []
+            despesas = result.get("despesas")
+
+            resumo = ", ".join(f"{origem}: {info.get('count', 0)}" for origem, info in por_origem.items()) or "nenhuma venda"
+            self.status_import_pdfs.set(f"{num_pdfs} PDF(s) importados | {resumo}")
+
+            linhas = [f"{a['arquivo']}: {a['tipo']} ({a['count']} transações)" for a in result.get("arquivos", [])]
+            msg = "PDFs importados:\n\n" + ("\n".join(linhas) if linhas else "Nenhum PDF reconhecido.")
+            for origem, info in por_origem.items():
+                msg += f"\n\n{origem}: {info.get('count', 0)} transações\nArquivo salvo: {info.get('file') or 'N/D'}"
+            if despesas:
+                msg += (
+                    "\n\nDespesas Vale Card:\n"
+                    f"  Total: R$ {abs(despesas.get('total_despesas', 0.0)):.2f} | "
+                    f"Taxa adm: R$ {abs(despesas.get('total_taxa_adm', 0.0)):.2f} | "
+                    f"Outras: R$ {abs(despesas.get('total_outras', 0.0)):.2f}"
+                )
+            if errors:
+                msg += "\n\nArquivos com erro:\n" + "\n".join(errors)
+            messagebox.showinfo("Importar PDFs", msg)
+
         elif action == "unified":
-            summary = ev.get("summary") or {}
+            # O evento só traz a versão; os itens ficam no snapshot do core
+            summary = core.peek_unified_snapshot() or {}
             vale = ev.get("vale")
             self.unified_items = summary.get("items") or []
             total = summary.get("total", 0)
@@ -1210,10 +2128,46 @@ class App:
             self.status_unificado.set(
                 f"Total unificado: {total} | Soma bruta: R$ {soma:.2f} | Intervalo: {intervalo}"
             )
+            index = ev.get("index")
+            if index is not None and index.version == summary.get("version"):
+                self.unified_index = index
+                self.grade_origem_combo.configure(values=["Todas"] + index.origens)
+                if self.grade_origem_var.get() not in index.origens:
+                    self.grade_origem_var.set("Todas")
+                self._action_filtrar_grade()
             messagebox.showinfo("Unificação de capturas", msg)
 
+        elif action == "reconciled":
+            t = ev.get("totais")
+            if not t:
+                self.status_conciliacao.set("Prévia da conciliação não concluída.")
+                return
+            self.status_conciliacao.set(
+                f"Conciliadas: {t['conciliadas']} | Faltando no EMSYS: {t['faltando']} | "
+                f"Sobrando no EMSYS: {t['sobrando']}"
+            )
+            messagebox.showinfo(
+                "Prévia da conciliação",
+                f"Portal (unificado): {t['portal']} | R$ {t['soma_portal'] / 100:.2f}\n"
+                f"Grid EMSYS: {t['emsys']} | R$ {t['soma_emsys'] / 100:.2f}\n\n"
+                f"Conciliadas: {t['conciliadas']} | R$ {t['soma_conciliadas'] / 100:.2f}\n"
+                f"Faltando no EMSYS: {t['faltando']} | R$ {t['soma_faltando'] / 100:.2f}\n"
+                f"Sobrando no EMSYS: {t['sobrando']} | R$ {t['soma_sobrando'] / 100:.2f}\n\n"
+                f"Detalhes em {core.RECONCILE_REPORT_FILE}.",
+            )
+
         elif action == "confirm_rodar_emsys":
-            items = ev.get("items") or []
+            snap = core.peek_unified_snapshot() or {}
+            # A lista marcada tem de ser a mesma que foi preparada: se outra
+            # tarefa remontou o snapshot ou as capturas mudaram no disco desde
+            # então, pede para preparar de novo.
+            if snap.get("version") != ev.get("version") or snap.get("signature") != core.captures_signature():
+                messagebox.showwarning(
+                    "Rodar EMSYS",
+                    "As capturas mudaram depois da preparação. Clique em 'Rodar EMSYS' de novo para usar a lista atual.",
+                )
+                return
+            items = snap.get("items") or []
             if not items:
                 return
             if not messagebox.askyesno(
@@ -1223,13 +2177,12 @@ class App:
             ):
                 return
 
-            # Inicia thread de execução do EMSYS com callback de progresso
-            self._emsys_cancel_event = threading.Event()
+            # Inicia a marcação no executor, com callback de progresso
             self.emsys_progress_var.set(f"Marcado: 0/{len(items)}")
             self.emsys_last_value_var.set("Último valor marcado: -")
-            self.text_log.configure(state="normal")
-            self.text_log.delete("1.0", "end")
-            self.text_log.configure(state="disabled")
+            self.emsys_rate_var.set("Vazão: -")
+            self.emsys_eta_var.set("Tempo: -")
+            self.text_log.clear()
             self.status_emsys_exec.set("EMSYS em execução...")
 
             # Ajusta botões
@@ -1239,9 +2192,17 @@ class App:
                 self.btn_emsys_stop.configure(state="normal")
 
             def worker_run():
-                core.run_emsys_marking_with_progress(items, self.event_queue.put, cancel_event=self._emsys_cancel_event)
+                token = task_executor.current_job().token
+                core.run_emsys_marking_with_progress(items, self.event_queue.put, cancel_event=token)
 
-            self.emsys_thread = self._run_in_thread(worker_run)
+            self.emsys_job = self._submit("emsys_marcacao", "EMSYS: marcação", worker_run)
+            self._emsys_cancel_event = self.emsys_job.token
+
+    @staticmethod
+    def _fmt_duracao(segundos: float) -> str:
+        minutos, seg = divmod(int(segundos), 60)
+        horas, minutos = divmod(minutos, 60)
+        return f"{horas}:{minutos:02d}:{seg:02d}" if horas else f"{minutos:02d}:{seg:02d}"
 
     def _handle_emsys_event(self, ev: Dict[str, Any]):
         etype = ev.get("type")
@@ -1257,7 +2218,23 @@ class App:
             valor = ev.get("valor", "")
             self.emsys_progress_var.set(f"Marcado: {marcado}/{total}")
             self.emsys_last_value_var.set(f"Último valor marcado: {valor}")
-            self._append_log(f"✅ Marcado: {valor} ({marcado}/{total})")
+            valores = ev.get("valores") or [valor]
+            primeiro = marcado - len(valores) + 1
+            for i, v in enumerate(valores):
+                self._append_log(f"✅ Marcado: {v} ({primeiro + i}/{total})")
+
+        elif etype == "stats":
+            self.emsys_rate_var.set(
+                f"Vazão: {ev.get('linhas', 0)} linhas lidas | "
+                f"{ev.get('linhas_por_s', 0.0):.1f} linhas/s (últimos 10 s) | "
+                f"cópia da linha: {ev.get('copia_ms', 0.0):.0f} ms em média "
+                f"(última {ev.get('copia_ultima_ms', 0.0):.0f} ms) | "
+                f"casamento: {ev.get('taxa_casamento', 0.0) * 100:.0f}%"
+            )
+            eta = ev.get("eta_s")
+            restante = "calculando..." if eta is None else f"~{self._fmt_duracao(eta)}"
+            decorrido = self._fmt_duracao(ev.get("decorrido_s", 0.0))
+            self.emsys_eta_var.set(f"Tempo: {decorrido} decorrido | estimativa para terminar: {restante}")
 
         elif etype == "log":
             msg = ev.get("message", "")
@@ -1305,19 +2282,53 @@ class App:
                     pass
 
 
+def _finish_startup_profile(root: tk.Tk):
+    """
+    Com o perfil ligado, fecha a medição quando a janela principal é
+    desenhada pela primeira vez e grava o relatório.
+    """
+    profiler = startup.get_profiler()
+    if profiler is None:
+        return
+
+    def on_map(event):
+        if event.widget is not root:
+            return
+        root.unbind("<Map>")
+        startup.mark("janela mapeada")
+
+        def done():
+            startup.mark("primeira janela desenhada")
+            profiler.finish()
+
+        root.after_idle(done)
+
+    root.bind("<Map>", on_map, add="+")
+
+
 def main():
+    startup.mark("importações")
     # Se ttkbootstrap estiver disponível, usamos o tema para dar cara mais moderna
     if HAS_BOOTSTRAP:
         style = BootstrapStyle(theme="flatly")  # type: ignore[call-arg]
         root = style.master  # type: ignore[assignment]
     else:
         root = tk.Tk()
+    startup.mark("Tk criado")
 
     app = App(root)
+    root.protocol("WM_DELETE_WINDOW", app.on_close)
     root.minsize(980, 640)
+    startup.mark("abas montadas")
+    _finish_startup_profile(root)
     root.mainloop()
+    # Janela já fechada: dá tempo ao processo auxiliar de fechar a sessão CDP
+    if app.worker_stopping is not None:
+        app.worker_stopping.join()
 
 
 if __name__ == "__main__":
+    # Necessário no executável do PyInstaller: a importação de HTML usa processos
+    multiprocessing.freeze_support()
     main()
 
@@ -0,0 +1,233 @@
+"""
+Benchmark de vazão dos parsers de PDF (legado, fallback do core e novos).
+
+Gera extratos sintéticos com synthetic_statements, roda cada caminho de parse
+e informa páginas/s, linhas/s e pico de memória (tracemalloc). Roda offline,
+só precisa do pdfplumber instalado.
+
+Cada caminho confere a quantidade de linhas e os totais (vendas, despesas)
+com o que o gerador informou; um caminho que diverge aparece como ERRO e o
+programa termina com código 1, em vez de publicar uma vazão sem sentido.
+
+Uso:
+    python bench_parsers.py --paginas 1,10,100 --repeticoes 3
+    python bench_parsers.py --tipo redefrota --paginas 1000 --sem-memoria
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+import synthetic_statements
+
+# Caminho de parse: nome -> função(pdf_path) que retorna o que foi medido,
+# com as mesmas chaves do dict devolvido pelo gerador (ex.: {"vendas": 95}).
+BenchPath = Callable[[str], Dict[str, int]]
+
+
+def _cents(valor) -> int:
+    return int(round(float(valor) * 100))
+
+
+def _rows_summary(rows: List[Dict[str, str]], count_key: str, cents_key: str) -> Dict[str, int]:
+    from robo_cartoes_emsys_v3 import brl_to_float
+
+    return {count_key: len(rows), cents_key: sum(_cents(brl_to_float(r["bruto"])) for r in rows)}
+
+
+def _despesas_summary(desp: Dict) -> Dict[str, int]:
+    return {
+        "despesas_centavos": abs(_cents(desp.get("total_despesas", 0.0))),
+        "taxa_adm_centavos": abs(_cents(desp.get("total_taxa_adm", 0.0))),
+    }
+
+
+def _valecard_paths() -> Dict[str, BenchPath]:
+    import core
+    import pdf_parsers
+    import robo_cartoes_emsys_v3 as legado
+    import statement_registry
+
+    def vendas(rows):
+        return _rows_summary(rows, "vendas", "vendas_centavos")
+
+    return {
+        "legado": lambda p: vendas(legado.valecard_capture_from_pdf(p)),
+        "fallback_core": lambda p: vendas(core._extract_valecard_rows_from_text(core._extract_text_from_all_pages(p))),
+        "palavras": lambda p: vendas(pdf_parsers.valecard_capture_from_pdf_words(p)[0]),
+        "registro": lambda p: _registro_valecard(statement_registry.parse_statement_pdf(p)),
+        "despesas_legado": lambda p: _despesas_summary(legado.valecard_somar_despesas_pdf(p)),
+        "despesas_core": lambda p: _despesas_summary(core.valecard_somar_despesas_pdf(p)),
+    }
+
+
+def _registro_valecard(result: Dict) -> Dict[str, int]:
+    out = _rows_summary(result["rows"], "vendas", "vendas_centavos")
+    out.update(_despesas_summary(result.get("despesas") or {}))
+    return out
+
+
+def _redefrota_paths() -> Dict[str, BenchPath]:
+    import core  # noqa: F401  (registra os parsers embutidos)
+    import pdf_parsers
+    import robo_cartoes_emsys_v3 as legado
+    import statement_registry
+
+    def transacoes(rows):
+        return _rows_summary(rows, "transacoes", "total_centavos")
+
+    return {
+        "legado": lambda p: transacoes(legado.redefrota_capture_from_pdf(p)),
+        "streaming": lambda p: transacoes(pdf_parsers.redefrota_capture_from_pdf_stream(p)),
+        "registro": lambda p: transacoes(statement_registry.parse_statement_pdf(p)["rows"]),
+    }
+
+
+# Chave do dict medido que conta linhas, por tipo de extrato
+COUNT_KEYS = {"valecard": "vendas", "redefrota": "transacoes"}
+
+
+def check_result(medido: Dict[str, int], esperado: Dict[str, int]) -> List[str]:
+    """
+    Diferenças entre o que o caminho mediu e o que o gerador informou.
+    """
+    return [f"{k}: {v} (esperado {esperado[k]})" for k, v in medido.items() if k in esperado and v != esperado[k]]
+
+
+BENCH_PATHS: Dict[str, Callable[[], Dict[str, BenchPath]]] = {
+    "valecard": _valecard_paths,
+    "redefrota": _redefrota_paths,
+}
+
+
+def _measure(fn: BenchPath, pdf_path: str, repeticoes: int, memoria: bool) -> Tuple[float, Dict[str, int], int]:
+    """
+    Retorna (melhor_tempo_s, medido, pico_memoria_bytes).
+    O tempo é medido sem tracemalloc; o pico de memória numa execução extra.
+    """
+    best = float("inf")
+    medido: Dict[str, int] = {}
+    for _ in range(repeticoes):
+        gc.collect()
+        t0 = time.perf_counter()
+        medido = fn(pdf_path)
+        best = min(best, time.perf_counter() - t0)
+
+    peak = 0
+    if memoria:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn(pdf_path)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return best, medido, peak
+
+
+def run_benchmark(
+    tipos: List[str],
+    paginas: List[int],
+    repeticoes: int = 3,
+    memoria: bool = True,
+    caminhos: Optional[List[str]] = None,
+    work_dir: Optional[str] = None,
+) -> List[Dict]:
+    results: List[Dict] = []
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        for tipo in tipos:
+            paths = BENCH_PATHS[tipo]()
+            if caminhos:
+                paths = {k: v for k, v in paths.items() if k in caminhos}
+            for n in paginas:
+                pdf_path = os.path.join(tmp, f"{tipo}_{n}.pdf")
+                expected = synthetic_statements.GENERATORS[tipo](pdf_path, n)
+                for nome, fn in paths.items():
+                    try:
+                        elapsed, medido, peak = _measure(fn, pdf_path, repeticoes, memoria)
+                    except Exception as e:
+                        results.append({"tipo": tipo, "caminho": nome, "paginas": n, "erro": str(e)})
+                        continue
+                    divergencias = check_result(medido, expected)
+                    if divergencias:
+                        results.append(
+                            {
+                                "tipo": tipo,
+                                "caminho": nome,
+                                "paginas": n,
+                                "erro": "resultado divergente: " + "; ".join(divergencias),
+                                "medido": medido,
+                                "esperado": expected,
+                            }
+                        )
+                        continue
+                    rows = medido.get(COUNT_KEYS[tipo], 0)
+                    results.append(
+                        {
+                            "tipo": tipo,
+                            "caminho": nome,
+                            "paginas": n,
+                            "linhas": rows,
+                            "medido": medido,
+                            "esperado": expected,
+                            "segundos": elapsed,
+                            "paginas_s": n / elapsed if elapsed else 0.0,
+                            "linhas_s": rows / elapsed if elapsed else 0.0,
+                            "pico_mem_mb": peak / (1024 * 1024),
+                        }
+                    )
+    return results
+
+
+def print_table(results: List[Dict], out=sys.stdout) -> None:
+    cols = f"{'tipo':<10} {'caminho':<16} {'pág':>5} {'linhas':>7} {'seg':>8} {'pág/s':>8} {'linhas/s':>10} {'pico MB':>8}"
+    print(cols, file=out)
+    print("-" * len(cols), file=out)
+    for r in results:
+        if "erro" in r:
+            print(f"{r['tipo']:<10} {r['caminho']:<16} {r['paginas']:>5}  ERRO: {r['erro']}", file=out)
+            continue
+        print(
+            f"{r['tipo']:<10} {r['caminho']:<16} {r['paginas']:>5} {r['linhas']:>7} {r['segundos']:>8.3f} "
+            f"{r['paginas_s']:>8.1f} {r['linhas_s']:>10.1f} {r['pico_mem_mb']:>8.1f}",
+            file=out,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos parsers de PDF (Vale Card / Rede Frota).")
+    parser.add_argument("--tipo", choices=sorted(BENCH_PATHS), action="append", help="Padrão: todos")
+    parser.add_argument("--paginas", default="1,10,100", help="Lista de tamanhos, ex.: 1,10,100,1000")
+    parser.add_argument("--caminho", action="append", help="Restringe aos caminhos informados (ex.: legado)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--sem-memoria", action="store_true", help="Não mede pico de memória (mais rápido)")
+    parser.add_argument("--json", action="store_true", help="Saída em JSON em vez de tabela")
+    args = parser.parse_args(argv)
+
+    paginas = [int(x) for x in args.paginas.split(",") if x.strip()]
+    if any(not 1 <= n <= 1000 for n in paginas):
+        parser.error("--paginas deve ficar entre 1 e 1000")
+
+    results = run_benchmark(
+        args.tipo or sorted(BENCH_PATHS),
+        paginas,
+        repeticoes=max(1, args.repeticoes),
+        memoria=not args.sem_memoria,
+        caminhos=args.caminho,
+    )
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print_table(results)
+    if any("erro" in r for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Cliente CDP mínimo, só com a biblioteca padrão.
+
+Fala direto com os endpoints HTTP do Chrome (/json/version, /json/list,
+/json/new) e com o WebSocket de cada aba, sem subir o driver do Playwright.
+Cobre o que as ações simples do Good Card precisam: verificar a conexão,
+listar abas, abrir a URL do portal e avaliar o extrator na página e nos
+frames (Runtime.evaluate em cada contexto de execução).
+
+Frames de outro domínio que o Chrome isola em processos próprios (OOPIF) não
+aparecem como contextos da aba; para eles use o backend Playwright.
+"""
+
+import base64
+import json
+import os
+import socket
+import struct
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+from robo_cartoes_emsys_v3 import CDP_URL
+
+HTTP_TIMEOUT_S = 3.0
+WS_TIMEOUT_S = 30.0
+
+
+class CDPError(RuntimeError):
+    pass
+
+
+# =====================
+# HTTP (/json)
+# =====================
+def _http_json(path: str, cdp_url: str = CDP_URL, method: str = "GET") -> Any:
+    req = urllib.request.Request(cdp_url.rstrip("/") + path, method=method)
+    with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT_S) as resp:
+        body = resp.read()
+    return json.loads(body.decode("utf-8")) if body.strip() else None
+
+
+def version(cdp_url: str = CDP_URL) -> Dict[str, Any]:
+    return _http_json("/json/version", cdp_url)
+
+
+def list_targets(cdp_url: str = CDP_URL) -> List[Dict[str, Any]]:
+    """
+    Abas (targets do tipo "page") na ordem do Chrome.
+    """
+    return [t for t in (_http_json("/json/list", cdp_url) or []) if t.get("type") == "page"]
+
+
+def list_tabs(cdp_url: str = CDP_URL) -> List[Dict[str, Any]]:
+    """
+    Mesmo formato de cdp_session.list_tabs: title, url e o id do target.
+    """
+    tabs = []
+    for t in list_targets(cdp_url):
+        title = (t.get("title") or "").strip()
+        url = (t.get("url") or "").strip()
+        if title or url:
+            tabs.append({"title": title, "url": url, "id": t.get("id", "")})
+    return tabs
+
+
+def new_tab(url: str, cdp_url: str = CDP_URL) -> Dict[str, Any]:
+    """
+    Abre uma aba na URL. Chrome recente exige PUT em /json/new; os antigos, GET.
+    """
+    path = "/json/new?" + urllib.parse.quote(url, safe=":/?&=%#")
+    try:
+        return _http_json(path, cdp_url, method="PUT")
+    except urllib.error.HTTPError as e:
+        if e.code not in (404, 405):
+            raise
+    return _http_json(path, cdp_url, method="GET")
+
+
+def activate(target_id: str, cdp_url: str = CDP_URL) -> None:
+    req = urllib.request.Request(f"{cdp_url.rstrip('/')}/json/activate/{target_id}")
+    with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT_S) as resp:
+        resp.read()
+
+
+def find_target(page_url: str, cdp_url: str = CDP_URL, target_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    targets = list_targets(cdp_url)
+    if target_id:
+        for t in targets:
+            if t.get("id") == target_id:
+                return t
+    target = (page_url or "").strip()
+    for t in targets:
+        if (t.get("url") or "").strip() == target:
+            return t
+    return None
+
+
+# =====================
+# WebSocket (RFC 6455, só o necessário para o CDP)
+# =====================
+class _WebSocket:
+    def __init__(self, ws_url: str, timeout: float = WS_TIMEOUT_S):
+        parts = urllib.parse.urlparse(ws_url)
+        if parts.scheme != "ws":
+            raise CDPError(f"Endereço WebSocket não suportado: {ws_url}")
+        host = parts.hostname or "127.0.0.1"
+        port = parts.port or 80
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self._buf = b""
+
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        path = parts.path + (("?" + parts.query) if parts.query else "")
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        )
+        self.sock.sendall(request.encode("ascii"))
+        head = self._read_until(b"\r\n\r\n")
+        status = head.split(b"\r\n", 1)[0]
+        if b" 101 " not in status + b" ":
+            self.close()
+            raise CDPError(f"O Chrome recusou a conexão WebSocket: {status.decode('latin-1')}")
+
+    def _read_until(self, marker: bytes) -> bytes:
+        while marker not in self._buf:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise CDPError("Conexão com o Chrome encerrada.")
+            self._buf += chunk
+        head, _, self._buf = self._buf.partition(marker)
+        return head
+
+    def _read_exact(self, n: int) -> bytes:
+        while len(self._buf) < n:
+            chunk = self.sock.recv(max(65536, n - len(self._buf)))
+            if not chunk:
+                raise CDPError("Conexão com o Chrome encerrada.")
+            self._buf += chunk
+        data, self._buf = self._buf[:n], self._buf[n:]
+        return data
+
+    def _send_frame(self, opcode: int, payload: bytes) -> None:
+        # Cliente sempre envia quadros mascarados
+        header = bytearray([0x80 | opcode])
+        n = len(payload)
+        if n < 126:
+            header.append(0x80 | n)
+        elif n < 65536:
+            header.append(0x80 | 126)
+            header += struct.pack("!H", n)
+        else:
+            header.append(0x80 | 127)
+            header += struct.pack("!Q", n)
+        mask = os.urandom(4)
+        header += mask
+        self.sock.sendall(bytes(header) + _mask_fast(payload, mask))
+
+    def send_text(self, text: str) -> None:
+        self._send_frame(0x1, text.encode("utf-8"))
+
+    def recv_text(self) -> str:
+        parts: List[bytes] = []
+        while True:
+            b1, b2 = self._read_exact(2)
+            fin, opcode = b1 & 0x80, b1 & 0x0F
+            n = b2 & 0x7F
+            if n == 126:
+                n = struct.unpack("!H", self._read_exact(2))[0]
+            elif n == 127:
+                n = struct.unpack("!Q", self._read_exact(8))[0]
+            mask = self._read_exact(4) if b2 & 0x80 else b""
+            payload = self._read_exact(n)
+            if mask:
+                payload = _mask_fast(payload, mask)
+
+            if opcode == 0x8:
+                raise CDPError("O Chrome fechou a conexão WebSocket.")
+            if opcode == 0x9:
+                self._send_frame(0xA, payload)
+                continue
+            if opcode == 0xA:
+                continue
+            parts.append(payload)
+            if fin:
+                return b"".join(parts).decode("utf-8")
+
+    def close(self) -> None:
+        try:
+            self._send_frame(0x8, b"")
+        except Exception:
+            pass
+        try:
+            self.sock.close()
+        except Exception:
+            pass
+
+
+def _mask_fast(payload: bytes, mask: bytes) -> bytes:
+    # XOR do payload inteiro de uma vez, como inteiro (bem mais rápido que byte a byte)
+    n = len(payload)
+    if not n:
+        return b""
+    key = int.from_bytes((mask * (n // 4 + 1))[:n], "big")
+    return (int.from_bytes(payload, "big") ^ key).to_bytes(n, "big")
+
+
+# =====================
+# Sessão de uma aba
+# =====================
+class CDPPage:
+    """
+    Conexão com o WebSocket de uma aba. Use com "with".
+    """
+
+    def __init__(self, ws_url: str, timeout: float = WS_TIMEOUT_S):
+        self.ws = _WebSocket(ws_url, timeout)
+        self._next_id = 0
+        self.contexts: List[Dict[str, Any]] = []
+
+    def __enter__(self) -> "CDPPage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.ws.close()
+
+    def _on_event(self, msg: Dict[str, Any]) -> None:
+        method = msg.get("method")
+        params = msg.get("params") or {}
+        if method == "Runtime.executionContextCreated":
+            self.contexts.append(params.get("context") or {})
+        elif method == "Runtime.executionContextDestroyed":
+            cid = params.get("executionContextId")
+            self.contexts = [c for c in self.contexts if c.get("id") != cid]
+        elif method == "Runtime.executionContextsCleared":
+            self.contexts = []
+
+    def call(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self._next_id += 1
+        msg_id = self._next_id
+        self.ws.send_text(json.dumps({"id": msg_id, "method": method, "params": params or {}}))
+        while True:
+            msg = json.loads(self.ws.recv_text())
+            if msg.get("id") == msg_id:
+                if "error" in msg:
+                    raise CDPError(f"{method}: {msg['error'].get('message', msg['error'])}")
+                return msg.get("result") or {}
+            self._on_event(msg)
+
+    def frame_contexts(self) -> List[int]:
+        """
+        Contextos padrão de cada frame, com o frame principal primeiro.
+        """
+        if not self.contexts:
+            # Runtime.enable reenvia executionContextCreated de todos os frames
+            self.call("Runtime.enable")
+            self.call("Runtime.disable")
+        frames = [c for c in self.contexts if (c.get("auxData") or {}).get("isDefault", True)]
+        main_frame = ""
+        try:
+            main_frame = self.call("Page.getFrameTree")["frameTree"]["frame"]["id"]
+        except Exception:
+            pass
+        frames.sort(key=lambda c: (c.get("auxData") or {}).get("frameId") != main_frame)
+        return [c["id"] for c in frames if "id" in c]
+
+    def evaluate(self, fn_source: str, arg: Any = None, context_id: Optional[int] = None) -> Any:
+        """
+        Avalia uma função JS "(arg) => ..." e devolve o valor (JSON) retornado.
+        """
+        params: Dict[str, Any] = {
+            "expression": f"({fn_source})({json.dumps(arg)})",
+            "returnByValue": True,
+            "awaitPromise": True,
+        }
+        if context_id is not None:
+            params["contextId"] = context_id
+        res = self.call("Runtime.evaluate", params)
+        if "exceptionDetails" in res:
+            det = res["exceptionDetails"]
+            raise CDPError((det.get("exception") or {}).get("description") or det.get("text") or "Erro no script.")
+        return (res.get("result") or {}).get("value")
+
+
+def open_page(page_url: str, cdp_url: str = CDP_URL, target_id: Optional[str] = None) -> CDPPage:
+    """
+    Conecta ao WebSocket da aba com a URL (ou id) indicada.
+    """
+    target = find_target(page_url, cdp_url, target_id)
+    if target is None or not target.get("webSocketDebuggerUrl"):
+        raise CDPError("Não encontrei a aba selecionada. Atualize a lista de abas e tente novamente.")
+    return CDPPage(target["webSocketDebuggerUrl"])
+
+
+def evaluate_main_then_frames(page: CDPPage, fn_source: str, arg: Any = None) -> List[Any]:
+    """
+    Avalia no frame principal; se não houver resultado, nos demais frames.
+    Retorna a lista de resultados não vazios.
+    """
+    contexts = page.frame_contexts()
+    results: List[Any] = []
+    for i, cid in enumerate(contexts):
+        try:
+            value = page.evaluate(fn_source, arg, cid)
+        except CDPError:
+            continue
+        if value:
+            results.append(value)
+            if i == 0:
+                break
+    return results
+
@@ -0,0 +1,323 @@
+"""
+Sessão CDP persistente para o Good Card.
+
+Uma thread de fundo roda um loop asyncio com o Playwright (API assíncrona) e
+mantém uma única conexão com o Chrome em CDP_URL. A conexão é refeita com
+backoff exponencial se o Chrome for fechado, e a lista de abas é mantida
+atualizada em segundo plano.
+
+As ações do Good Card enviam corrotinas para essa thread (submit/run) e
+reaproveitam a conexão já aberta, sem iniciar o Playwright a cada clique.
+"""
+
+import asyncio
+import concurrent.futures
+import importlib.util
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from robo_cartoes_emsys_v3 import CDP_URL
+
+PLAYWRIGHT_MISSING_MSG = "Playwright não está instalado. Rode: pip install playwright && python -m playwright install"
+
+# Tempo máximo esperando a conexão antes de uma ação falhar.
+CONNECT_WAIT_S = 8.0
+
+
+class CDPSession:
+    def __init__(
+        self,
+        cdp_url: str = CDP_URL,
+        refresh_interval: float = 2.0,
+        backoff_initial: float = 1.0,
+        backoff_max: float = 30.0,
+    ):
+        self.cdp_url = cdp_url
+        self.refresh_interval = refresh_interval
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+        self.last_error: Optional[str] = None
+        self._tabs: List[Dict[str, Any]] = []
+        self._tabs_updated = 0.0
+        self._lock = threading.Lock()
+        # Página do Playwright -> id do target no Chrome (o mesmo de /json/list)
+        self._target_ids: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._browser = None
+        self._connected: Optional[asyncio.Event] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._refresh_now: Optional[asyncio.Event] = None
+
+    # ------------------------------------------------------------------ ciclo de vida
+    def start(self) -> "CDPSession":
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._thread_main, name="cdp-session", daemon=True)
+            self._thread.start()
+        self._ready.wait(5)
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        loop = self._loop
+        if loop is None or self._stopping is None:
+            return
+        loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def connected(self) -> bool:
+        return self._connected is not None and self._connected.is_set()
+
+    def _thread_main(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._connected = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._refresh_now = asyncio.Event()
+        self._ready.set()
+        try:
+            loop.run_until_complete(self._supervisor())
+        finally:
+            loop.close()
+            self._loop = None
+
+    async def _supervisor(self):
+        try:
+            from playwright.async_api import async_playwright
+        except ImportError:
+            self.last_error = PLAYWRIGHT_MISSING_MSG
+            return
+
+        pw = await async_playwright().start()
+        backoff = self.backoff_initial
+        try:
+            while not self._stopping.is_set():
+                self._refresh_now.clear()
+                try:
+                    browser = await pw.chromium.connect_over_cdp(self.cdp_url)
+                except Exception as e:
+                    self.last_error = str(e)
+                    await self._sleep_or_stop(backoff)
+                    backoff = min(backoff * 2, self.backoff_max)
+                    continue
+
+                backoff = self.backoff_initial
+                self.last_error = None
+                self._browser = browser
+                disconnected = asyncio.Event()
+                browser.on("disconnected", lambda *_: disconnected.set())
+                for ctx in browser.contexts:
+                    ctx.on("page", lambda *_: self._refresh_now.set())
+                self._connected.set()
+
+                try:
+                    await self._keep_tabs_fresh(disconnected)
+                finally:
+                    self._connected.clear()
+                    self._browser = None
+                    with self._lock:
+                        self._tabs = []
+                    if not disconnected.is_set():
+                        try:
+                            await browser.close()
+                        except Exception:
+                            pass
+        finally:
+            await pw.stop()
+
+    async def _sleep_or_stop(self, seconds: float):
+        """
+        Espera o backoff, mas acorda antes se a sessão for parada ou se alguma
+        ação estiver aguardando a conexão (_refresh_now).
+        """
+        waiters = [asyncio.ensure_future(self._stopping.wait()), asyncio.ensure_future(self._refresh_now.wait())]
+        _, pending = await asyncio.wait(waiters, timeout=seconds, return_when=asyncio.FIRST_COMPLETED)
+        for w in pending:
+            w.cancel()
+
+    async def _keep_tabs_fresh(self, disconnected: asyncio.Event):
+        while not self._stopping.is_set() and not disconnected.is_set():
+            try:
+                await self._refresh_tabs()
+            except Exception as e:
+                self.last_error = str(e)
+                if not self._browser or not self._browser.is_connected():
+                    return
+            self._refresh_now.clear()
+            waiters = [
+                asyncio.ensure_future(self._stopping.wait()),
+                asyncio.ensure_future(disconnected.wait()),
+                asyncio.ensure_future(self._refresh_now.wait()),
+            ]
+            _, pending = await asyncio.wait(waiters, timeout=self.refresh_interval, return_when=asyncio.FIRST_COMPLETED)
+            for w in pending:
+                w.cancel()
+
+    async def _refresh_tabs(self):
+        tabs: List[Dict[str, Any]] = []
+        for indice, pg in enumerate(self.pages()):
+            try:
+                title = ((await pg.title()) or "").strip()
+            except Exception:
+                title = ""
+            url = (pg.url or "").strip()
+            if not title and not url:
+                continue
+            tabs.append({"title": title, "url": url, "indice": indice, "id": await self.target_id(pg)})
+        with self._lock:
+            self._tabs = tabs
+            self._tabs_updated = time.monotonic()
+
+    # ------------------------------------------------------------------ API usada na thread do loop
+    def pages(self) -> list:
+        """
+        Páginas abertas em todos os contextos (chamar apenas dentro de corrotinas da sessão).
+        """
+        browser = self._browser
+        if browser is None:
+            return []
+        return [pg for ctx in browser.contexts for pg in ctx.pages]
+
+    def context(self):
+        browser = self._browser
+        if browser is None:
+            raise RuntimeError("Sem conexão com o Chrome (CDP).")
+        return browser.contexts[0] if browser.contexts else None
+
+    async def ensure_context(self):
+        """
+        Contexto onde abrir abas: o padrão do Chrome ou, se não houver, um
+        novo. Durante uma reconexão, espera a conexão voltar (como as ações
+        da sessão) e, sem ela, levanta o erro de sempre.
+        """
+        await self._wait_connected()
+        browser = self._browser
+        if browser is None:
+            raise RuntimeError("Sem conexão com o Chrome (CDP).")
+        return browser.contexts[0] if browser.contexts else await browser.new_context()
+
+    async def target_id(self, page) -> str:
+        """
+        Id do target da página no Chrome (vazio se não der para obter),
+        guardado depois da primeira consulta.
+        """
+        tid = self._target_ids.get(page)
+        if tid is None:
+            tid = ""
+            try:
+                cdp = await page.context.new_cdp_session(page)
+                try:
+                    info = await cdp.send("Target.getTargetInfo")
+                    tid = (info.get("targetInfo") or {}).get("targetId", "")
+                finally:
+                    await cdp.detach()
+            except Exception:
+                pass
+            if tid:
+                self._target_ids[page] = tid
+        return tid
+
+    async def find_tab_page(self, page_url: str, indice: Optional[int] = None, target_id: Optional[str] = None):
+        """
+        Como find_page, mas com target_id (o "id" de list_tabs, nos dois
+        backends) a aba é achada pelo id, sem confundir abas com a mesma URL.
+        """
+        if target_id:
+            for pg in self.pages():
+                if await self.target_id(pg) == target_id:
+                    return pg
+            return None
+        return self.find_page(page_url, indice)
+
+    def find_page(self, page_url: str, indice: Optional[int] = None):
+        """
+        Aba com a URL indicada. Com indice (posição na lista de abas), abas
+        com a mesma URL (ex.: logins de filiais diferentes) são distinguidas.
+        """
+        target = (page_url or "").strip()
+        pages = self.pages()
+        if indice is not None and 0 <= indice < len(pages) and (pages[indice].url or "").strip() == target:
+            return pages[indice]
+        for pg in pages:
+            if (pg.url or "").strip() == target:
+                return pg
+        return None
+
+    async def _wait_connected(self):
+        if not self._connected.is_set():
+            self._refresh_now.set()
+            try:
+                await asyncio.wait_for(self._connected.wait(), timeout=CONNECT_WAIT_S)
+            except asyncio.TimeoutError:
+                detalhe = f"\n\nDetalhes técnicos: {self.last_error}" if self.last_error else ""
+                raise RuntimeError(f"Não consegui conectar ao Chrome via CDP em {self.cdp_url}.{detalhe}")
+
+    async def _call(self, fn: Callable[..., Awaitable[Any]], args: tuple) -> Any:
+        await self._wait_connected()
+        return await fn(self, *args)
+
+    # ------------------------------------------------------------------ API usada por outras threads
+    def submit(self, fn: Callable[..., Awaitable[Any]], *args) -> "concurrent.futures.Future":
+        """
+        Agenda fn(sessao, *args) (corrotina) na thread da sessão.
+        """
+        if importlib.util.find_spec("playwright") is None:
+            raise RuntimeError(PLAYWRIGHT_MISSING_MSG)
+        self.start()
+        loop = self._loop
+        if loop is None:
+            raise RuntimeError("Sessão CDP não iniciada.")
+        return asyncio.run_coroutine_threadsafe(self._call(fn, args), loop)
+
+    def run(self, fn: Callable[..., Awaitable[Any]], *args, timeout: Optional[float] = 120.0) -> Any:
+        return self.submit(fn, *args).result(timeout)
+
+    def list_tabs(self, max_age: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Lista de abas mantida em segundo plano. Com max_age, força uma
+        atualização se a lista for mais antiga que max_age segundos.
+        """
+        with self._lock:
+            fresh = max_age is None or (time.monotonic() - self._tabs_updated) <= max_age
+            if fresh and self._tabs_updated:
+                return list(self._tabs)
+
+        async def refresh(session: "CDPSession"):
+            await session._refresh_tabs()
+
+        self.run(refresh, timeout=30)
+        with self._lock:
+            return list(self._tabs)
+
+
+_session: Optional[CDPSession] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> CDPSession:
+    """
+    Sessão compartilhada do processo (iniciada na primeira chamada).
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = CDPSession()
+        return _session.start()
+
+
+def shutdown_session() -> None:
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+    if session is not None:
+        session.stop()
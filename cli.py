@@ -0,0 +1,232 @@
+"""
+Modo linha de comando, sem interface gráfica, para rodar em lote (ex.: pelo
+Agendador de Tarefas durante a noite).
+
+Importa os extratos PDF e as páginas .html do Good Card das pastas
+informadas, unifica as capturas, faz a prévia da conciliação com o grid
+exportado do EMSYS e exporta o CSV. Não importa o Tk nem abre diálogos.
+
+O progresso sai no stdout em JSON, um evento por linha:
+
+    {"evento": "etapa_inicio", "etapa": "pdfs", "arquivos": 12}
+    {"evento": "etapa_fim", "etapa": "pdfs", "segundos": 3.4, ...}
+    {"evento": "fim", "ok": true, "segundos": 5.1}
+
+Código de saída: 0 sem erros; 1 se alguma etapa falhou ou algum arquivo não
+pôde ser lido; 2 para argumentos inválidos.
+
+Uso:
+    python cli.py --pdfs C:\\extratos --csv
+    python cli.py --pdfs extratos --html paginas --conciliar grid_emsys.txt --tolerancia 1
+    python cli.py --limpar-capturas --pdfs extratos --recursivo --unificar
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import core
+
+DEFAULT_CSV = "capturas_unificadas.csv"
+
+
+def emit(evento: str, **data: Any):
+    """
+    Uma linha JSON no stdout (datas e outros objetos viram texto).
+    """
+    payload: Dict[str, Any] = {"evento": evento}
+    payload.update(data)
+    sys.stdout.write(json.dumps(payload, ensure_ascii=False, default=str) + "\n")
+    sys.stdout.flush()
+
+
+def list_files(dirs: Iterable[str], extensions: Iterable[str], recursive: bool = False) -> List[str]:
+    """
+    Arquivos com as extensões indicadas nas pastas (ou o próprio caminho, se
+    for um arquivo), sem repetição e em ordem alfabética.
+    """
+    exts = tuple(e.lower() for e in extensions)
+    found = set()
+    for d in dirs:
+        if os.path.isfile(d):
+            found.add(os.path.abspath(d))
+            continue
+        if not os.path.isdir(d):
+            raise FileNotFoundError(f"Pasta não encontrada: {d}")
+        if recursive:
+            for root, _, names in os.walk(d):
+                found.update(os.path.abspath(os.path.join(root, n)) for n in names if n.lower().endswith(exts))
+        else:
+            found.update(
+                os.path.abspath(os.path.join(d, n))
+                for n in os.listdir(d)
+                if n.lower().endswith(exts) and os.path.isfile(os.path.join(d, n))
+            )
+    return sorted(found)
+
+
+class Pipeline:
+    """
+    Roda as etapas pedidas em ordem, emitindo etapa_inicio/etapa_fim (ou
+    erro) para cada uma. Uma etapa que falha não impede as seguintes, exceto
+    quando elas dependem da unificação.
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.ok = True
+
+    def _stage(self, name: str, fn, **start_info) -> Optional[Dict]:
+        emit("etapa_inicio", etapa=name, **start_info)
+        t0 = time.perf_counter()
+        try:
+            result = fn() or {}
+        except Exception as e:
+            self.ok = False
+            emit("erro", etapa=name, mensagem=str(e), tipo=type(e).__name__)
+            return None
+        emit("etapa_fim", etapa=name, segundos=round(time.perf_counter() - t0, 3), **result)
+        return result
+
+    def _collect(self, name: str, dirs: List[str], extensions) -> List[str]:
+        try:
+            paths = list_files(dirs, extensions, self.args.recursivo)
+        except FileNotFoundError as e:
+            self.ok = False
+            emit("erro", etapa=name, mensagem=str(e), tipo=type(e).__name__)
+            return []
+        if not paths:
+            emit("aviso", etapa=name, mensagem="Nenhum arquivo encontrado.")
+        return paths
+
+    # ------------------------------------------------------------------ etapas
+    def limpar(self) -> Dict:
+        return {"removidos": core.clear_captures()}
+
+    def importar_pdfs(self, paths: List[str]) -> Dict:
+        result = core.import_statement_pdfs(paths)
+        if result.get("errors"):
+            self.ok = False
+        return {
+            "por_origem": result.get("por_origem", {}),
+            "arquivos": result.get("arquivos", []),
+            "erros": result.get("errors", []),
+            "despesas": result.get("despesas"),
+        }
+
+    def importar_html(self, paths: List[str]) -> Dict:
+        result = core.import_goodcard_html(paths)
+        arquivos = result.get("arquivos", [])
+        if any(a.get("erro") for a in arquivos):
+            self.ok = False
+        return {"transacoes": len(result.get("rows", [])), "arquivos": arquivos, "captura": result.get("file")}
+
+    def unificar(self) -> Dict:
+        snap = core.get_unified_snapshot()
+        dmin, dmax = snap.get("dmin"), snap.get("dmax")
+        return {
+            "total": snap.get("total", 0),
+            "soma": round(snap.get("soma", 0.0), 2),
+            "data_inicial": dmin.strftime("%d/%m/%Y %H:%M:%S") if dmin else None,
+            "data_final": dmax.strftime("%d/%m/%Y %H:%M:%S") if dmax else None,
+        }
+
+    def conciliar(self) -> Dict:
+        result = core.reconcile_with_emsys(export_path=self.args.conciliar, tolerance_days=self.args.tolerancia)
+        return {"totais": result["totais"], "relatorio": result.get("arquivo")}
+
+    def exportar_csv(self) -> Dict:
+        info = core.export_unified_to_csv(self.args.csv, items=core.get_unified_snapshot()["items"])
+        return {"arquivo": self.args.csv, "total": info.get("total", 0)}
+
+    # ------------------------------------------------------------------ execução
+    def run(self) -> int:
+        a = self.args
+        t0 = time.perf_counter()
+        emit("inicio", base_dir=os.getcwd())
+
+        if a.limpar_capturas:
+            self._stage("limpar_capturas", self.limpar)
+
+        if a.pdfs:
+            pdfs = self._collect("pdfs", a.pdfs, (".pdf",))
+            if pdfs:
+                self._stage("pdfs", lambda: self.importar_pdfs(pdfs), arquivos=len(pdfs))
+
+        if a.html:
+            pages = self._collect("html", a.html, (".html", ".htm"))
+            if pages:
+                self._stage("html", lambda: self.importar_html(pages), arquivos=len(pages))
+
+        if a.unificar or a.conciliar or a.csv:
+            if self._stage("unificar", self.unificar) is not None:
+                if a.conciliar:
+                    self._stage("conciliar", self.conciliar, arquivo=a.conciliar, tolerancia=a.tolerancia)
+                if a.csv:
+                    self._stage("csv", self.exportar_csv)
+
+        emit("fim", ok=self.ok, segundos=round(time.perf_counter() - t0, 3))
+        return 0 if self.ok else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Importa extratos e páginas salvas, unifica, concilia e exporta, sem interface gráfica."
+    )
+    parser.add_argument(
+        "--base-dir",
+        help="Pasta do aplicativo (capturas, configurações e relatórios). Padrão: a pasta do programa.",
+    )
+    parser.add_argument("--pdfs", action="append", metavar="PASTA", help="Pasta (ou arquivo) de extratos PDF")
+    parser.add_argument("--html", action="append", metavar="PASTA", help="Pasta (ou arquivo) de páginas .html do Good Card")
+    parser.add_argument("--recursivo", action="store_true", help="Procura arquivos também nas subpastas")
+    parser.add_argument("--limpar-capturas", action="store_true", help="Apaga as capturas anteriores antes de importar")
+    parser.add_argument("--unificar", action="store_true", help="Unifica as capturas (implícito com --conciliar/--csv)")
+    parser.add_argument("--conciliar", metavar="ARQUIVO", help="Grid do EMSYS exportado (texto separado por tabulação)")
+    parser.add_argument("--tolerancia", type=int, metavar="DIAS", help="Na conciliação, casa também pela data (± dias)")
+    parser.add_argument(
+        "--csv",
+        nargs="?",
+        const=DEFAULT_CSV,
+        metavar="ARQUIVO",
+        help=f"Exporta as capturas unificadas em CSV (padrão: {DEFAULT_CSV})",
+    )
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not (args.pdfs or args.html or args.limpar_capturas or args.unificar or args.conciliar or args.csv):
+        parser.error("nada a fazer: informe --pdfs, --html, --unificar, --conciliar ou --csv")
+    if args.tolerancia is not None and args.tolerancia < 0:
+        parser.error("--tolerancia não pode ser negativa")
+
+    # Caminhos relativos são do diretório de onde o comando foi chamado
+    for name in ("pdfs", "html"):
+        value = getattr(args, name)
+        if value:
+            setattr(args, name, [os.path.abspath(p) for p in value])
+    if args.conciliar:
+        args.conciliar = os.path.abspath(args.conciliar)
+    if args.csv:
+        args.csv = os.path.abspath(args.csv)
+
+    base = os.path.abspath(args.base_dir) if args.base_dir else core.get_base_dir()
+    try:
+        os.chdir(base)
+        core.ensure_dir(core.CAPTURES_DIR)
+    except OSError as e:
+        emit("erro", etapa="inicio", mensagem=f"Não consegui usar a pasta {base}: {e}", tipo=type(e).__name__)
+        return 1
+    return Pipeline(args).run()
+
+
+if __name__ == "__main__":
+    # Necessário no executável do PyInstaller: a importação de HTML usa processos
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Leitura e gravação dos arquivos JSON de configuração do aplicativo
+(app_settings.json, config_emsys_grid.json, valecard_despesas.json, marcas
+d'água das capturas).
+
+Cada arquivo é lido e interpretado uma vez; as leituras seguintes devolvem o
+objeto em cache enquanto a data de modificação e o tamanho do arquivo não
+mudarem (um os.stat por leitura). Assim, editar o arquivo à mão ou pelo
+script original do robô continua valendo sem reiniciar o aplicativo.
+
+A gravação é atômica: o JSON vai para um arquivo temporário na mesma pasta,
+que substitui o original com os.replace. Uma queda no meio da gravação deixa
+o arquivo antigo intacto, nunca um JSON pela metade.
+
+Erros de leitura (JSON inválido) e de gravação levantam ConfigError, com o
+caminho do arquivo na mensagem; o último erro de cada arquivo fica em
+errors() para a interface avisar o usuário.
+"""
+
+import copy
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class ConfigError(RuntimeError):
+    """
+    Falha ao ler ou gravar um arquivo de configuração.
+    """
+
+    def __init__(self, path: str, action: str, cause: BaseException):
+        self.path = path
+        self.cause = cause
+        super().__init__(f"Erro ao {action} {os.path.basename(path)}: {cause}")
+
+
+_lock = threading.RLock()
+# caminho absoluto -> ((mtime_ns, tamanho), dados)
+_cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+_errors: Dict[str, str] = {}
+
+
+def _key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        raise ConfigError(path, "ler", e)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _fail(path: str, error: ConfigError) -> ConfigError:
+    _errors[_key(path)] = str(error)
+    return error
+
+
+def read_json(path: str, default: Any = None) -> Any:
+    """
+    Conteúdo do arquivo JSON (default se ele não existir). O objeto devolvido
+    é o do cache, compartilhado entre as chamadas: não altere; para mudar o
+    arquivo use update_json (ou copie antes de alterar).
+    """
+    key = _key(path)
+    with _lock:
+        try:
+            stamp = _stat(path)
+        except ConfigError as e:
+            raise _fail(path, e)
+        if stamp is None:
+            _cache.pop(key, None)
+            _errors.pop(key, None)
+            return default
+
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            _cache.pop(key, None)
+            return default
+        except Exception as e:
+            _cache.pop(key, None)
+            raise _fail(path, ConfigError(path, "ler", e))
+
+        _cache[key] = (stamp, data)
+        _errors.pop(key, None)
+        return data
+
+
+def write_json(path: str, data: Any):
+    """
+    Grava data no arquivo de forma atômica (temporário + os.replace) e já
+    atualiza o cache com o que foi gravado.
+    """
+    key = _key(path)
+    folder = os.path.dirname(os.path.abspath(path))
+    with _lock:
+        tmp_path = None
+        try:
+            text = json.dumps(data, ensure_ascii=False, indent=2)
+            os.makedirs(folder, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=folder)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            tmp_path = None
+            stamp = _stat(path)
+        except Exception as e:
+            _cache.pop(key, None)
+            raise _fail(path, e if isinstance(e, ConfigError) else ConfigError(path, "gravar", e))
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+        # O cache guarda uma cópia própria: quem chamou pode continuar mexendo em data
+        if stamp is not None:
+            _cache[key] = (stamp, json.loads(text))
+        _errors.pop(key, None)
+
+
+def update_json(path: str, fn: Callable[[Any], Any], default: Any = None) -> Any:
+    """
+    Lê, aplica fn numa cópia do conteúdo e grava o resultado, tudo sob a mesma
+    trava (duas threads alterando o mesmo arquivo não perdem alterações). Se fn
+    devolver None, grava a própria cópia alterada. Devolve o que foi gravado.
+    """
+    with _lock:
+        data = copy.deepcopy(read_json(path, default))
+        result = fn(data)
+        if result is None:
+            result = data
+        write_json(path, result)
+        return result
+
+
+def invalidate(path: Optional[str] = None):
+    """
+    Descarta o cache de um arquivo (ou de todos). Só é necessário se o
+    arquivo puder mudar sem alterar data nem tamanho.
+    """
+    with _lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(_key(path), None)
+
+
+def errors() -> Dict[str, str]:
+    """
+    Último erro de leitura/gravação de cada arquivo que ainda não se
+    resolveu (caminho absoluto -> mensagem).
+    """
+    with _lock:
+        return dict(_errors)
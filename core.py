@@ -1,13 +1,12 @@
 import os
 import sys
 import json
+import threading
 import time
 import re
-from collections import Counter
-from datetime import datetime
-from typing import Callable, Dict, List, Optional, Tuple
-
-import pyautogui
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from robo_cartoes_emsys_v3 import (
     CDP_URL,
@@ -15,24 +14,44 @@ from robo_cartoes_emsys_v3 import (
     CAPTURES_DIR,
     VALE_DESP_FILE,
     GOODCARD_FALLBACK_URL,
-    JS_EXTRACT_DATETIME_AND_BRUTO,
     ensure_dir,
     normalize_brl,
     normalize_dt,
     brl_to_float,
     float_to_brl,
     date_range_from_rows,
-    save_capture_txt,
+    next_capture_filename,
     read_all_captures,
     copy_current_row_text,
     extract_rs_original_from_row,
     extract_titulo_from_row,
+    get_pyautogui,
     valecard_capture_from_pdf as _legacy_valecard_capture_from_pdf,
-    valecard_somar_despesas_pdf as _legacy_valecard_somar_despesas_pdf,
-    redefrota_capture_from_pdf,
+    redefrota_capture_from_pdf as _legacy_redefrota_capture_from_pdf,
 )
 
+import config_service
 import storage
+from portal_js import (
+    JS_COLLECTOR_INSTALL,
+    JS_COLLECTOR_PULL,
+    JS_COLLECTOR_STATUS,
+    JS_CRAWL_ADVANCE,
+    JS_EXTRACT_COLUMNAR,
+    JS_TABLE_SIGNATURE,
+    decode_columnar,
+)
+import statement_registry
+from expense_classifier import DEFAULT_CATEGORIES, ExpenseClassifier, ExpenseTotals
+from startup import lazy_import
+
+# Carregados só no primeiro uso, para não atrasar a abertura da janela:
+# CDP/Playwright (asyncio, urllib, ssl), leitura de PDFs e a conciliação.
+cdp_client = lazy_import("cdp_client")
+cdp_session = lazy_import("cdp_session")
+goodcard_json = lazy_import("goodcard_json")
+pdf_parsers = lazy_import("pdf_parsers")
+reconcile = lazy_import("reconcile")
 
 
 _RE_DT = re.compile(r"\b\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2}(?::\d{2})?\b")
@@ -94,7 +113,25 @@ def _extract_valecard_rows_from_text(text: str) -> List[Dict[str, str]]:
 def valecard_capture_from_pdf(pdf_path: str) -> List[Dict[str, str]]:
     """
     Captura vendas do Vale Card em todas as páginas do PDF.
-    Tenta usar o parser legado e, em caso de saída vazia/falha, aplica um parser multipágina local.
+    Usa primeiro o parser por palavras (sem extract_tables). Se ele não achar
+    nenhuma venda (layout diferente, mesmo com o cabeçalho reconhecido), tenta
+    o parser legado e, em caso de saída vazia/falha, aplica um parser
+    multipágina local.
+    """
+    try:
+        word_rows, _ = pdf_parsers.valecard_capture_from_pdf_words(pdf_path)
+    except Exception:
+        word_rows = []
+
+    if word_rows:
+        return word_rows
+
+    return _valecard_capture_fallbacks(pdf_path)
+
+
+def _valecard_capture_fallbacks(pdf_path: str) -> List[Dict[str, str]]:
+    """
+    Parser legado (texto + tabelas) e, se ele não achar nada, parser de texto local.
     """
     legacy_rows: List[Dict[str, str]] = []
     try:
@@ -109,52 +146,195 @@ def valecard_capture_from_pdf(pdf_path: str) -> List[Dict[str, str]]:
     return _extract_valecard_rows_from_text(text)
 
 
-def valecard_somar_despesas_pdf(pdf_path: str) -> Dict[str, float]:
+_expense_classifier: Optional[ExpenseClassifier] = None
+_expense_classifier_key: Optional[str] = None
+_expense_classifier_src: Any = None
+
+
+def get_expense_classifier() -> ExpenseClassifier:
     """
-    Soma despesas do Vale Card em todas as páginas do PDF.
-    Mantém compatibilidade com as chaves retornadas pela função legada.
+    Classificador de despesas montado a partir de "despesas_categorias" nas
+    configurações. A regex combinada só é recompilada quando a configuração muda.
     """
-    try:
-        legacy = _legacy_valecard_somar_despesas_pdf(pdf_path)
-        if legacy:
-            return legacy
-    except Exception:
-        pass
+    global _expense_classifier, _expense_classifier_key, _expense_classifier_src
+    categorias = storage.load_settings().get("despesas_categorias") or DEFAULT_CATEGORIES
+    # Mesmo objeto do cache do config_service: o arquivo não mudou
+    if _expense_classifier is not None and categorias is _expense_classifier_src:
+        return _expense_classifier
+    key = json.dumps(categorias, sort_keys=True, ensure_ascii=False)
+    if _expense_classifier is None or key != _expense_classifier_key:
+        _expense_classifier = ExpenseClassifier(categorias)
+        _expense_classifier_key = key
+    _expense_classifier_src = categorias
+    return _expense_classifier
 
-    text = _extract_text_from_all_pages(pdf_path)
 
-    total_taxa_adm = 0.0
-    total_outras = 0.0
+def valecard_somar_despesas_pdf(pdf_path: str) -> Dict:
+    """
+    Soma despesas do Vale Card em todas as páginas do PDF, numa única passada,
+    com o classificador configurável (ver expense_classifier).
+    Mantém as chaves da função legada e acrescenta "categorias_centavos".
+    """
+    import pdfplumber
 
-    for raw_line in text.splitlines():
-        line = (raw_line or "").strip()
-        if not line:
-            continue
-        values = _RE_BRL.findall(line)
-        if not values:
-            continue
+    totals = ExpenseTotals(get_expense_classifier())
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text() or ""
+            if text.strip():
+                totals.feed_lines(text.splitlines())
+    return totals.as_dict()
 
-        norm_line = line.lower()
-        value = 0.0
-        for v in values:
-            try:
-                value += brl_to_float(normalize_brl(v))
-            except Exception:
-                continue
 
-        if not value:
-            continue
+def merge_despesas(acc: Optional[Dict], desp: Dict) -> Dict:
+    """
+    Soma o resultado de despesas de um PDF (desp) ao acumulado (acc).
+    """
+    if acc is None:
+        acc = {"total_despesas": 0.0, "total_taxa_adm": 0.0, "total_outras": 0.0, "categorias_centavos": {}}
+    for k in ("total_despesas", "total_taxa_adm", "total_outras"):
+        acc[k] += desp.get(k, 0.0)
+    for nome, cents in (desp.get("categorias_centavos") or {}).items():
+        acc["categorias_centavos"][nome] = acc["categorias_centavos"].get(nome, 0) + cents
+    return acc
 
-        if "taxa" in norm_line and "admin" in norm_line:
-            total_taxa_adm += value
-        elif any(k in norm_line for k in ("despesa", "tarifa", "encargo", "custo", "mensalidade")):
-            total_outras += value
 
-    return {
-        "total_despesas": total_taxa_adm + total_outras,
-        "total_taxa_adm": total_taxa_adm,
-        "total_outras": total_outras,
-    }
+def redefrota_capture_from_pdf(pdf_path: str) -> List[Dict[str, str]]:
+    """
+    Captura transações da Rede Frota com o parser em streaming, que acompanha
+    as seções RESUMO entre páginas. Se ele não achar nada, tenta o parser legado.
+    """
+    rows = pdf_parsers.redefrota_capture_from_pdf_stream(pdf_path)
+    if rows:
+        return rows
+    return _redefrota_capture_fallback(pdf_path)
+
+
+def _redefrota_capture_fallback(pdf_path: str) -> List[Dict[str, str]]:
+    """
+    Parser legado da Rede Frota (lê a seção RESUMO página a página).
+    """
+    try:
+        return _legacy_redefrota_capture_from_pdf(pdf_path)
+    except Exception:
+        return []
+
+
+# ----------------------------------------------------------------------------- Registro de extratos
+def _valecard_fingerprint(first_page_text: str) -> int:
+    low = first_page_text.lower()
+    if "vale card" in low or "valecard" in low:
+        return 10
+    if any(pdf_parsers.VALECARD_LINE_RE.search(line.strip()) for line in first_page_text.splitlines()):
+        return 5
+    return 0
+
+
+def _valecard_parse_statement(pdf, pdf_path: str) -> Dict:
+    despesas = ExpenseTotals(get_expense_classifier())
+    rows, _ = pdf_parsers.valecard_parse_pages(pdf.pages, line_sink=despesas.feed)
+    if not rows:
+        rows = _valecard_capture_fallbacks(pdf_path)
+    return {"rows": rows, "despesas": despesas.as_dict()}
+
+
+def _redefrota_fingerprint(first_page_text: str) -> int:
+    low = first_page_text.lower()
+    if "rede frota" in low or "redefrota" in low:
+        return 10
+    if pdf_parsers.REDEFROTA_SECTION_START_RE.search(first_page_text) or pdf_parsers.REDEFROTA_LINE_RE.search(
+        first_page_text
+    ):
+        return 5
+    return 0
+
+
+def _redefrota_parse_statement(pdf, pdf_path: str) -> Dict:
+    rows = pdf_parsers.redefrota_parse_pages(pdf.pages)
+    if not rows:
+        rows = _redefrota_capture_fallback(pdf_path)
+    return {"rows": rows}
+
+
+statement_registry.register_statement_parser("valecard", "ValeCard", _valecard_fingerprint, _valecard_parse_statement)
+statement_registry.register_statement_parser("redefrota", "RedeFrota", _redefrota_fingerprint, _redefrota_parse_statement)
+
+
+def save_valecard_despesas(desp: Dict, arquivo: str):
+    """
+    Grava o resumo de despesas do Vale Card (valores absolutos) em VALE_DESP_FILE.
+    """
+    config_service.write_json(
+        VALE_DESP_FILE,
+        {
+            "total_despesas_abs": abs(desp.get("total_despesas", 0.0)),
+            "taxa_adm_abs": abs(desp.get("total_taxa_adm", 0.0)),
+            "outras_abs": abs(desp.get("total_outras", 0.0)),
+            "categorias_abs": {
+                nome: abs(cents) / 100.0 for nome, cents in (desp.get("categorias_centavos") or {}).items()
+            },
+            "arquivo": arquivo,
+            "atualizado_em": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+        },
+    )
+
+
+def import_statement_pdfs(pdf_paths: List[str], cancel_event=None) -> Dict:
+    """
+    Importa vários PDFs detectando o tipo de extrato de cada um pela primeira página.
+    Grava uma captura por origem e, se houver Vale Card, atualiza o bloco de despesas.
+    Se cancel_event for acionado, para entre um PDF e outro sem gravar nada.
+
+    Retorna {"por_origem": {origem: {"count", "file"}}, "arquivos": [...], "errors": [...],
+             "despesas": dict ou None}.
+    """
+    errors = statement_registry.load_plugins(get_base_dir())
+    arquivos: List[Dict] = []
+    rows_by_origem: Dict[str, List[Dict[str, str]]] = {}
+    seen_by_origem: Dict[str, set] = {}
+    despesas: Optional[Dict] = None
+    vale_pdfs: List[str] = []
+
+    for pdf_path in pdf_paths:
+        if cancel_event is not None and cancel_event.is_set():
+            errors.append("Importação cancelada.")
+            return {"por_origem": {}, "arquivos": arquivos, "errors": errors, "despesas": None}
+        nome = os.path.basename(pdf_path)
+        try:
+            result = statement_registry.parse_statement_pdf(pdf_path)
+        except Exception as e:
+            errors.append(f"{nome}: {e}")
+            continue
+
+        origem = result["origem"]
+        bucket = rows_by_origem.setdefault(origem, [])
+        seen = seen_by_origem.setdefault(origem, set())
+        for r in result["rows"]:
+            key = (r.get("dt", ""), r.get("bruto", ""), r.get("id", ""))
+            if key not in seen:
+                seen.add(key)
+                bucket.append(r)
+
+        desp = result.get("despesas")
+        if desp:
+            vale_pdfs.append(pdf_path)
+            despesas = merge_despesas(despesas, desp)
+
+        arquivos.append({"arquivo": nome, "tipo": result["tipo"], "origem": origem, "count": len(result["rows"])})
+
+    por_origem: Dict[str, Dict] = {}
+    for origem, rows in rows_by_origem.items():
+        fn = save_capture_txt(rows, origem) if rows else None
+        por_origem[origem] = {"count": len(rows), "file": fn}
+
+    if despesas is not None:
+        arquivo = vale_pdfs[0] if len(vale_pdfs) == 1 else f"{len(vale_pdfs)} PDF(s) agregados"
+        try:
+            save_valecard_despesas(despesas, arquivo)
+        except Exception as e:
+            errors.append(f"{VALE_DESP_FILE}: {e}")
+
+    return {"por_origem": por_origem, "arquivos": arquivos, "errors": errors, "despesas": despesas}
 
 
 def get_base_dir() -> str:
@@ -192,9 +372,32 @@ def get_goodcard_fallback_url() -> str:
 
 
 def set_goodcard_fallback_url(url: str):
-    settings = storage.load_settings()
-    settings["goodcard_fallback_url"] = url.strip()
-    storage.save_settings(settings)
+    storage.update_settings(goodcard_fallback_url=url.strip())
+
+
+GOODCARD_BACKENDS = ("cdp", "playwright")
+
+
+def get_goodcard_backend() -> str:
+    """
+    Backend das ações simples do Good Card (listar abas, abrir portal,
+    capturar a aba): "cdp" usa o cliente embutido (cdp_client), sem subir o
+    Playwright; "playwright" usa a sessão persistente (cdp_session).
+    Varredura de páginas, rede (JSON), coleta contínua e várias abas sempre
+    usam o Playwright.
+    """
+    backend = str(storage.load_settings().get("goodcard_backend") or "cdp").strip().lower()
+    return backend if backend in GOODCARD_BACKENDS else "cdp"
+
+
+def set_goodcard_backend(backend: str):
+    if backend not in GOODCARD_BACKENDS:
+        raise ValueError(f"Backend inválido: {backend}")
+    storage.update_settings(goodcard_backend=backend)
+
+
+def _cdp_unreachable(e: Exception) -> RuntimeError:
+    return RuntimeError(f"Não consegui conectar ao Chrome via CDP em {CDP_URL}.\n\nDetalhes técnicos: {e}")
 
 
 def goodcard_check_cdp() -> Tuple[bool, Optional[str]]:
@@ -216,164 +419,851 @@ def goodcard_check_cdp() -> Tuple[bool, Optional[str]]:
         return False, str(e)
 
 
-def goodcard_list_tabs() -> List[Dict[str, str]]:
+def goodcard_list_tabs() -> List[Dict[str, Any]]:
     """
-    Lista abas abertas no Chrome acessível via CDP (Playwright).
-    Retorna lista de dicts com title e url.
+    Lista abas abertas no Chrome acessível via CDP.
+    Usa a sessão CDP persistente (cdp_session), que mantém a lista atualizada
+    em segundo plano. Retorna lista de dicts com title, url, indice e id (do
+    target no Chrome). No backend "cdp", lê /json/list direto (title, url e
+    id, sem indice); a captura de várias abas localiza cada uma pelo id.
     """
-    try:
-        from playwright.sync_api import sync_playwright
-    except ImportError:
-        raise RuntimeError(
-            "Playwright não está instalado. Rode: pip install playwright && python -m playwright install"
-        )
+    if get_goodcard_backend() == "cdp":
+        try:
+            return cdp_client.list_tabs()
+        except OSError as e:
+            raise _cdp_unreachable(e)
+    return cdp_session.get_session().list_tabs(max_age=1.0)
+
+
+def goodcard_open_portal_tab():
+    """
+    Abre uma nova aba do portal Good Card na URL de fallback configurada.
+    """
+    fallback_url = get_goodcard_fallback_url()
+    if get_goodcard_backend() == "cdp":
+        try:
+            cdp_client.new_tab(fallback_url)
+        except OSError as e:
+            raise _cdp_unreachable(e)
+        return
+
+    async def open_tab(session: "cdp_session.CDPSession"):
+        context = await session.ensure_context()
+        page = await context.new_page()
+        await page.goto(fallback_url, wait_until="domcontentloaded")
 
-    tabs: List[Dict[str, str]] = []
+    cdp_session.get_session().run(open_tab)
 
-    p = sync_playwright().start()
-    browser = None
+
+def _normalize_goodcard_rows(rows: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    out = []
+    seen = set()
+    for r in rows:
+        dt = normalize_dt(r.get("dt", ""))
+        bruto = normalize_brl(r.get("bruto", ""))
+        if not dt or not bruto:
+            continue
+        key = (dt, bruto)
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append({"dt": dt, "bruto": bruto, "id": ""})
+    return out
+
+
+def _decode_extract(payload) -> Tuple[List[Dict[str, str]], int]:
+    """
+    Retorno de JS_EXTRACT_COLUMNAR -> (linhas, antigas puladas na página).
+    """
+    antigas = int(payload.get("antigas") or 0) if isinstance(payload, dict) else 0
+    return decode_columnar(payload), antigas
+
+
+async def _extract_table(frame, since: Optional[str] = None) -> Tuple[List[Dict[str, str]], int]:
+    """
+    Lê a tabela de transações do frame com o extrator colunar (uma string só
+    atravessa o CDP, decodificada aqui). Linhas anteriores a since ficam na
+    página. Retorna (linhas, antigas).
+    """
+    return _decode_extract(await frame.evaluate(JS_EXTRACT_COLUMNAR, since))
+
+
+async def _extract_main_then_frames(page, since: Optional[str] = None) -> Tuple[List[Dict[str, str]], int]:
+    """
+    Extrai no frame principal e, se nada for encontrado, em todos os frames.
+    Retorna (linhas, antigas).
+    """
+    rows: List[Dict[str, str]] = []
+    antigas = 0
     try:
-        browser = p.chromium.connect_over_cdp(CDP_URL)
-        context = browser.contexts[0] if browser.contexts else browser.new_context()
-        pages = context.pages
+        rows, antigas = await _extract_table(page.main_frame, since)
+    except Exception:
+        pass
 
-        for pg in pages:
+    if not rows and not antigas:
+        for fr in page.frames:
             try:
-                title = (pg.title() or "").strip()
+                more, skipped = await _extract_table(fr, since)
             except Exception:
-                title = ""
-            try:
-                url = (pg.url or "").strip()
-            except Exception:
-                url = ""
-            if not title and not url:
                 continue
-            tabs.append({"title": title, "url": url})
+            rows.extend(more)
+            antigas += skipped
+    return rows, antigas
+
 
-    finally:
+# =====================
+# Arquivos de captura
+# =====================
+# Tentativas de criar o próximo captura_NNN.txt antes de desistir
+CAPTURE_CREATE_ATTEMPTS = 50
+
+
+def _create_capture_file():
+    """
+    Cria (modo "x") o próximo captura_NNN.txt livre e devolve (caminho,
+    arquivo aberto). Duas gravações simultâneas, na mesma ou em outra
+    instância do processo, escolhem o mesmo número pelo listdir; a que
+    perde a criação tenta o número seguinte em vez de sobrescrever.
+    """
+    last_error: Optional[OSError] = None
+    for _ in range(CAPTURE_CREATE_ATTEMPTS):
+        fn = next_capture_filename()
         try:
-            if browser:
-                browser.close()
-        except Exception:
-            pass
-        p.stop()
+            return fn, open(fn, "x", encoding="utf-8")
+        except FileExistsError as e:
+            last_error = e
+    raise RuntimeError(f"Não consegui criar um novo arquivo de captura em {CAPTURES_DIR}: {last_error}")
 
-    return tabs
 
+def _write_capture(rows: List[Dict[str, str]], origem_of: Callable[[Dict[str, str]], str]) -> Tuple[str, Dict]:
+    """
+    Grava as linhas válidas num novo captura_NNN.txt e acrescenta as chaves
+    ao índice de já capturadas. Devolve o caminho e as linhas gravadas
+    agrupadas por origem.
+    """
+    por_origem: Dict[str, List[Dict[str, str]]] = {}
+    chaves: Dict[str, List[Tuple[str, str, str]]] = {}
+    with _captured_lock:
+        before = captures_signature() if _captured_sig is not None else None
+        fn, f = _create_capture_file()
+        with f:
+            f.write("data_hora;valor_bruto;origem;id_opcional\n")
+            for r in rows:
+                dt = normalize_dt(r.get("dt", ""))
+                bruto = normalize_brl(r.get("bruto", ""))
+                if not dt or not bruto:
+                    continue
+                origem = origem_of(r)
+                id_opt = str(r.get("id", "") or "").strip()
+                f.write(f"{dt};{bruto};{origem};{id_opt}\n")
+                por_origem.setdefault(origem, []).append(r)
+                chaves.setdefault(origem, []).append((dt, bruto, id_opt))
+        _note_captured(fn, chaves, before)
+    return fn, por_origem
 
-def goodcard_open_portal_tab():
+
+def save_capture_txt(rows: List[Dict[str, str]], origem: str) -> str:
     """
-    Abre uma nova aba do portal Good Card na URL de fallback configurada.
+    Grava as vendas de uma origem num novo captura_NNN.txt (mesmo formato do
+    robô original, sem nunca sobrescrever uma captura existente).
+    """
+    return _write_capture(rows, lambda r: origem)[0]
+
+
+# =====================
+# Marca d'água das capturas (por origem)
+# =====================
+# Fica junto das capturas para ser apagada com elas em clear_captures().
+# A trava do config_service só vale dentro de um processo: as gravações deste
+# arquivo (capturas do Good Card, coleta contínua, limpeza) passam pelo
+# processo auxiliar quando ele está ativo.
+WATERMARKS_FILE = os.path.join(CAPTURES_DIR, "marcas_captura.json")
+
+
+def _dt_sortable(dt: str) -> str:
+    """
+    "dd/mm/aaaa hh:mm:ss" -> "aaaammddhhmmss" (comparável como texto).
+    """
+    return dt[6:10] + dt[3:5] + dt[0:2] + (dt[11:].replace(":", "") or "000000")
+
+
+def load_capture_watermarks() -> Dict[str, Dict]:
+    """
+    Marcas d'água de todas as origens (objeto do cache do config_service:
+    somente leitura).
     """
     try:
-        from playwright.sync_api import sync_playwright
-    except ImportError:
-        raise RuntimeError(
-            "Playwright não está instalado. Rode: pip install playwright && python -m playwright install"
-        )
+        data = config_service.read_json(WATERMARKS_FILE, {})
+    except config_service.ConfigError:
+        return {}
+    return data if isinstance(data, dict) else {}
 
-    fallback_url = get_goodcard_fallback_url()
 
-    p = sync_playwright().start()
-    browser = None
+def get_capture_watermark(origem: str) -> Optional[Dict]:
+    """
+    Marca d'água da origem: {"dt": data/hora mais recente capturada}. A
+    captura incremental só lê a partir dela (ver capture_since).
+    """
+    wm = load_capture_watermarks().get(origem)
+    if not wm or not normalize_dt(wm.get("dt", "")):
+        return None
+    return wm
+
+
+def _row_key(r: Dict[str, str]) -> Tuple[str, str, str]:
+    return (r["dt"], r["bruto"], r.get("id", "") or "")
+
+
+# Margem antes da marca d'água que a captura incremental ainda lê e confere
+# com as capturas gravadas: vendas que o portal lança com atraso (data/hora
+# pouco anterior à última capturada) não se perdem. Períodos mais antigos só
+# com a captura completa.
+CAPTURE_OVERLAP_MIN = 30
+
+
+def capture_since(origem: str) -> Optional[str]:
+    """
+    Início ("aaaammddhhmmss", como _dt_sortable) do trecho lido pela captura
+    incremental da origem: a marca d'água menos CAPTURE_OVERLAP_MIN. None se
+    a origem ainda não tem marca (lê tudo).
+    """
+    wm = get_capture_watermark(origem)
+    if not wm:
+        return None
     try:
-        browser = p.chromium.connect_over_cdp(CDP_URL)
-        context = browser.contexts[0] if browser.contexts else browser.new_context()
-        page = context.new_page()
-        page.goto(fallback_url, wait_until="domcontentloaded")
-    finally:
-        try:
-            if browser:
-                browser.close()
-        except Exception:
-            pass
-        p.stop()
+        quando = datetime.strptime(wm["dt"], "%d/%m/%Y %H:%M:%S")
+    except ValueError:
+        return _dt_sortable(wm["dt"])
+    return (quando - timedelta(minutes=CAPTURE_OVERLAP_MIN)).strftime("%Y%m%d%H%M%S")
+
 
+# Chaves já capturadas por família de origem (ver goodcard_family):
+# família -> (since da montagem, chaves com dt >= since). Montado uma vez a
+# partir das capturas e atualizado a cada gravação (_note_captured); só é
+# remontado quando as capturas mudam por fora (outro processo, arquivo
+# apagado), o que captures_signature() detecta.
+_captured_lock = threading.RLock()
+_captured_sig: Optional[Tuple] = None
+_captured_index: Dict[str, Tuple[Optional[str], set]] = {}
 
-def goodcard_capture_from_url(page_url: str) -> List[Dict[str, str]]:
+
+def captured_keys(origem: str, since: Optional[str] = None) -> set:
+    """
+    Chaves (dt, bruto, id) das vendas da origem, a partir de since, já
+    gravadas em alguma captura; para o Good Card, de qualquer variante da
+    origem. O conjunto devolvido é o do índice: somente leitura.
+    """
+    global _captured_sig
+    family = goodcard_family(origem)
+    with _captured_lock:
+        sig = captures_signature()
+        if sig != _captured_sig:
+            _captured_index.clear()
+            _captured_sig = sig
+        entry = _captured_index.get(family)
+        if entry is None or (entry[0] is not None and (since is None or since < entry[0])):
+            keys = {
+                _row_key(it)
+                for it in get_unified_snapshot()["items"]
+                if goodcard_family(it.get("origem", "")) == family
+                and (since is None or _dt_sortable(it["dt"]) >= since)
+            }
+            entry = _captured_index[family] = (since, keys)
+        return entry[1]
+
+
+def _note_captured(fn: str, chaves: Dict[str, List[Tuple[str, str, str]]], before: Optional[Tuple]):
     """
-    Captura vendas do Good Card na aba com a URL indicada.
-    Retorna lista de dicts {dt, bruto, id}.
+    Acrescenta ao índice as chaves recém-gravadas em fn. Se além de fn alguma
+    outra captura mudou desde before, descarta o índice (será remontado).
+    """
+    global _captured_sig
+    with _captured_lock:
+        if before is None or before != _captured_sig:
+            return
+        after = captures_signature()
+        name = os.path.basename(fn)
+        if tuple(e for e in after if e[0] != name) != before:
+            _captured_index.clear()
+            _captured_sig = None
+            return
+        _captured_sig = after
+        for origem, keys in chaves.items():
+            entry = _captured_index.get(goodcard_family(origem))
+            if entry is None:
+                continue
+            since, indexed = entry
+            indexed.update(k for k in keys if since is None or _dt_sortable(k[0]) >= since)
+
+
+def filter_captured_rows(
+    rows: List[Dict[str, str]], origem: str, since: Optional[str] = None
+) -> Tuple[List[Dict[str, str]], int]:
+    """
+    Tira as linhas anteriores a since (ver capture_since) e as que já estão
+    em alguma captura da origem (mesma data/hora, valor e id); só as linhas
+    a partir de since são conferidas no índice. Retorna (novas, ignoradas).
+    """
+    recentes = rows if since is None else [r for r in rows if _dt_sortable(r["dt"]) >= since]
+    captured = captured_keys(origem, since)
+    out = [r for r in recentes if _row_key(r) not in captured]
+    return out, len(rows) - len(out)
+
+
+def advance_capture_watermark(origem: str, rows: List[Dict[str, str]]):
     """
+    Avança a marca d'água da origem até a venda mais recente das linhas
+    recém-gravadas (nunca recua).
+    """
+    valid = [(_dt_sortable(dt), dt) for dt in (normalize_dt(r.get("dt", "")) for r in rows if r.get("bruto")) if dt]
+    if not valid:
+        return
+    top, top_dt = max(valid)
+    wm = get_capture_watermark(origem)
+    if wm and _dt_sortable(wm["dt"]) >= top:
+        return
+
+    def apply(data):
+        # Compara de novo com o conteúdo lido sob a trava: outra thread pode
+        # ter gravado uma marca mais recente depois da leitura acima.
+        data = data if isinstance(data, dict) else {}
+        atual = data.get(origem)
+        atual_dt = normalize_dt(atual.get("dt", "")) if isinstance(atual, dict) else ""
+        if not atual_dt or _dt_sortable(atual_dt) < top:
+            data[origem] = {"dt": top_dt}
+        return data
+
     try:
-        from playwright.sync_api import sync_playwright
-    except ImportError:
-        raise RuntimeError(
-            "Playwright não está instalado. Rode: pip install playwright && python -m playwright install"
-        )
+        config_service.update_json(WATERMARKS_FILE, apply, {})
+    except config_service.ConfigError:
+        # Sem a marca, a próxima captura só lê mais linhas; não impede o uso.
+        pass
+
+
+def save_goodcard_capture(rows: List[Dict[str, str]], origem: str = "GoodCard") -> str:
+    """
+    Grava as vendas num captura_NNN.txt e avança a marca d'água da origem.
+    """
+    path = save_capture_txt(rows, origem)
+    advance_capture_watermark(origem, rows)
+    return path
+
+
+def _find_page_or_fail(session: "cdp_session.CDPSession", page_url: str, indice: Optional[int] = None):
+    page = session.find_page(page_url, indice)
+    if page is None:
+        raise RuntimeError("Não encontrei a aba selecionada. Atualize a lista de abas e tente novamente.")
+    return page
+
+
+def goodcard_capture_from_url(page_url: str, origem: str = "GoodCard", incremental: bool = True) -> Dict:
+    """
+    Captura vendas do Good Card na aba com a URL indicada, reaproveitando a
+    conexão da sessão CDP persistente.
+    Com incremental=True, só as vendas a partir da marca d'água da origem
+    (menos a margem, ver capture_since) saem da página, e as que já estão em
+    alguma captura são descartadas; com False (captura completa), vem tudo o
+    que está na aba.
+    Retorna {"rows": [{dt, bruto, id}], "ignoradas": linhas já capturadas}.
+    """
+    since = capture_since(origem) if incremental else None
+    if get_goodcard_backend() == "cdp":
+        rows, antigas = _capture_with_cdp_client(page_url, since)
+    else:
+
+        async def capture(session: "cdp_session.CDPSession"):
+            page = _find_page_or_fail(session, page_url)
+            await page.bring_to_front()
+            await page.wait_for_timeout(800)
+            return await _extract_main_then_frames(page, since)
+
+        rows, antigas = cdp_session.get_session().run(capture)
+
+    rows = _normalize_goodcard_rows(rows)
+    ignoradas = antigas
+    if incremental:
+        rows, skipped = filter_captured_rows(rows, origem, since)
+        ignoradas += skipped
+    return {"rows": rows, "ignoradas": ignoradas}
+
 
-    p = sync_playwright().start()
-    browser = None
+def _capture_with_cdp_client(page_url: str, since: Optional[str] = None) -> Tuple[List[Dict[str, str]], int]:
+    """
+    Mesma captura da aba, pelo cliente CDP embutido (sem Playwright).
+    Retorna (linhas, antigas).
+    """
     try:
-        browser = p.chromium.connect_over_cdp(CDP_URL)
-        context = browser.contexts[0] if browser.contexts else browser.new_context()
-        pages = context.pages
+        target = cdp_client.find_target(page_url)
+    except OSError as e:
+        raise _cdp_unreachable(e)
+    if target is None:
+        raise RuntimeError("Não encontrei a aba selecionada. Atualize a lista de abas e tente novamente.")
 
-        target_page = None
-        for pg in pages:
-            try:
-                if (pg.url or "").strip() == page_url.strip():
-                    target_page = pg
+    try:
+        cdp_client.activate(target["id"])
+        time.sleep(0.8)
+    except Exception:
+        pass
+
+    rows: List[Dict[str, str]] = []
+    antigas = 0
+    with cdp_client.open_page(page_url, target_id=target["id"]) as page:
+        for payload in cdp_client.evaluate_main_then_frames(page, JS_EXTRACT_COLUMNAR, since):
+            more, skipped = _decode_extract(payload)
+            rows.extend(more)
+            antigas += skipped
+    return rows, antigas
+
+
+async def _find_table_frame(page, since: Optional[str] = None):
+    """
+    Igual a _extract_main_then_frames, mas devolve também o frame onde a
+    tabela foi encontrada, para a varredura continuar nele.
+    Retorna (frame, linhas, antigas) ou (None, [], 0).
+    """
+    for fr in [page.main_frame] + [f for f in page.frames if f is not page.main_frame]:
+        try:
+            rows, antigas = await _extract_table(fr, since)
+        except Exception:
+            continue
+        if rows or antigas:
+            return fr, rows, antigas
+    return None, [], 0
+
+
+async def _wait_table_change(frame, before: str, timeout_s: float) -> bool:
+    """
+    Espera a assinatura da tabela mudar (nova página ou novas linhas).
+    Erros durante a navegação são ignorados até o tempo acabar.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_s
+    while loop.time() < deadline:
+        await asyncio.sleep(0.2)
+        try:
+            sig = await frame.evaluate(JS_TABLE_SIGNATURE)
+        except Exception:
+            continue
+        if sig and sig != before:
+            return True
+    return False
+
+
+def goodcard_crawl_from_url(
+    page_url: str,
+    progress_cb: Optional[Callable[[int, int], None]] = None,
+    max_pages: int = 500,
+    page_timeout_s: float = 8.0,
+    origem: str = "GoodCard",
+    incremental: bool = True,
+    cancel_event=None,
+) -> Dict:
+    """
+    Varre todas as páginas da listagem do Good Card na aba indicada, seguindo a
+    paginação (botão/link "Próxima") ou a rolagem infinita, sempre na mesma aba.
+    Com incremental=True, só as vendas a partir de capture_since saem da
+    página, e as que já estão em alguma captura da origem são descartadas.
+
+    Para quando:
+    - (incremental) uma página traz vendas anteriores a capture_since, não
+      traz venda ainda não capturada, ou as vendas dela anteriores à marca
+      d'água já estão todas capturadas (o portal lista da mais recente para
+      a mais antiga, então o resto também);
+    - uma página repete as linhas da anterior;
+    - não há mais como avançar, ou max_pages é atingido;
+    - cancel_event é acionado.
+
+    Com incremental=False (captura completa), nada é descartado e a varredura
+    só para na última página.
+
+    progress_cb(paginas_lidas, linhas_acumuladas) é chamado a cada página.
+    Retorna {"rows", "paginas", "motivo", "ignoradas"}.
+    """
+    wm = get_capture_watermark(origem) if incremental else None
+    wm_key = _dt_sortable(wm["dt"]) if wm else None
+    since = capture_since(origem) if incremental else None
+    captured = captured_keys(origem, since) if incremental else set()
+
+    async def crawl(session: "cdp_session.CDPSession"):
+        page = _find_page_or_fail(session, page_url)
+        await page.bring_to_front()
+        await page.wait_for_timeout(800)
+
+        frame, raw, antigas = await _find_table_frame(page, since)
+        if frame is None:
+            return [], 0, "tabela não encontrada", 0
+
+        collected: List[Dict[str, str]] = []
+        seen = set()
+        ignoradas = 0
+        paginas = 0
+        motivo = "limite de páginas"
+        while paginas < max_pages:
+            paginas += 1
+            lidas = [r for r in _normalize_goodcard_rows(raw) if (r["dt"], r["bruto"]) not in seen]
+            for r in lidas:
+                seen.add((r["dt"], r["bruto"]))
+            novas = [r for r in lidas if _row_key(r) not in captured]
+            ignoradas += len(lidas) - len(novas) + antigas
+            collected.extend(novas)
+            if progress_cb:
+                progress_cb(paginas, len(collected))
+
+            if not lidas:
+                motivo = "alcançou vendas já capturadas" if antigas else "página sem linhas novas"
+                break
+            if cancel_event is not None and cancel_event.is_set():
+                motivo = "cancelada"
+                break
+            if incremental:
+                janela = [r for r in lidas if wm_key is not None and _dt_sortable(r["dt"]) <= wm_key]
+                if antigas or not novas or (janela and all(_row_key(r) in captured for r in janela)):
+                    motivo = "alcançou vendas já capturadas"
                     break
+
+            before = await frame.evaluate(JS_TABLE_SIGNATURE)
+            acao = await frame.evaluate(JS_CRAWL_ADVANCE)
+            if not acao:
+                motivo = "última página"
+                break
+            if not await _wait_table_change(frame, before, page_timeout_s):
+                motivo = "última página" if acao == "scroll" else "a página seguinte não carregou"
+                break
+            try:
+                raw, antigas = await _extract_table(frame, since)
             except Exception:
-                continue
+                raw, antigas = [], 0
 
-        if target_page is None:
-            raise RuntimeError("Não encontrei a aba selecionada. Atualize a lista de abas e tente novamente.")
+        return collected, paginas, motivo, ignoradas
 
-        target_page.bring_to_front()
-        target_page.wait_for_timeout(800)
+    rows, paginas, motivo, ignoradas = cdp_session.get_session().run(crawl, timeout=None)
+    return {"rows": rows, "paginas": paginas, "motivo": motivo, "ignoradas": ignoradas}
 
-        rows = []
+
+def goodcard_capture_from_network(
+    page_url: str,
+    reload_timeout_ms: int = 30000,
+    max_pages: int = 500,
+    origem: str = "GoodCard",
+    incremental: bool = True,
+    cancel_event=None,
+) -> Dict:
+    """
+    Captura as vendas do Good Card pelas respostas JSON do portal, sem ler a
+    tabela: recarrega a aba ouvindo as respostas XHR/fetch, encontra as listas
+    de transações (goodcard_json) e busca as páginas restantes da mesma API,
+    com os cookies da aba.
+    Com incremental=True, as vendas anteriores a capture_since e as que já
+    estão em alguma captura da origem são descartadas. Se cancel_event for
+    acionado, para de buscar páginas.
+    Retorna {"rows", "respostas", "paginas_extras", "fontes", "ignoradas"}.
+    """
+
+    async def capture(session: "cdp_session.CDPSession"):
+        page = _find_page_or_fail(session, page_url)
+        await page.bring_to_front()
+
+        responses = []
+
+        def on_response(resp):
+            try:
+                tipo = resp.request.resource_type
+                ctype = (resp.headers.get("content-type") or "").lower()
+            except Exception:
+                return
+            if tipo in ("xhr", "fetch") and "json" in ctype:
+                responses.append(resp)
+
+        page.on("response", on_response)
         try:
-            main_rows = target_page.evaluate(JS_EXTRACT_DATETIME_AND_BRUTO)
-            if main_rows:
-                rows.extend(main_rows)
-        except Exception:
-            pass
+            try:
+                await page.reload(wait_until="networkidle", timeout=reload_timeout_ms)
+            except Exception:
+                # Portais com polling nunca ficam ociosos: segue com o que chegou
+                pass
+        finally:
+            page.remove_listener("response", on_response)
 
-        if not rows:
-            for fr in target_page.frames:
+        rows: List[Dict[str, str]] = []
+        fontes: List[str] = []
+        extras = 0
+        for resp in responses:
+            try:
+                payload = await resp.json()
+            except Exception:
+                continue
+            # Estornos contam no tamanho da página, mas não são vendas
+            found = goodcard_json.extract_rows(payload, estornos=True)
+            if not found or resp.url in fontes:
+                continue
+            rows.extend(r for r in found if not r.get("estorno"))
+            fontes.append(resp.url)
+
+            urls, completo = goodcard_json.remaining_page_urls(resp.url, payload, len(found), max_pages=max_pages)
+            for url in urls:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
                 try:
-                    fr_rows = fr.evaluate(JS_EXTRACT_DATETIME_AND_BRUTO)
-                    if fr_rows:
-                        rows.extend(fr_rows)
+                    r = await page.request.get(url)
+                    more = goodcard_json.extract_rows(await r.json(), estornos=True) if r.ok else []
                 except Exception:
-                    continue
+                    more = []
+                if not more and not completo:
+                    break
+                rows.extend(m for m in more if not m.get("estorno"))
+                extras += 1
 
-        out = []
-        seen = set()
-        for r in rows:
-            dt = normalize_dt(r.get("dt", ""))
-            bruto = normalize_brl(r.get("bruto", ""))
-            if not dt or not bruto:
-                continue
-            key = (dt, bruto)
-            if key in seen:
+        return rows, len(responses), extras, fontes
+
+    rows, respostas, extras, fontes = cdp_session.get_session().run(capture, timeout=None)
+    rows = _normalize_goodcard_rows(rows)
+    ignoradas = 0
+    if incremental:
+        rows, ignoradas = filter_captured_rows(rows, origem, capture_since(origem))
+    return {
+        "rows": rows,
+        "respostas": respostas,
+        "paginas_extras": extras,
+        "fontes": fontes,
+        "ignoradas": ignoradas,
+    }
+
+
+def goodcard_collector_start(page_url: str, auto_scroll: bool = False) -> int:
+    """
+    Instala o coletor contínuo (MutationObserver) na aba e em seus frames,
+    para tabelas virtualizadas que só mantêm as linhas visíveis no DOM.
+    Com auto_scroll, o próprio coletor rola a lista até o fim.
+    Retorna quantas transações já foram vistas.
+    """
+
+    async def install(session: "cdp_session.CDPSession"):
+        page = _find_page_or_fail(session, page_url)
+        total = 0
+        for fr in page.frames:
+            try:
+                total += int(await fr.evaluate(JS_COLLECTOR_INSTALL, {"autoScroll": auto_scroll}) or 0)
+            except Exception:
                 continue
-            seen.add(key)
-            out.append({"dt": dt, "bruto": bruto, "id": ""})
+        return total
+
+    return cdp_session.get_session().run(install)
+
+
+def goodcard_collector_status(page_url: str) -> Dict:
+    """
+    Retorna {"linhas", "rolando", "concluida"} somando os coletores da aba.
+    """
 
+    async def status(session: "cdp_session.CDPSession"):
+        page = _find_page_or_fail(session, page_url)
+        out = {"linhas": 0, "rolando": False, "concluida": False}
+        for fr in page.frames:
+            try:
+                st = await fr.evaluate(JS_COLLECTOR_STATUS)
+            except Exception:
+                continue
+            if not st:
+                continue
+            out["linhas"] += int(st.get("count") or 0)
+            out["rolando"] = out["rolando"] or bool(st.get("scrolling"))
+            out["concluida"] = out["concluida"] or bool(st.get("done"))
         return out
 
-    finally:
-        try:
-            if browser:
-                browser.close()
-        except Exception:
-            pass
-        p.stop()
+    return cdp_session.get_session().run(status, timeout=30)
+
+
+def goodcard_collector_collect(
+    page_url: str, stop: bool = True, origem: str = "GoodCard", incremental: bool = True
+) -> Dict:
+    """
+    Busca de uma vez tudo o que o coletor acumulou na aba (já sem repetição).
+    Com stop=True, desliga o coletor.
+    Retorna {"rows": vendas ainda não capturadas (todas, se não incremental),
+    "ignoradas"}.
+    """
+
+    async def pull(session: "cdp_session.CDPSession"):
+        page = _find_page_or_fail(session, page_url)
+        rows: List[Dict[str, str]] = []
+        for fr in page.frames:
+            try:
+                rows.extend(decode_columnar(await fr.evaluate(JS_COLLECTOR_PULL, stop)))
+            except Exception:
+                continue
+        return rows
+
+    rows = cdp_session.get_session().run(pull)
+    rows = _normalize_goodcard_rows(rows)
+    ignoradas = 0
+    if incremental:
+        rows, ignoradas = filter_captured_rows(rows, origem, capture_since(origem))
+    return {"rows": rows, "ignoradas": ignoradas}
+
+
+def goodcard_tab_origem(filial: str) -> str:
+    """
+    Rótulo de origem de uma aba na captura de várias abas:
+    "GoodCard (<filial>)", com o nome de filial que o usuário deu à aba. Não
+    depende do título nem da ordem das abas, então a mesma filial mantém a
+    mesma origem (e a mesma marca d'água) de uma captura para outra.
+    """
+    tag = re.sub(r"[;\s]+", " ", filial or "").strip()
+    if not tag:
+        raise ValueError("Informe o nome da filial de cada aba.")
+    return f"GoodCard ({tag})"
+
+
+def goodcard_family(origem: str) -> str:
+    """
+    "GoodCard" para a origem da captura simples e para as de filial
+    ("GoodCard (<filial>)"); as demais origens ficam como estão.
+    """
+    return "GoodCard" if origem == "GoodCard" or origem.startswith("GoodCard (") else origem
+
+
+def dedupe_goodcard_variants(items: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    Uma venda do Good Card capturada com mais de uma origem (ex.: "GoodCard"
+    pela aba selecionada e "GoodCard (<filial>)" pela captura de várias abas)
+    conta uma vez só, com a origem da filial quando houver. Demais origens
+    passam sem mudança.
+    """
+    out: List[Dict[str, str]] = []
+    pos: Dict[Tuple[str, str, str], int] = {}
+    for it in items:
+        if goodcard_family(it.get("origem", "")) != "GoodCard":
+            out.append(it)
+            continue
+        key = _row_key(it)
+        i = pos.get(key)
+        if i is None:
+            pos[key] = len(out)
+            out.append(it)
+        elif out[i].get("origem") == "GoodCard" and it.get("origem") != "GoodCard":
+            out[i] = it
+    return out
+
+
+def save_capture_batch(rows: List[Dict[str, str]]) -> str:
+    """
+    Grava num único captura_NNN.txt linhas de várias origens (cada linha com
+    sua "origem") e avança a marca d'água de cada origem.
+    """
+    fn, por_origem = _write_capture(rows, lambda r: r.get("origem") or "GoodCard")
+    for origem, itens in por_origem.items():
+        advance_capture_watermark(origem, itens)
+    return fn
+
+
+def goodcard_capture_tabs(tabs: List[Dict[str, Any]], incremental: bool = True) -> Dict:
+    """
+    Captura várias abas do portal ao mesmo tempo (ex.: logins de filiais
+    diferentes), com avaliações concorrentes na mesma conexão CDP.
+    Cada aba traz em "filial" o nome dado pelo usuário e vira a origem
+    "GoodCard (<filial>)", com marca d'água própria; tudo é gravado num
+    único arquivo de captura. Com incremental=True, cada aba só lê a partir
+    da marca d'água da sua origem (ver capture_since) e as vendas que já
+    estão em alguma captura do Good Card são descartadas.
+    Retorna {"abas": [{titulo, origem, count, ignoradas, erro}], "rows", "file"}.
+    """
+    jobs = [(tab, goodcard_tab_origem(tab.get("filial", ""))) for tab in tabs]
+    repetidas = sorted(o for o, n in Counter(origem for _, origem in jobs).items() if n > 1)
+    if repetidas:
+        raise ValueError(f"Mais de uma aba com a mesma filial: {', '.join(repetidas)}.")
+
+    import asyncio
+
+    since_of = {origem: capture_since(origem) if incremental else None for _, origem in jobs}
+
+    async def capture_all(session: "cdp_session.CDPSession"):
+        # Cada aba pelo id do target (ou pela posição): abas de filiais com a
+        # mesma URL não podem cair na mesma página
+        pages = []
+        for tab, origem in jobs:
+            page = await session.find_tab_page(tab.get("url", ""), tab.get("indice"), tab.get("id"))
+            if page is None:
+                raise RuntimeError(
+                    f"Não encontrei a aba de {origem}. Atualize a lista de abas e tente novamente."
+                )
+            if any(page is p for p in pages):
+                raise RuntimeError(f"{origem} aponta para a mesma aba de outra filial. Atualize a lista de abas.")
+            pages.append(page)
+        return await asyncio.gather(
+            *(_extract_main_then_frames(page, since_of[origem]) for page, (_, origem) in zip(pages, jobs)),
+            return_exceptions=True,
+        )
+
+    results = cdp_session.get_session().run(capture_all)
+
+    abas = []
+    batch: List[Dict[str, str]] = []
+    for (tab, origem), res in zip(jobs, results):
+        info = {"titulo": tab.get("title", ""), "origem": origem, "count": 0, "ignoradas": 0, "erro": ""}
+        if isinstance(res, BaseException):
+            info["erro"] = str(res)
+        else:
+            rows, skipped = res
+            rows = _normalize_goodcard_rows(rows)
+            if incremental:
+                rows, ja_capturadas = filter_captured_rows(rows, origem, since_of[origem])
+                skipped += ja_capturadas
+            for r in rows:
+                r["origem"] = origem
+            batch.extend(rows)
+            info["count"] = len(rows)
+            info["ignoradas"] = skipped
+        abas.append(info)
+
+    path = save_capture_batch(batch) if batch else None
+    return {"abas": abas, "rows": batch, "file": path}
+
+
+def import_goodcard_html(html_paths: List[str]) -> Dict:
+    """
+    Importa páginas do portal Good Card salvas como .html (sem Chrome/CDP),
+    gravando todas as vendas num único arquivo de captura.
+    Retorna {"rows", "arquivos", "file"}.
+    """
+    import html_importer
+
+    result = html_importer.import_html_files(list(html_paths))
+    rows = result["rows"]
+    # Sem avançar a marca d'água: páginas salvas podem ser de qualquer período
+    # e não dizem até onde a captura ao vivo já chegou
+    result["file"] = save_capture_txt(rows, "GoodCard") if rows else None
+    return result
+
+
+def goodcard_start_session():
+    """
+    Inicia (ou reaproveita) a sessão CDP persistente em segundo plano.
+    No backend "cdp" não há o que aquecer: o Playwright só sobe quando uma
+    ação que depende dele for usada.
+    """
+    if get_goodcard_backend() == "playwright":
+        cdp_session.get_session()
+
+
+def goodcard_shutdown_session():
+    """
+    Encerra a sessão CDP persistente (chamado ao fechar o aplicativo).
+    """
+    cdp_session.shutdown_session()
 
 
 def summarize_unified_captures():
     """
     Lê todas as capturas e retorna um resumo:
-    - items: lista unificada
+    - items: lista unificada (venda do Good Card com mais de uma origem
+      conta uma vez, ver dedupe_goodcard_variants)
     - total: quantidade
     - soma: valor bruto total
     - dmin/dmax: datas mais antiga/recente (datetime ou None)
     """
-    items = read_all_captures()
+    items = dedupe_goodcard_variants(read_all_captures())
     total = len(items)
     soma = sum(brl_to_float(i["bruto"]) for i in items)
     dmin, dmax = date_range_from_rows(items)
@@ -391,18 +1281,22 @@ def load_valecard_despesas() -> Optional[Dict]:
     Lê o arquivo de despesas do Vale Card, se existir.
     Retorna dict com campos *_abs já tratados, ou None.
     """
-    if not os.path.exists(VALE_DESP_FILE):
-        return None
     try:
-        with open(VALE_DESP_FILE, "r", encoding="utf-8") as f:
-            d = json.load(f)
-    except Exception:
+        d = config_service.read_json(VALE_DESP_FILE)
+    except config_service.ConfigError:
+        return None
+    if not isinstance(d, dict):
         return None
+    # Cópia: o dict lido é o do cache
+    d = dict(d)
 
     # Garantir campos numéricos
-    total_abs = float(d.get("total_despesas_abs", 0.0))
-    taxa_abs = float(d.get("taxa_adm_abs", 0.0))
-    outras_abs = float(d.get("outras_abs", 0.0))
+    try:
+        total_abs = float(d.get("total_despesas_abs", 0.0))
+        taxa_abs = float(d.get("taxa_adm_abs", 0.0))
+        outras_abs = float(d.get("outras_abs", 0.0))
+    except (TypeError, ValueError):
+        return None
     d["total_despesas_abs"] = abs(total_abs)
     d["taxa_adm_abs"] = abs(taxa_abs)
     d["outras_abs"] = abs(outras_abs)
@@ -411,7 +1305,7 @@ def load_valecard_despesas() -> Optional[Dict]:
 
 def clear_captures() -> int:
     """
-    Remove todos os arquivos captura_*.txt em CAPTURES_DIR.
+    Remove todos os arquivos captura_*.txt em CAPTURES_DIR (e as marcas d'água).
     Retorna a quantidade de arquivos removidos.
     """
     ensure_dir(CAPTURES_DIR)
@@ -423,17 +1317,88 @@ def clear_captures() -> int:
                 removed += 1
             except Exception:
                 pass
+    # Sem capturas, as marcas d'água também recomeçam
+    try:
+        os.remove(WATERMARKS_FILE)
+    except OSError:
+        pass
+    invalidate_unified_snapshot()
     return removed
 
 
-def export_unified_to_csv(csv_path: str) -> Dict[str, int]:
+# =====================
+# Snapshot das capturas unificadas
+# =====================
+# Unificar, Exportar CSV, Rodar EMSYS e a prévia da conciliação usam a mesma
+# lista em memória; o disco só é relido quando as capturas mudam.
+_unified_lock = threading.Lock()
+_unified_snapshot: Optional[Dict] = None
+_unified_version = 0
+
+
+def captures_signature() -> Tuple[Tuple[str, int, int], ...]:
+    """
+    (nome, tamanho, mtime_ns) de cada captura_*.txt. Muda sempre que uma
+    captura é gravada, alterada ou removida.
+    """
+    ensure_dir(CAPTURES_DIR)
+    sig = []
+    with os.scandir(CAPTURES_DIR) as it:
+        for entry in it:
+            if entry.name.startswith("captura_") and entry.name.endswith(".txt"):
+                st = entry.stat()
+                sig.append((entry.name, st.st_size, st.st_mtime_ns))
+    sig.sort()
+    return tuple(sig)
+
+
+def get_unified_snapshot(loader: Optional[Callable[[], Dict]] = None) -> Dict:
+    """
+    Resumo das capturas unificadas (o dict de summarize_unified_captures) com
+    "version" e "signature". Enquanto captures_signature() não mudar, devolve
+    o mesmo snapshot sem ler o disco. loader faz a leitura quando preciso
+    (ex.: no processo auxiliar); o padrão é summarize_unified_captures.
+
+    O snapshot é compartilhado: trate "items" como somente leitura.
+    """
+    global _unified_snapshot, _unified_version
+    with _unified_lock:
+        # Assinatura tirada antes da leitura: se algo mudar no meio, a próxima
+        # chamada relê
+        sig = captures_signature()
+        snap = _unified_snapshot
+        if snap is not None and snap["signature"] == sig:
+            return snap
+        snap = dict((loader or summarize_unified_captures)())
+        _unified_version += 1
+        snap["version"] = _unified_version
+        snap["signature"] = sig
+        _unified_snapshot = snap
+        return snap
+
+
+def peek_unified_snapshot() -> Optional[Dict]:
+    """
+    Último snapshot montado, sem conferir o disco (None se ainda não houver).
+    """
+    return _unified_snapshot
+
+
+def invalidate_unified_snapshot():
+    global _unified_snapshot
+    with _unified_lock:
+        _unified_snapshot = None
+
+
+def export_unified_to_csv(csv_path: str, items: Optional[List[Dict[str, str]]] = None) -> Dict[str, int]:
     """
-    Exporta as capturas unificadas para CSV simples.
+    Exporta as capturas unificadas para CSV simples. Sem items, usa o
+    snapshot das capturas unificadas.
     """
     import csv
 
-    summary = summarize_unified_captures()
-    items = summary["items"]
+    if items is None:
+        items = get_unified_snapshot()["items"]
 
     with open(csv_path, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f, delimiter=";")
@@ -444,6 +1409,62 @@ def export_unified_to_csv(csv_path: str) -> Dict[str, int]:
     return {"total": len(items)}
 
 
+RECONCILE_REPORT_FILE = "conciliacao_previa.txt"
+
+
+def reconcile_with_emsys(
+    export_path: Optional[str] = None,
+    text: Optional[str] = None,
+    tolerance_days: Optional[int] = None,
+) -> Dict:
+    """
+    Prévia da conciliação: capturas unificadas x grid do EMSYS exportado
+    (arquivo) ou colado da área de transferência (texto). Nada é marcado no
+    EMSYS. Grava o detalhe em RECONCILE_REPORT_FILE e retorna o resultado de
+    reconcile.reconcile com a chave "arquivo".
+    """
+    if export_path:
+        emsys_rows = reconcile.read_emsys_export(export_path)
+    else:
+        emsys_rows = reconcile.parse_emsys_export(text or "")
+    if not emsys_rows:
+        raise ValueError("Nenhuma linha com valor encontrada no grid do EMSYS informado.")
+
+    result = reconcile.reconcile(get_unified_snapshot()["items"], emsys_rows, tolerance_days)
+    result["arquivo"] = save_reconciliation_report(result, tolerance_days)
+    return result
+
+
+def _cents_to_brl(cents: int) -> str:
+    return float_to_brl(cents / 100.0)
+
+
+def save_reconciliation_report(result: Dict, tolerance_days: Optional[int] = None) -> str:
+    """
+    Grava o resumo e as listas de faltando/sobrando da conciliação.
+    """
+    t = result["totais"]
+    with open(RECONCILE_REPORT_FILE, "w", encoding="utf-8") as f:
+        f.write("Prévia da conciliação Portal x EMSYS\n")
+        f.write("------------------------------------\n")
+        janela = "somente valor" if tolerance_days is None else f"valor e data (± {tolerance_days} dia(s))"
+        f.write(f"Critério: {janela}\n")
+        f.write(f"Portal (unificado): {t['portal']} | R$ {_cents_to_brl(t['soma_portal'])}\n")
+        f.write(f"Grid EMSYS: {t['emsys']} | R$ {_cents_to_brl(t['soma_emsys'])}\n")
+        f.write(f"Conciliadas: {t['conciliadas']} | R$ {_cents_to_brl(t['soma_conciliadas'])}\n")
+        f.write(f"Faltando no EMSYS: {t['faltando']} | R$ {_cents_to_brl(t['soma_faltando'])}\n")
+        f.write(f"Sobrando no EMSYS: {t['sobrando']} | R$ {_cents_to_brl(t['soma_sobrando'])}\n")
+
+        f.write("\nFaltando no EMSYS (data_hora;valor_bruto;origem)\n")
+        for r in result["missing"]:
+            f.write(f"{r.get('dt', '')};{r.get('bruto', '')};{r.get('origem', '')}\n")
+
+        f.write("\nSobrando no EMSYS (linha;data;valor;titulo)\n")
+        for e in result["extra"]:
+            f.write(f"{e['linha']};{e['data']};{e['bruto']};{e['titulo']}\n")
+    return RECONCILE_REPORT_FILE
+
+
 def save_emsys_config_from_gui(grid_cell: Dict[str, int]):
     """
     Salva o arquivo de configuração do EMSYS usando o ponto capturado via GUI.
@@ -456,13 +1477,76 @@ def save_emsys_config_from_gui(grid_cell: Dict[str, int]):
         "delay_apos_copiar": 0.15,
         "delay_entre_linhas": 0.06,
     }
-    with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-        json.dump(cfg, f, ensure_ascii=False, indent=2)
+    config_service.write_json(CONFIG_FILE, cfg)
 
 
 ProgressCallback = Callable[[Dict], None]
 
 
+class MarkingStats:
+    """
+    Vazão da marcação no EMSYS: linhas lidas, linhas/s na janela dos
+    últimos window_s segundos, latência média da cópia da linha (Ctrl+C +
+    leitura da área de transferência), taxa de casamento e estimativa de
+    término.
+
+    O grid não informa quantas linhas tem; a estimativa supõe que a taxa de
+    casamento se mantém: faltam (vendas a marcar / taxa) linhas, limitadas
+    por max_steps, no ritmo atual.
+    """
+
+    def __init__(self, total: int, max_steps: int, window_s: float = 10.0):
+        self.total = total
+        self.max_steps = max_steps
+        self.window_s = window_s
+        self.started = time.monotonic()
+        self.rows = 0
+        self.matched = 0
+        self.copy_total_s = 0.0
+        self.copy_last_s = 0.0
+        self._times: deque = deque()
+
+    def row(self, copy_s: float, matched: bool):
+        now = time.monotonic()
+        self.rows += 1
+        self.copy_total_s += copy_s
+        self.copy_last_s = copy_s
+        if matched:
+            self.matched += 1
+        self._times.append(now)
+        while self._times and self._times[0] < now - self.window_s:
+            self._times.popleft()
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        elapsed = now - self.started
+        while self._times and self._times[0] < now - self.window_s:
+            self._times.popleft()
+        span = min(self.window_s, elapsed)
+        rate = len(self._times) / span if span > 0 else 0.0
+        match_rate = self.matched / self.rows if self.rows else 0.0
+
+        eta_s: Optional[float] = None
+        remaining = self.total - self.matched
+        if remaining <= 0:
+            eta_s = 0.0
+        elif match_rate > 0 and rate > 0:
+            rows_left = min(remaining / match_rate, max(0, self.max_steps - self.rows))
+            eta_s = rows_left / rate
+
+        return {
+            "linhas": self.rows,
+            "linhas_por_s": rate,
+            "copia_ms": (self.copy_total_s / self.rows * 1000) if self.rows else 0.0,
+            "copia_ultima_ms": self.copy_last_s * 1000,
+            "taxa_casamento": match_rate,
+            "marcado": self.matched,
+            "total": self.total,
+            "decorrido_s": elapsed,
+            "eta_s": eta_s,
+        }
+
+
 def run_emsys_marking_with_progress(
     unified_rows: List[Dict[str, str]],
     progress_cb: Optional[ProgressCallback] = None,
@@ -484,18 +1568,20 @@ def run_emsys_marking_with_progress(
                 # Não deixar a automação quebrar por causa da GUI
                 pass
 
-    if not os.path.exists(CONFIG_FILE):
-        emit("error", message=f"Não achei {CONFIG_FILE}. Rode a calibração primeiro.")
-        return
-
     try:
-        cfg = json.load(open(CONFIG_FILE, "r", encoding="utf-8"))
-    except Exception as e:
-        emit("error", message=f"Erro ao ler {CONFIG_FILE}: {e}")
+        cfg = config_service.read_json(CONFIG_FILE)
+    except config_service.ConfigError as e:
+        emit("error", message=str(e))
+        return
+    if not isinstance(cfg, dict):
+        emit("error", message=f"Não achei {CONFIG_FILE}. Rode a calibração primeiro.")
         return
 
     delay_apos_copiar = float(cfg.get("delay_apos_copiar", 0.15))
     delay_entre_linhas = float(cfg.get("delay_entre_linhas", 0.06))
+    max_steps = int(cfg.get("max_steps", 25000))
+    # Intervalo mínimo entre eventos "stats" (vazão/ETA) para a GUI
+    stats_interval_s = float(cfg.get("stats_interval_s", 0.5))
 
     portal_values = [r["bruto"] for r in unified_rows]
     target_counts = Counter(portal_values)
@@ -509,7 +1595,11 @@ def run_emsys_marking_with_progress(
 
     time.sleep(1.0)
 
-    pyautogui.FAILSAFE = True
+    try:
+        pyautogui = get_pyautogui()
+    except Exception as e:
+        emit("error", message=f"Não consegui carregar o pyautogui (automação de teclado/mouse): {e}")
+        return
 
     try:
         # Clique inicial no grid
@@ -526,9 +1616,11 @@ def run_emsys_marking_with_progress(
     last_titulo = None
     same_titulo_count = 0
     same_row_limit = int(cfg.get("same_row_limit", 25))
+    stats = MarkingStats(total_portal, max_steps)
+    next_stats = time.monotonic() + stats_interval_s
 
     try:
-        for _ in range(int(cfg.get("max_steps", 25000))):
+        for _ in range(max_steps):
             # Permite cancelamento gracioso a partir da GUI
             if cancel_event is not None and getattr(cancel_event, "is_set", lambda: False)():
                 emit("log", message="Marcação interrompida pelo usuário (botão Parar).")
@@ -541,7 +1633,9 @@ def run_emsys_marking_with_progress(
                 )
                 break
 
+            t_copy = time.monotonic()
             row = copy_current_row_text()
+            copy_s = time.monotonic() - t_copy
             time.sleep(delay_apos_copiar)
             row_norm = (row or "").strip()
 
@@ -564,8 +1658,13 @@ def run_emsys_marking_with_progress(
                 break
 
             rs_original = extract_rs_original_from_row(row)
+            matched = bool(rs_original) and target_counts.get(rs_original, 0) > 0
+            stats.row(copy_s, matched)
+            if time.monotonic() >= next_stats:
+                emit("stats", **stats.snapshot())
+                next_stats = time.monotonic() + stats_interval_s
 
-            if rs_original and target_counts.get(rs_original, 0) > 0:
+            if matched:
                 pyautogui.press("enter")
                 time.sleep(0.08)
                 target_counts[rs_original] -= 1
@@ -586,6 +1685,8 @@ def run_emsys_marking_with_progress(
     except Exception as e:
         emit("error", message=f"Erro durante a marcação: {e}")
 
+    emit("stats", **stats.snapshot())
+
     missing: List[str] = []
     for val, cnt in target_counts.items():
         if cnt > 0:
@@ -612,15 +1713,12 @@ def run_emsys_marking_with_progress(
         f.write(f"Soma não encontrados: R$ {float_to_brl(soma_nao_encontrados)}\n\n")
         f.write(f"Pasta de capturas: {CAPTURES_DIR}\\\n")
 
-        if os.path.exists(VALE_DESP_FILE):
-            try:
-                d = json.load(open(VALE_DESP_FILE, "r", encoding="utf-8"))
-                f.write("\nVale Card - Despesas (do último PDF lido)\n")
-                f.write(f"Total despesas: R$ {float_to_brl(d.get('total_despesas_abs', 0.0))}\n")
-                f.write(f"Taxa administrativa: R$ {float_to_brl(d.get('taxa_adm_abs', 0.0))}\n")
-                f.write(f"Outras despesas: R$ {float_to_brl(d.get('outras_abs', 0.0))}\n")
-            except Exception:
-                pass
+        d = load_valecard_despesas()
+        if d:
+            f.write("\nVale Card - Despesas (do último PDF lido)\n")
+            f.write(f"Total despesas: R$ {float_to_brl(d['total_despesas_abs'])}\n")
+            f.write(f"Taxa administrativa: R$ {float_to_brl(d['taxa_adm_abs'])}\n")
+            f.write(f"Outras despesas: R$ {float_to_brl(d['outras_abs'])}\n")
 
     emit(
         "end",
@@ -0,0 +1,140 @@
+"""
+Classificador de despesas do Vale Card compilado numa única regex.
+
+As categorias vêm das configurações (chave "despesas_categorias" em
+app_settings.json). Cada categoria tem uma lista de "termos"; um termo é uma
+palavra ou uma lista de palavras que precisam aparecer todas na linha:
+
+    [
+        {"nome": "taxa_adm", "termos": [["taxa", "adm"]]},
+        {"nome": "tarifas", "termos": ["tarifa", "encargo"]}
+    ]
+
+A ordem da lista define a prioridade. Linhas negativas que não se encaixam em
+nenhuma categoria vão para OUTRAS.
+
+Todas as palavras, o filtro de TOTAL/SUBTOTAL e o valor em reais viram
+alternativas de uma regex combinada, então classificar uma linha é uma única
+varredura, independente da quantidade de categorias.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from robo_cartoes_emsys_v3 import brl_to_cents
+
+OUTRAS = "outras"
+TAXA_ADM = "taxa_adm"
+
+DEFAULT_CATEGORIES: List[Dict[str, Any]] = [
+    {"nome": TAXA_ADM, "termos": [["taxa", "adm"]]},
+]
+
+_SKIP_PATTERN = r"\bsub[-\s]?total\b|\btotal\b|valor total"
+_VALUE_PATTERN = r"-?\d{1,3}(?:\.\d{3})*,\d{1,2}"
+
+
+class ExpenseClassifier:
+    def __init__(self, categories: Optional[Iterable[Dict[str, Any]]] = None):
+        self.rules: List[Tuple[str, List[Tuple[str, ...]]]] = []
+        keywords: List[str] = []
+
+        for cat in categories if categories is not None else DEFAULT_CATEGORIES:
+            nome = str(cat.get("nome") or "").strip()
+            if not nome or nome == OUTRAS:
+                continue
+            alternativas: List[Tuple[str, ...]] = []
+            for termo in cat.get("termos") or []:
+                palavras = [termo] if isinstance(termo, str) else list(termo)
+                palavras = [p.strip().lower() for p in palavras if p and p.strip()]
+                if palavras:
+                    alternativas.append(tuple(palavras))
+                    keywords.extend(palavras)
+            if alternativas:
+                self.rules.append((nome, alternativas))
+
+        # Uma alternativa nomeada por palavra; as mais longas primeiro, para que
+        # "administr" vença "adm" na mesma posição. Quem casa com uma palavra mais
+        # longa também conta como acerto das palavras contidas nela.
+        self._keywords = sorted(set(keywords), key=len, reverse=True)
+        self._group_of = {kw: f"k{i}" for i, kw in enumerate(self._keywords)}
+        self._implied: Dict[str, frozenset] = {
+            self._group_of[kw]: frozenset(self._group_of[o] for o in self._keywords if o in kw)
+            for kw in self._keywords
+        }
+
+        parts = [f"(?P<skip>{_SKIP_PATTERN})", f"(?P<val>{_VALUE_PATTERN})"]
+        parts.extend(f"(?P<{self._group_of[kw]}>{re.escape(kw)})" for kw in self._keywords)
+        self._rx = re.compile("|".join(parts), re.IGNORECASE)
+
+        self._rules_by_group = [
+            (nome, [tuple(self._group_of[p] for p in alt) for alt in alternativas])
+            for nome, alternativas in self.rules
+        ]
+
+    @property
+    def category_names(self) -> List[str]:
+        return [nome for nome, _ in self.rules] + [OUTRAS]
+
+    def classify(self, line: str) -> Optional[Tuple[str, int]]:
+        """
+        Retorna (categoria, centavos) para uma linha de despesa (valor final
+        negativo), ou None se a linha não for despesa. Os centavos voltam
+        negativos, como no extrato.
+        """
+        hits = set()
+        last_val = None
+        for m in self._rx.finditer(line):
+            group = m.lastgroup
+            if group == "skip":
+                return None
+            if group == "val":
+                last_val = m.group(0)
+            else:
+                hits |= self._implied[group]
+
+        if last_val is None:
+            return None
+        cents = brl_to_cents(last_val)
+        if cents >= 0:
+            return None
+
+        for nome, alternativas in self._rules_by_group:
+            for alt in alternativas:
+                if all(g in hits for g in alt):
+                    return nome, cents
+        return OUTRAS, cents
+
+
+class ExpenseTotals:
+    """
+    Acumula os totais por categoria, em centavos, linha a linha.
+    """
+
+    def __init__(self, classifier: ExpenseClassifier):
+        self.classifier = classifier
+        self.cents: Dict[str, int] = {nome: 0 for nome in classifier.category_names}
+
+    def feed(self, line: str) -> None:
+        res = self.classifier.classify(line)
+        if res is not None:
+            nome, cents = res
+            self.cents[nome] = self.cents.get(nome, 0) + cents
+
+    def feed_lines(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            self.feed(line)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Formato compatível com valecard_somar_despesas_pdf (valores negativos em
+        reais) mais o detalhamento "categorias_centavos".
+        """
+        total = sum(self.cents.values())
+        taxa = self.cents.get(TAXA_ADM, 0)
+        return {
+            "total_despesas": total / 100.0,
+            "total_taxa_adm": taxa / 100.0,
+            "total_outras": (total - taxa) / 100.0,
+            "categorias_centavos": dict(self.cents),
+        }
@@ -0,0 +1,254 @@
+"""
+Leitura das respostas JSON (XHR/fetch) da listagem de transações do Good Card.
+
+Em vez de raspar a tabela renderizada, a captura por rede guarda as respostas
+JSON que o portal recebe e procura nelas listas de transações: listas de
+objetos com um campo de data/hora e um campo de valor bruto. Os nomes dos
+campos não são fixos; são reconhecidos pelas palavras usadas nas chaves.
+
+Também monta as URLs das páginas restantes a partir dos metadados de
+paginação da resposta (totalPages, totalElements, ...), para buscar o
+conjunto completo sem clicar na paginação.
+"""
+
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from robo_cartoes_emsys_v3 import float_to_brl, normalize_brl
+
+# Chaves normalizadas (minúsculas, só letras e números), em ordem de preferência.
+DT_KEYS = ("datahora", "datahoratransacao", "datetime", "dthr", "datatransacao", "transactiondate", "createdat", "data", "date", "dt")
+DATE_ONLY_KEYS = ("data", "date", "datatransacao", "dt")
+TIME_KEYS = ("hora", "time", "horatransacao")
+VALUE_KEYS = ("valorbruto", "vlbruto", "grossamount", "valortransacao", "valorvenda", "valor", "amount", "value", "vl")
+VALUE_EXCLUDE = ("liquido", "liquid", "net", "taxa", "fee", "desconto", "discount", "tarifa")
+
+TOTAL_PAGES_KEYS = ("totalpages", "totalpaginas", "pagecount", "lastpage", "pages")
+TOTAL_ITEMS_KEYS = ("totalelements", "totalitems", "totalregistros", "total", "count", "totalcount")
+PAGE_PARAMS = ("page", "pagina", "pagenumber", "numeropagina", "p")
+OFFSET_PARAMS = ("offset", "start", "skip")
+SIZE_PARAMS = ("size", "limit", "pagesize", "tamanho", "perpage", "porpagina")
+
+_ISO_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})(?:[T ](\d{2}):(\d{2})(?::(\d{2}))?(?:\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?$")
+_BR_DT_RE = re.compile(r"^\d{2}/\d{2}/\d{4}(?:\s+\d{2}:\d{2}(?::\d{2})?)?$")
+_MAX_DEPTH = 6
+
+
+def _norm_key(key: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(key).lower())
+
+
+def parse_json_datetime(value: Any) -> str:
+    """
+    Converte datas ISO ("2024-03-31T22:00:00Z"), brasileiras ou epoch em ms
+    para "dd/mm/aaaa hh:mm:ss". Datas com fuso são levadas ao horário local,
+    como o portal exibe na tela. Retorna "" se não reconhecer.
+    """
+    if isinstance(value, bool) or value is None:
+        return ""
+    if isinstance(value, (int, float)):
+        # epoch em milissegundos (faixa plausível: 2001 a 2286)
+        if value > 1e12:
+            return datetime.fromtimestamp(value / 1000.0).strftime("%d/%m/%Y %H:%M:%S")
+        return ""
+    s = str(value).strip()
+    if _BR_DT_RE.match(s):
+        return s
+    m = _ISO_RE.match(s)
+    if not m:
+        return ""
+    y, mo, d, h, mi, sec, tz = m.groups()
+    if tz:
+        iso = s.replace("Z", "+00:00")
+        try:
+            dt = datetime.fromisoformat(re.sub(r"\.\d+", "", iso)).astimezone()
+            return dt.strftime("%d/%m/%Y %H:%M:%S")
+        except ValueError:
+            return ""
+    return f"{d}/{mo}/{y} {h or '00'}:{mi or '00'}:{sec or '00'}"
+
+
+def _parse_signed_amount(value: Any) -> Tuple[str, bool]:
+    """
+    (valor absoluto no formato "1.234,50", negativo?). Negativo: número < 0
+    ou texto com "-" antes/depois ou entre parênteses. ("", False) se não
+    reconhecer.
+    """
+    if isinstance(value, bool) or value is None:
+        return "", False
+    if isinstance(value, (int, float)):
+        return float_to_brl(abs(float(value))), value < 0
+    s = str(value).strip().replace("R$", "").strip()
+    negative = False
+    if s.startswith("(") and s.endswith(")"):
+        s, negative = s[1:-1].strip(), True
+    if s.startswith("-") or s.endswith("-"):
+        s, negative = s.strip("-").replace("R$", "").strip(), True
+    if re.match(r"^\d+(?:\.\d{1,2})?$", s):
+        return float_to_brl(float(s)), negative
+    return normalize_brl(s), negative
+
+
+def parse_json_amount(value: Any) -> str:
+    """
+    Valor numérico (1234.5) ou texto ("1.234,50", "R$ 1.234,50", "1234.50")
+    para o formato brasileiro "1.234,50". Retorna "" se não reconhecer ou se
+    o valor for negativo (estorno/cancelamento não é venda).
+    """
+    bruto, negative = _parse_signed_amount(value)
+    return "" if negative else bruto
+
+
+def _pick_key(record: Dict[str, Any], wanted: Tuple[str, ...], exclude: Tuple[str, ...] = ()) -> Optional[str]:
+    keys = {_norm_key(k): k for k in record}
+    for w in wanted:
+        if w in keys:
+            return keys[w]
+    for w in wanted:
+        for nk, k in keys.items():
+            if w in nk and not any(x in nk for x in exclude):
+                return k
+    return None
+
+
+def record_to_row(record: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """
+    Converte um objeto de transação em {dt, bruto}, ou None se não parecer uma.
+    Valor negativo (estorno/cancelamento) vem com "estorno": True e o valor
+    absoluto em bruto.
+    """
+    if not isinstance(record, dict):
+        return None
+
+    dt = ""
+    dt_key = _pick_key(record, DT_KEYS, exclude=("atualiz", "update", "venc", "pagamento"))
+    if dt_key is not None:
+        dt = parse_json_datetime(record[dt_key])
+        # Data e hora em campos separados
+        if dt.endswith(" 00:00:00") and _norm_key(dt_key) in DATE_ONLY_KEYS:
+            hora_key = _pick_key(record, TIME_KEYS)
+            hora = str(record.get(hora_key) or "").strip() if hora_key else ""
+            if re.match(r"^\d{2}:\d{2}(:\d{2})?$", hora):
+                dt = dt[:10] + " " + (hora if len(hora) == 8 else hora + ":00")
+    if not dt:
+        return None
+
+    val_key = _pick_key(record, VALUE_KEYS, exclude=VALUE_EXCLUDE)
+    bruto, negative = _parse_signed_amount(record[val_key]) if val_key is not None else ("", False)
+    if not bruto:
+        return None
+    row: Dict[str, Any] = {"dt": dt, "bruto": bruto}
+    if negative:
+        row["estorno"] = True
+    return row
+
+
+def extract_rows(payload: Any, estornos: bool = False) -> List[Dict[str, str]]:
+    """
+    Procura, em qualquer nível do JSON, listas de transações e devolve as
+    linhas {dt, bruto}. Uma lista conta quando pelo menos metade dos itens
+    vira transação (estornos incluídos). Estornos/cancelamentos (valor
+    negativo) só são devolvidos com estornos=True, marcados com "estorno".
+    """
+    out: List[Dict[str, str]] = []
+
+    def walk(node: Any, depth: int):
+        if depth > _MAX_DEPTH:
+            return
+        if isinstance(node, list):
+            dicts = [it for it in node if isinstance(it, dict)]
+            if dicts:
+                rows = [r for r in (record_to_row(it) for it in dicts) if r]
+                if rows and len(rows) * 2 >= len(dicts):
+                    out.extend(rows)
+                    return
+            for it in node:
+                walk(it, depth + 1)
+        elif isinstance(node, dict):
+            for v in node.values():
+                if isinstance(v, (list, dict)):
+                    walk(v, depth + 1)
+
+    walk(payload, 0)
+    if estornos:
+        return out
+    return [r for r in out if not r.get("estorno")]
+
+
+def _find_number(payload: Any, keys: Tuple[str, ...]) -> Optional[int]:
+    """
+    Procura um metadado numérico no topo do JSON ou em um nível abaixo
+    (ex.: {"page": {"totalPages": 5}}).
+    """
+    if not isinstance(payload, dict):
+        return None
+    levels = [payload] + [v for v in payload.values() if isinstance(v, dict)]
+    for wanted in keys:
+        for level in levels:
+            for k, v in level.items():
+                # Só inteiros: "total" também pode ser a soma dos valores
+                if _norm_key(k) == wanted and isinstance(v, int) and not isinstance(v, bool):
+                    return v
+    return None
+
+
+def remaining_page_urls(url: str, payload: Any, page_len: int, max_pages: int = 500) -> Tuple[List[str], bool]:
+    """
+    URLs das páginas seguintes à resposta (url, payload).
+
+    Retorna (urls, completo). Com completo=True o total de páginas veio nos
+    metadados. Com completo=False as URLs são candidatas em sequência e quem
+    busca deve parar na primeira página vazia.
+    """
+    parts = urlparse(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    names = {_norm_key(k): k for k, _ in query}
+    values = dict(query)
+
+    def with_param(name: str, value: int) -> str:
+        q = [(k, str(value) if k == name else v) for k, v in query]
+        return urlunparse(parts._replace(query=urlencode(q)))
+
+    size = None
+    for p in SIZE_PARAMS:
+        if p in names:
+            try:
+                size = int(values[names[p]])
+            except ValueError:
+                pass
+            break
+    size = size or page_len
+    total_pages = _find_number(payload, TOTAL_PAGES_KEYS)
+    total_items = _find_number(payload, TOTAL_ITEMS_KEYS)
+    if total_pages is None and total_items is not None and size:
+        total_pages = -(-total_items // size)
+
+    for p in PAGE_PARAMS:
+        if p not in names:
+            continue
+        try:
+            cur = int(values[names[p]])
+        except ValueError:
+            continue
+        # A resposta capturada no recarregamento é a primeira página: 0 ou 1.
+        base = cur if cur in (0, 1) else 0
+        if total_pages is not None:
+            last = min(base + total_pages, cur + 1 + max_pages)
+            return [with_param(names[p], n) for n in range(cur + 1, last)], True
+        return [with_param(names[p], n) for n in range(cur + 1, cur + 1 + max_pages)], False
+
+    for p in OFFSET_PARAMS:
+        if p not in names or not size:
+            continue
+        try:
+            cur = int(values[names[p]])
+        except ValueError:
+            continue
+        if total_items is not None:
+            offsets = range(cur + size, total_items, size)
+            return [with_param(names[p], n) for n in list(offsets)[:max_pages]], True
+        return [with_param(names[p], cur + size * i) for i in range(1, max_pages + 1)], False
+
+    return [], True
@@ -0,0 +1,205 @@
+"""
+Importação offline de páginas do portal Good Card salvas como .html.
+
+Quando não há Chrome com CDP, o usuário pode salvar as páginas de resultado
+("Salvar como... > Página da Web, somente HTML") e importá-las aqui. A leitura
+segue a mesma regra do extrator do navegador (JS_EXTRACT_COLUMNAR): colunas
+"Data / Hora" e "Valor Bruto da Transação" achadas no <thead>, valor
+procurado nas células vizinhas se a coluna estiver deslocada.
+
+O HTML é lido em blocos por um parser em fluxo (html.parser), sem montar a
+árvore do documento, e vários arquivos são processados em paralelo em
+processos separados.
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+from robo_cartoes_emsys_v3 import normalize_brl, normalize_dt
+
+HEADER_DT = "data / hora"
+HEADER_BRUTO = "valor bruto da transação"
+
+_BRL_RE = re.compile(r"R\$\s*(\d{1,3}(?:\.\d{3})*,\d{1,2})")
+_DT_RE = re.compile(r"^\d{2}/\d{2}/\d{4}(?: \d{2}:\d{2}:\d{2})?$")
+_WS_RE = re.compile(r"\s+")
+
+CHUNK_SIZE = 64 * 1024
+# Abaixo disso, abrir processos custa mais que ler os arquivos em sequência.
+PARALLEL_MIN_FILES = 3
+
+
+class _TableState:
+    __slots__ = ("section", "dt_idx", "br_idx", "row", "cell", "in_cell")
+
+    def __init__(self):
+        self.section = ""  # "thead", "tbody" ou ""
+        self.dt_idx = -1
+        self.br_idx = -1
+        self.row: Optional[List[str]] = None
+        self.cell: List[str] = []
+        self.in_cell = False
+
+
+class TransactionsTableParser(HTMLParser):
+    """
+    Parser em fluxo: alimente com feed() em blocos; as vendas ficam em .rows.
+    Tabelas aninhadas são tratadas com uma pilha de estados.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows: List[Dict[str, str]] = []
+        self._stack: List[_TableState] = []
+
+    # ------------------------------------------------------------------ eventos
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self._stack.append(_TableState())
+            return
+        if not self._stack:
+            return
+        st = self._stack[-1]
+        if tag in ("thead", "tbody"):
+            st.section = tag
+        elif tag == "tr":
+            self._close_row(st)
+            st.row = []
+        elif tag in ("td", "th") and st.row is not None:
+            self._close_cell(st)
+            st.in_cell = True
+            st.cell = []
+        elif tag == "br" and st.in_cell:
+            st.cell.append(" ")
+
+    def handle_endtag(self, tag):
+        if not self._stack:
+            return
+        st = self._stack[-1]
+        if tag == "table":
+            self._close_row(st)
+            self._stack.pop()
+        elif tag in ("td", "th"):
+            self._close_cell(st)
+        elif tag == "tr":
+            self._close_row(st)
+        elif tag in ("thead", "tbody"):
+            self._close_row(st)
+            st.section = ""
+
+    def handle_data(self, data):
+        if self._stack and self._stack[-1].in_cell:
+            self._stack[-1].cell.append(data)
+
+    # ------------------------------------------------------------------ linhas
+    def _close_cell(self, st: _TableState):
+        if st.in_cell and st.row is not None:
+            st.row.append(_WS_RE.sub(" ", "".join(st.cell)).strip())
+        st.in_cell = False
+        st.cell = []
+
+    def _close_row(self, st: _TableState):
+        self._close_cell(st)
+        cells, st.row = st.row, None
+        if not cells:
+            return
+        if st.section == "thead":
+            if st.dt_idx == -1 or st.br_idx == -1:
+                texts = [c.lower() for c in cells]
+                dt_idx = next((i for i, t in enumerate(texts) if HEADER_DT in t), -1)
+                br_idx = next((i for i, t in enumerate(texts) if HEADER_BRUTO in t), -1)
+                if dt_idx != -1 and br_idx != -1:
+                    st.dt_idx, st.br_idx = dt_idx, br_idx
+            return
+        if st.section == "tbody" and st.dt_idx != -1:
+            self._read_row(st, cells)
+
+    def _read_row(self, st: _TableState, cells: List[str]):
+        if len(cells) <= max(st.dt_idx, st.br_idx):
+            return
+        dt = cells[st.dt_idx]
+        if not _DT_RE.match(dt):
+            return
+        m = _BRL_RE.search(cells[st.br_idx])
+        for delta in range(1, 5):
+            if m:
+                break
+            if st.br_idx + delta < len(cells):
+                m = _BRL_RE.search(cells[st.br_idx + delta])
+            if not m and st.br_idx - delta >= 0:
+                m = _BRL_RE.search(cells[st.br_idx - delta])
+        if m:
+            self.rows.append({"dt": dt, "bruto": m.group(1)})
+
+
+def parse_html_file(path: str) -> List[Dict[str, str]]:
+    """
+    Lê um .html salvo do portal em blocos e retorna [{dt, bruto, id}] sem
+    repetição. Arquivos que não são UTF-8 são relidos como cp1252.
+    """
+    for encoding in ("utf-8", "cp1252"):
+        parser = TransactionsTableParser()
+        try:
+            with open(path, "r", encoding=encoding) as f:
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    parser.feed(chunk)
+            parser.close()
+        except UnicodeDecodeError:
+            continue
+        break
+
+    out = []
+    seen = set()
+    for r in parser.rows:
+        dt = normalize_dt(r["dt"])
+        bruto = normalize_brl(r["bruto"])
+        if not dt or not bruto or (dt, bruto) in seen:
+            continue
+        seen.add((dt, bruto))
+        out.append({"dt": dt, "bruto": bruto, "id": ""})
+    return out
+
+
+def _parse_file_safe(path: str) -> Dict:
+    try:
+        return {"arquivo": path, "rows": parse_html_file(path), "erro": ""}
+    except Exception as e:
+        return {"arquivo": path, "rows": [], "erro": str(e)}
+
+
+def import_html_files(paths: List[str], workers: Optional[int] = None) -> Dict:
+    """
+    Lê vários .html (em paralelo quando vale a pena) e junta tudo.
+    Retorna {"rows": vendas sem repetição, "arquivos": [{arquivo, count, erro}]}.
+    """
+    if len(paths) >= PARALLEL_MIN_FILES and (workers is None or workers > 1):
+        workers = workers or min(len(paths), os.cpu_count() or 1)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_parse_file_safe, paths, chunksize=max(1, len(paths) // (workers * 4))))
+        except Exception:
+            # Sem suporte a processos (ambiente restrito): lê em sequência
+            results = [_parse_file_safe(p) for p in paths]
+    else:
+        results = [_parse_file_safe(p) for p in paths]
+
+    rows: List[Dict[str, str]] = []
+    seen = set()
+    arquivos = []
+    for res in results:
+        count = 0
+        for r in res["rows"]:
+            key = (r["dt"], r["bruto"])
+            if key in seen:
+                continue
+            seen.add(key)
+            rows.append(r)
+            count += 1
+        arquivos.append({"arquivo": os.path.basename(res["arquivo"]), "count": count, "erro": res["erro"]})
+    return {"rows": rows, "arquivos": arquivos}
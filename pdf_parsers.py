@@ -0,0 +1,361 @@
+"""
+Parsers de extratos em PDF baseados em palavras (pdfplumber.extract_words).
+
+Em vez de rodar extract_text() + extract_tables() em cada página, lemos as
+palavras da página uma única vez, agrupamos em linhas pela coordenada y e
+mapeamos cada palavra para a coluna aprendida a partir do cabeçalho.
+"""
+
+import logging
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from robo_cartoes_emsys_v3 import (
+    BRL_NUM_RE,
+    brl_to_float,
+    normalize_brl,
+    normalize_dt,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Tolerâncias (em pontos PDF) usadas para agrupar palavras.
+ROW_Y_TOLERANCE = 3.0
+HEADER_WORD_GAP = 6.0
+
+_RE_DATE = re.compile(r"^\d{2}/\d{2}/\d{4}$")
+_RE_COD = re.compile(r"\d{4,}")
+
+# Mesmo formato de linha aceito pelo parser legado do Vale Card.
+VALECARD_LINE_RE = re.compile(
+    r"(?P<data>\d{2}/\d{2}/\d{4})\s+"
+    r"(?P<tipo>[VT])\s+"
+    r"(?P<cod>\d{4,})\s+"
+    r".*?"
+    r"(?P<valor>\d{1,3}(?:\.\d{3})*,\d{1,2})"
+    r"$"
+)
+
+# Campo -> prefixos aceitos no texto do cabeçalho (minúsculo).
+VALECARD_HEADER_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "data": ("data",),
+    "tipo": ("tipo",),
+    "cod": ("código", "codigo", "cód", "cod", "nsu", "autoriza"),
+    "valor": ("valor",),
+}
+
+
+def group_words_into_rows(words: Iterable[Dict], y_tolerance: float = ROW_Y_TOLERANCE) -> List[List[Dict]]:
+    """
+    Agrupa palavras do pdfplumber em linhas visuais pela coordenada "top".
+    Cada linha volta ordenada da esquerda para a direita.
+    """
+    rows: List[List[Dict]] = []
+    current: List[Dict] = []
+    current_top: Optional[float] = None
+
+    for w in sorted(words, key=lambda w: (w["top"], w["x0"])):
+        if current_top is None or w["top"] - current_top > y_tolerance:
+            if current:
+                rows.append(sorted(current, key=lambda w: w["x0"]))
+            current = [w]
+            current_top = w["top"]
+        else:
+            current.append(w)
+
+    if current:
+        rows.append(sorted(current, key=lambda w: w["x0"]))
+    return rows
+
+
+def row_text(row: Sequence[Dict]) -> str:
+    return " ".join(w["text"] for w in row)
+
+
+class ColumnLayout:
+    """
+    Colunas aprendidas a partir da linha de cabeçalho de uma tabela.
+
+    Cada coluna é um rótulo (uma ou mais palavras vizinhas do cabeçalho) com
+    seu intervalo horizontal. As palavras das linhas de dados são atribuídas
+    à coluna cujo intervalo contém o centro da palavra.
+    """
+
+    def __init__(self, labels: List[Tuple[str, float, float]], fields: Dict[str, Tuple[str, ...]]):
+        self.labels = labels
+        self.field_by_col: Dict[int, str] = {}
+        for idx, (label, _, _) in enumerate(labels):
+            low = label.lower()
+            for field, prefixes in fields.items():
+                if field in self.field_by_col.values():
+                    continue
+                if low.startswith(prefixes):
+                    self.field_by_col[idx] = field
+                    break
+
+        # Fronteiras entre colunas: ponto médio do espaço entre rótulos vizinhos.
+        self.bounds: List[float] = []
+        for (_, _, x1), (_, nx0, _) in zip(labels, labels[1:]):
+            self.bounds.append((x1 + nx0) / 2.0)
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self.field_by_col.values())
+
+    @classmethod
+    def from_header_row(
+        cls,
+        row: Sequence[Dict],
+        fields: Dict[str, Tuple[str, ...]],
+        required: Sequence[str],
+        gap: float = HEADER_WORD_GAP,
+    ) -> Optional["ColumnLayout"]:
+        """
+        Tenta interpretar a linha como cabeçalho. Retorna None se algum campo
+        obrigatório não aparecer entre os rótulos.
+        """
+        labels: List[Tuple[str, float, float]] = []
+        for w in row:
+            if labels and w["x0"] - labels[-1][2] <= gap:
+                text, x0, _ = labels[-1]
+                labels[-1] = (f"{text} {w['text']}", x0, w["x1"])
+            else:
+                labels.append((w["text"], w["x0"], w["x1"]))
+
+        layout = cls(labels, fields)
+        if not all(f in layout.fields for f in required):
+            return None
+        return layout
+
+    def column_of(self, word: Dict) -> int:
+        center = (word["x0"] + word["x1"]) / 2.0
+        for idx, bound in enumerate(self.bounds):
+            if center < bound:
+                return idx
+        return len(self.bounds)
+
+    def split(self, row: Sequence[Dict]) -> Dict[str, str]:
+        cells: Dict[str, List[str]] = {}
+        for w in row:
+            field = self.field_by_col.get(self.column_of(w))
+            if field:
+                cells.setdefault(field, []).append(w["text"])
+        return {k: " ".join(v) for k, v in cells.items()}
+
+
+# =====================
+# VALE CARD
+# =====================
+def _valecard_row_from_cells(cells: Dict[str, str]) -> Optional[Dict[str, str]]:
+    data = cells.get("data", "").strip()
+    tipo = cells.get("tipo", "").strip().upper()
+    cod_m = _RE_COD.search(cells.get("cod", ""))
+    valores = BRL_NUM_RE.findall(cells.get("valor", ""))
+
+    if not _RE_DATE.match(data) or tipo not in ("V", "T") or not cod_m or not valores:
+        return None
+    return {"tipo": tipo, "data": data, "cod": cod_m.group(0), "valor": valores[-1]}
+
+
+def _valecard_row_from_text(line: str) -> Optional[Dict[str, str]]:
+    m = VALECARD_LINE_RE.search(line)
+    if not m:
+        return None
+    return {"tipo": m.group("tipo"), "data": m.group("data"), "cod": m.group("cod"), "valor": m.group("valor")}
+
+
+def valecard_parse_pages(
+    pages, line_sink: Optional[Callable[[str], None]] = None
+) -> Tuple[List[Dict[str, str]], bool]:
+    """
+    Extrai vendas (tipo V) do Vale Card lendo as palavras de cada página uma vez.
+
+    Retorna (linhas, layout_reconhecido). layout_reconhecido indica que o
+    cabeçalho da tabela foi encontrado e as colunas foram mapeadas; mesmo
+    assim, sem nenhuma linha o chamador deve tentar os parsers legados.
+
+    Se line_sink for informado, recebe o texto de cada linha visual (útil para
+    somar despesas na mesma passada).
+    """
+    rows: List[Dict[str, str]] = []
+    seen = set()
+    layout: Optional[ColumnLayout] = None
+    layout_known = False
+
+    for page in pages:
+        words = page.extract_words() or []
+        if not words:
+            continue
+
+        for row in group_words_into_rows(words):
+            if line_sink is not None:
+                line_sink(row_text(row))
+
+            header = None
+            if row[0]["text"].lower().startswith("data"):
+                header = ColumnLayout.from_header_row(row, VALECARD_HEADER_FIELDS, required=("data", "valor"))
+            if header is not None:
+                # O layout continua valendo nas páginas seguintes até surgir outro cabeçalho.
+                layout = header
+                layout_known = True
+                continue
+
+            parsed = _valecard_row_from_cells(layout.split(row)) if layout else None
+            if parsed is None:
+                parsed = _valecard_row_from_text(row_text(row))
+            if parsed is None or parsed["tipo"] != "V":
+                continue
+
+            bruto = normalize_brl(parsed["valor"])
+            if not bruto or brl_to_float(bruto) < 0:
+                continue
+            dt = normalize_dt(parsed["data"])
+
+            key = (dt, bruto, parsed["cod"])
+            if key in seen:
+                continue
+            seen.add(key)
+            rows.append({"dt": dt, "bruto": bruto, "id": parsed["cod"]})
+
+    return rows, layout_known
+
+
+def valecard_capture_from_pdf_words(pdf_path: str) -> Tuple[List[Dict[str, str]], bool]:
+    """
+    Abre o PDF e roda valecard_parse_pages em todas as páginas.
+    """
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        return valecard_parse_pages(pdf.pages)
+
+
+# =====================
+# REDE FROTA
+# =====================
+# Mesmo formato de linha aceito pelo parser legado da Rede Frota.
+REDEFROTA_LINE_RE = re.compile(
+    r"(?P<id>\d{6,})\s+"
+    r"(?P<desc>\S+)\s+"
+    r"(?P<data>\d{2}/\d{2}/\d{4})\s+"
+    r"(?P<hora>\d{2}:\d{2}:\d{2})\s+"
+    r"(?P<bruto>\d{1,3}(?:\.\d{3})*,\d{1,2})"
+)
+
+# Início da seção de transações: linha contendo apenas "RESUMO".
+REDEFROTA_SECTION_START_RE = re.compile(r"^[ \t]*RESUMO[ \t]*$", re.MULTILINE | re.IGNORECASE)
+# Fim da seção: linha de TOTAL (com a soma da seção no fim, se houver).
+# Rodapés de página ("Total da página", "Total parcial") não fecham a seção.
+REDEFROTA_SECTION_END_RE = re.compile(
+    r"^TOTAL\b(?![ \t]*(?:DA[ \t]+P[ÁA]GINA|NA[ \t]+P[ÁA]GINA|P[ÁA]GINA|PARCIAL))"
+    r"(?:.*?(?P<valor>\d{1,3}(?:\.\d{3})*,\d{2})\s*$)?",
+    re.IGNORECASE,
+)
+
+# Estados do parser
+_RF_ANTES = 0
+_RF_TRANSACOES = 1
+
+
+class RedeFrotaSectionParser:
+    """
+    Parser em streaming (máquina de estados) das seções RESUMO da Rede Frota.
+
+    O estado é mantido entre as páginas: uma vez encontrado o cabeçalho
+    RESUMO, as linhas das páginas seguintes continuam sendo lidas como
+    transações até a linha de TOTAL que fecha a seção. Depois dela o parser
+    volta a procurar um novo RESUMO, então extratos com mais de um bloco são
+    lidos por inteiro.
+
+    A soma das linhas lidas na seção é conferida com o valor do TOTAL; uma
+    diferença (linha que não casou com a regex, por exemplo) só é registrada
+    no log e em divergencias, sem impedir o fechamento da seção.
+    """
+
+    def __init__(self):
+        self.state = _RF_ANTES
+        self.rows: List[Dict[str, str]] = []
+        self.divergencias: List[str] = []
+        self._seen = set()
+        self._section_rows = 0
+        self._section_cents = 0
+
+    def feed_page(self, text: str) -> None:
+        while text:
+            if self.state == _RF_ANTES:
+                # Pula direto para depois do cabeçalho com uma busca só no texto da página.
+                m = REDEFROTA_SECTION_START_RE.search(text)
+                if not m:
+                    return
+                text = text[m.end():]
+                self.state = _RF_TRANSACOES
+                self._section_rows = 0
+                self._section_cents = 0
+            text = self._feed_section(text)
+
+    def _feed_section(self, text: str) -> str:
+        """
+        Lê transações até o TOTAL que fecha a seção; devolve o texto que vem
+        depois dele (vazio se a seção continua na próxima página).
+        """
+        lines = text.splitlines(keepends=True)
+        for i, raw in enumerate(lines):
+            line = raw.strip()
+            if not line:
+                continue
+            m = REDEFROTA_LINE_RE.search(line)
+            if not m:
+                end = REDEFROTA_SECTION_END_RE.match(line) if self._section_rows else None
+                if end:
+                    self._check_total(line, end.group("valor"))
+                    self.state = _RF_ANTES
+                    return "".join(lines[i + 1:])
+                continue
+
+            dt = normalize_dt(f"{m.group('data')} {m.group('hora')}")
+            bruto = normalize_brl(m.group("bruto"))
+            if not dt or not bruto:
+                continue
+            # A soma usa todas as linhas da seção, inclusive as repetidas
+            self._section_rows += 1
+            self._section_cents += self._cents(bruto)
+            tid = m.group("id")
+            key = (dt, bruto, tid)
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            self.rows.append({"dt": dt, "bruto": bruto, "id": tid})
+        return ""
+
+    def _check_total(self, line: str, valor: Optional[str]) -> None:
+        if not valor or self._cents(valor) == self._section_cents:
+            return
+        msg = f"Rede Frota: soma das transações lidas ({self._section_cents / 100:.2f}) difere do TOTAL: {line}"
+        self.divergencias.append(msg)
+        logger.warning(msg)
+
+    @staticmethod
+    def _cents(valor: str) -> int:
+        return int(round(brl_to_float(valor) * 100))
+
+
+def redefrota_parse_pages(pages) -> List[Dict[str, str]]:
+    """
+    Extrai as transações da Rede Frota percorrendo as páginas em ordem. Todas
+    as páginas são lidas: depois do TOTAL de uma seção pode vir outro RESUMO.
+    """
+    parser = RedeFrotaSectionParser()
+    for page in pages:
+        parser.feed_page(page.extract_text() or "")
+    return parser.rows
+
+
+def redefrota_capture_from_pdf_stream(pdf_path: str) -> List[Dict[str, str]]:
+    """
+    Abre o PDF e roda redefrota_parse_pages.
+    """
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        return redefrota_parse_pages(pdf.pages)
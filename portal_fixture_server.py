@@ -0,0 +1,346 @@
+"""
+Servidor local que imita a listagem de transações do portal Good Card.
+
+Serve a mesma tabela ("Data / Hora" e "Valor Bruto da Transação") em várias
+variações, para testar os modos de captura sem acessar o portal real:
+
+    /paginado?pagina=N   paginação no servidor (link "Próxima" com rel=next)
+    /spa                 paginação no navegador (botão "Próxima" troca o tbody)
+    /rolagem             rolagem infinita (linhas chegam por fetch ao rolar)
+    /xhr                 tabela montada a partir da API JSON abaixo
+    /virtual             grade virtualizada (role=grid): só as linhas visíveis existem
+    /api/transacoes?page=N&size=M   respostas JSON paginadas (captura por rede)
+
+Com --gravacoes, /api/transacoes devolve as respostas gravadas do portal real
+(arquivos pagina_N.json) em vez das geradas.
+
+Uso:
+    python portal_fixture_server.py --porta 8765 --linhas 250
+    (abra no Chrome com a porta 9222 e use "Capturar todas as páginas")
+"""
+
+import argparse
+import html
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from robo_cartoes_emsys_v3 import float_to_brl
+
+PAGE_SIZE = 20
+
+
+def fixture_rows(total: int, seed_dt: Optional[datetime] = None) -> List[Dict[str, str]]:
+    """
+    Transações determinísticas, da mais recente para a mais antiga (como no portal).
+    """
+    start = seed_dt or datetime(2024, 3, 31, 22, 0, 0)
+    out = []
+    for i in range(total):
+        quando = start - timedelta(minutes=13 * i, seconds=i % 60)
+        cents = 1000 + (i * 7919) % 250000
+        out.append({"dt": quando.strftime("%d/%m/%Y %H:%M:%S"), "bruto": float_to_brl(cents / 100.0)})
+    return out
+
+
+def api_page(rows: List[Dict[str, str]], page: int, size: int) -> Dict:
+    """
+    Página no formato das APIs REST paginadas ("content" + metadados).
+    """
+    size = max(1, size)
+    ini = max(0, page) * size
+    content = []
+    for i, r in enumerate(rows[ini : ini + size], start=ini):
+        quando = datetime.strptime(r["dt"], "%d/%m/%Y %H:%M:%S")
+        bruto = float(r["bruto"].replace(".", "").replace(",", "."))
+        content.append(
+            {
+                "id": 500000 + i,
+                "dataHora": quando.strftime("%Y-%m-%dT%H:%M:%S"),
+                "modalidade": "CREDITO",
+                "valorBruto": bruto,
+                "valorLiquido": round(bruto * 0.97, 2),
+                "status": "APROVADA",
+            }
+        )
+    return {
+        "content": content,
+        "number": page,
+        "size": size,
+        "totalPages": max(1, -(-len(rows) // size)),
+        "totalElements": len(rows),
+    }
+
+
+def _tr(row: Dict[str, str], i: int) -> str:
+    return (
+        f"<tr><td>{i}</td><td>{html.escape(row['dt'])}</td><td>Crédito</td>"
+        f"<td>R$ {html.escape(row['bruto'])}</td><td>Aprovada</td></tr>"
+    )
+
+
+_HEAD = (
+    "<thead><tr><th>#</th><th>Data / Hora</th><th>Modalidade</th>"
+    "<th>Valor Bruto da Transação</th><th>Status</th></tr></thead>"
+)
+
+
+def _page(title: str, body: str) -> str:
+    return (
+        f"<!doctype html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title></head>"
+        f"<body><h1>{html.escape(title)}</h1>{body}</body></html>"
+    )
+
+
+def render_paginado(rows: List[Dict[str, str]], pagina: int) -> str:
+    paginas = max(1, -(-len(rows) // PAGE_SIZE))
+    pagina = min(max(1, pagina), paginas)
+    ini = (pagina - 1) * PAGE_SIZE
+    corpo = "".join(_tr(r, ini + i + 1) for i, r in enumerate(rows[ini : ini + PAGE_SIZE]))
+    if pagina < paginas:
+        prox = f"<a rel='next' href='/paginado?pagina={pagina + 1}'>Próxima</a>"
+    else:
+        prox = "<span class='disabled'><a>Próxima</a></span>"
+    nav = f"<nav>Página {pagina} de {paginas} {prox}</nav>"
+    return _page("Good Card - Transações", f"<table>{_HEAD}<tbody>{corpo}</tbody></table>{nav}")
+
+
+def render_spa(rows: List[Dict[str, str]]) -> str:
+    script = """
+<script>
+const DATA = %s;
+const SIZE = %d;
+let pagina = 0;
+function render() {
+  const tb = document.querySelector("tbody");
+  tb.innerHTML = "";
+  DATA.slice(pagina * SIZE, (pagina + 1) * SIZE).forEach((r, i) => {
+    const tr = document.createElement("tr");
+    tr.innerHTML = `<td>${pagina * SIZE + i + 1}</td><td>${r.dt}</td><td>Crédito</td><td>R$ ${r.bruto}</td><td>Aprovada</td>`;
+    tb.appendChild(tr);
+  });
+  document.getElementById("prox").disabled = (pagina + 1) * SIZE >= DATA.length;
+}
+document.getElementById("prox").addEventListener("click", () => {
+  // Simula a latência da API do portal antes de trocar a página
+  setTimeout(() => { pagina++; render(); }, 150);
+});
+render();
+</script>""" % (
+        json.dumps(rows),
+        PAGE_SIZE,
+    )
+    body = f"<table>{_HEAD}<tbody></tbody></table><button id='prox'>Próxima</button>{script}"
+    return _page("Good Card - Transações (SPA)", body)
+
+
+def render_rolagem() -> str:
+    script = """
+<script>
+const box = document.getElementById("lista");
+let offset = 0, carregando = false, fim = false;
+async function carregar() {
+  if (carregando || fim) return;
+  carregando = true;
+  const resp = await fetch(`/linhas?offset=${offset}&limite=%d`);
+  const linhas = await resp.json();
+  const tb = box.querySelector("tbody");
+  linhas.forEach((r, i) => {
+    const tr = document.createElement("tr");
+    tr.innerHTML = `<td>${offset + i + 1}</td><td>${r.dt}</td><td>Crédito</td><td>R$ ${r.bruto}</td><td>Aprovada</td>`;
+    tb.appendChild(tr);
+  });
+  offset += linhas.length;
+  fim = linhas.length === 0;
+  carregando = false;
+}
+box.addEventListener("scroll", () => {
+  if (box.scrollTop + box.clientHeight >= box.scrollHeight - 40) carregar();
+});
+carregar();
+</script>""" % (
+        PAGE_SIZE,
+    )
+    body = (
+        f"<div id='lista' style='height:300px;overflow-y:auto'>"
+        f"<table>{_HEAD}<tbody></tbody></table></div>{script}"
+    )
+    return _page("Good Card - Transações (rolagem)", body)
+
+
+def render_xhr() -> str:
+    script = """
+<script>
+let pagina = 0;
+async function carregar() {
+  const resp = await fetch(`/api/transacoes?page=${pagina}&size=%d`);
+  const dados = await resp.json();
+  const tb = document.querySelector("tbody");
+  tb.innerHTML = "";
+  dados.content.forEach((t, i) => {
+    const d = new Date(t.dataHora);
+    const dt = d.toLocaleDateString("pt-BR") + " " + d.toLocaleTimeString("pt-BR");
+    const v = t.valorBruto.toLocaleString("pt-BR", { minimumFractionDigits: 2 });
+    const tr = document.createElement("tr");
+    tr.innerHTML = `<td>${t.id}</td><td>${dt}</td><td>Crédito</td><td>R$ ${v}</td><td>Aprovada</td>`;
+    tb.appendChild(tr);
+  });
+  document.getElementById("prox").disabled = pagina + 1 >= dados.totalPages;
+}
+document.getElementById("prox").addEventListener("click", () => { pagina++; carregar(); });
+carregar();
+</script>""" % (
+        PAGE_SIZE,
+    )
+    body = f"<table>{_HEAD}<tbody></tbody></table><button id='prox'>Próxima</button>{script}"
+    return _page("Good Card - Transações (API)", body)
+
+
+def render_virtual(rows: List[Dict[str, str]]) -> str:
+    # As mesmas 15 linhas do DOM são recicladas a cada rolagem, como nas grades virtualizadas
+    script = """
+<script>
+const DATA = %s;
+const ROW_H = 24, VISIBLE = 15;
+const box = document.getElementById("viewport");
+const body = document.getElementById("corpo");
+document.getElementById("espaco").style.height = (DATA.length * ROW_H) + "px";
+const pool = [];
+for (let i = 0; i < VISIBLE; i++) {
+  const row = document.createElement("div");
+  row.setAttribute("role", "row");
+  row.style.cssText = "display:flex;height:" + ROW_H + "px";
+  for (let c = 0; c < 4; c++) {
+    const cell = document.createElement("div");
+    cell.setAttribute("role", "gridcell");
+    cell.style.width = "180px";
+    row.appendChild(cell);
+  }
+  body.appendChild(row);
+  pool.push(row);
+}
+function render() {
+  const first = Math.floor(box.scrollTop / ROW_H);
+  body.style.transform = "translateY(" + (first * ROW_H) + "px)";
+  pool.forEach((row, i) => {
+    const r = DATA[first + i];
+    row.style.visibility = r ? "visible" : "hidden";
+    const cells = row.children;
+    cells[0].textContent = r ? String(first + i + 1) : "";
+    cells[1].textContent = r ? r.dt : "";
+    cells[2].textContent = r ? "R$ " + r.bruto : "";
+    cells[3].textContent = r ? "Aprovada" : "";
+  });
+}
+box.addEventListener("scroll", render);
+render();
+</script>""" % (
+        json.dumps(rows),
+    )
+    body = (
+        "<div role='grid'>"
+        "<div role='row' style='display:flex'>"
+        "<div role='columnheader' style='width:180px'>#</div>"
+        "<div role='columnheader' style='width:180px'>Data / Hora</div>"
+        "<div role='columnheader' style='width:180px'>Valor Bruto da Transação</div>"
+        "<div role='columnheader' style='width:180px'>Status</div></div>"
+        "<div id='viewport' style='height:360px;overflow-y:auto;position:relative'>"
+        "<div id='espaco'><div id='corpo'></div></div></div></div>"
+        f"{script}"
+    )
+    return _page("Good Card - Transações (virtualizada)", body)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    rows: List[Dict[str, str]] = []
+    recordings_dir: Optional[str] = None
+
+    def log_message(self, format, *args):  # noqa: A002 - assinatura da classe base
+        pass
+
+    def _send(self, body: str, content_type: str = "text/html; charset=utf-8", status: int = 200):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        qs = parse_qs(url.query)
+
+        def arg(name: str, default: int) -> int:
+            try:
+                return int(qs.get(name, [default])[0])
+            except (TypeError, ValueError):
+                return default
+
+        if url.path in ("/", "/paginado"):
+            self._send(render_paginado(self.rows, arg("pagina", 1)))
+        elif url.path == "/spa":
+            self._send(render_spa(self.rows))
+        elif url.path == "/rolagem":
+            self._send(render_rolagem())
+        elif url.path == "/virtual":
+            self._send(render_virtual(self.rows))
+        elif url.path == "/xhr":
+            self._send(render_xhr())
+        elif url.path == "/api/transacoes":
+            page = max(0, arg("page", 0))
+            gravado = os.path.join(self.recordings_dir, f"pagina_{page}.json") if self.recordings_dir else ""
+            if gravado and os.path.exists(gravado):
+                with open(gravado, "r", encoding="utf-8") as f:
+                    self._send(f.read(), "application/json")
+            else:
+                self._send(json.dumps(api_page(self.rows, page, arg("size", PAGE_SIZE))), "application/json")
+        elif url.path == "/linhas":
+            ini = max(0, arg("offset", 0))
+            fim = ini + max(1, arg("limite", PAGE_SIZE))
+            self._send(json.dumps(self.rows[ini:fim]), "application/json")
+        else:
+            self._send("não encontrado", "text/plain; charset=utf-8", 404)
+
+
+def _make_handler(total: int, recordings_dir: Optional[str] = None):
+    return type("FixtureHandler", (_Handler,), {"rows": fixture_rows(total), "recordings_dir": recordings_dir})
+
+
+def start_fixture_server(
+    total: int = 250, port: int = 0, host: str = "127.0.0.1", recordings_dir: Optional[str] = None
+) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Sobe o servidor numa thread de fundo. port=0 escolhe uma porta livre.
+    Retorna (servidor, url_base); encerre com servidor.shutdown().
+    """
+    handler = _make_handler(total, recordings_dir)
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="portal-fixture", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local que imita a listagem do portal Good Card.")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--linhas", type=int, default=250, help="Quantidade de transações servidas")
+    parser.add_argument("--gravacoes", help="Pasta com respostas gravadas da API (pagina_0.json, pagina_1.json, ...)")
+    args = parser.parse_args(argv)
+
+    handler = _make_handler(args.linhas, args.gravacoes)
+    server = ThreadingHTTPServer(("127.0.0.1", args.porta), handler)
+    base = f"http://127.0.0.1:{args.porta}"
+    print(f"Servindo {args.linhas} transações em {base}/paginado, /spa, /rolagem, /xhr e /virtual (Ctrl+C para sair)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
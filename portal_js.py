@@ -0,0 +1,338 @@
+"""
+Trechos de JavaScript avaliados nas abas do portal Good Card (via CDP).
+
+Ficam separados do core para poderem ser reaproveitados pelos modos de
+captura (aba atual, varredura de páginas) e testados contra o servidor de
+fixtures local (portal_fixture_server.py).
+"""
+
+from typing import Dict, List, Optional, Union
+
+# Assinatura do conteúdo da tabela de transações: muda quando a página de
+# resultados troca (paginação) ou quando chegam mais linhas (rolagem infinita).
+JS_TABLE_SIGNATURE = r"""
+() => {
+  const rows = document.querySelectorAll("table tbody tr");
+  if (!rows.length) return "";
+  const first = (rows[0].textContent || "").replace(/\s+/g, " ").trim();
+  const last = (rows[rows.length - 1].textContent || "").replace(/\s+/g, " ").trim();
+  return rows.length + "|" + first + "|" + last;
+}
+"""
+
+# Avança a listagem: clica no controle de "próxima página" se houver um
+# habilitado; senão rola o contêiner da tabela até o fim (rolagem infinita).
+# Retorna "next", "scroll" ou "" quando não há como avançar.
+JS_CRAWL_ADVANCE = r"""
+() => {
+  const NEXT_WORDS = ["próxima", "proxima", "próximo", "proximo", "seguinte", "next", ">", "›", "»"];
+
+  function norm(s) { return (s || "").replace(/\s+/g, " ").trim().toLowerCase(); }
+
+  function isDisabled(el) {
+    if (el.disabled) return true;
+    if (el.getAttribute("aria-disabled") === "true") return true;
+    for (let node = el; node && node !== document.body; node = node.parentElement) {
+      if (node.classList && node.classList.contains("disabled")) return true;
+    }
+    return false;
+  }
+
+  function isVisible(el) {
+    const r = el.getBoundingClientRect();
+    return r.width > 0 && r.height > 0;
+  }
+
+  const candidates = document.querySelectorAll("a, button, [role=button], [rel=next]");
+  for (const el of candidates) {
+    const label = norm(el.getAttribute("aria-label") || el.getAttribute("title") || el.textContent);
+    const isNext = el.getAttribute("rel") === "next" || NEXT_WORDS.includes(label)
+      || NEXT_WORDS.some(w => w.length > 1 && label.startsWith(w));
+    if (!isNext || isDisabled(el) || !isVisible(el)) continue;
+    el.click();
+    return "next";
+  }
+
+  const table = document.querySelector("table tbody tr") ? document.querySelector("table") : null;
+  if (!table) return "";
+
+  let box = table.parentElement;
+  while (box && box !== document.body) {
+    const oy = getComputedStyle(box).overflowY;
+    if ((oy === "auto" || oy === "scroll") && box.scrollHeight > box.clientHeight) break;
+    box = box.parentElement;
+  }
+  if (!box || box === document.body) box = document.scrollingElement || document.documentElement;
+
+  const before = box.scrollTop;
+  box.scrollTop = box.scrollHeight;
+  if (box.scrollTop === before) return "";
+  box.dispatchEvent(new Event("scroll"));
+  return "scroll";
+}
+"""
+
+# Separadores do retorno colunar (caracteres de controle que não aparecem no texto das células).
+FIELD_SEP = "\x1f"
+ROW_SEP = "\x1e"
+
+# Extrator rápido da tabela de transações. Resolve as colunas "Data / Hora" e
+# "Valor Bruto da Transação" uma vez por tabela e percorre as linhas por
+# tBodies/rows/cells lendo textContent (não força layout como innerText).
+# As linhas vão numa única string: "dt\x1fbruto" por linha, separadas por
+# \x1e, que atravessa o CDP bem mais barato que um array de objetos.
+# Parâmetro: since ("aaaammddhhmmss", ver core.capture_since) ou null. Linhas
+# mais antigas que since nem saem da página, só são contadas.
+# Retorna {rows, antigas}, ou "" se a página não tiver nenhuma transação.
+JS_EXTRACT_COLUMNAR = r"""
+(since) => {
+  const HEADER_DT = "data / hora";
+  const HEADER_BRUTO = "valor bruto da transação";
+  const BRL = /R\$\s*(\d{1,3}(?:\.\d{3})*,\d{1,2})/;
+  const DT = /^\d{2}\/\d{2}\/\d{4}(?: \d{2}:\d{2}:\d{2})?$/;
+
+  function headerIndex(table, target) {
+    const head = table.tHead;
+    if (!head) return -1;
+    for (const tr of head.rows) {
+      const cells = tr.cells;
+      for (let i = 0; i < cells.length; i++) {
+        if (cells[i].textContent.replace(/\s+/g, " ").trim().toLowerCase().includes(target)) return i;
+      }
+    }
+    return -1;
+  }
+
+  const out = [];
+  let antigas = 0;
+  const tables = document.getElementsByTagName("table");
+  for (let t = 0; t < tables.length; t++) {
+    const table = tables[t];
+    const dtIdx = headerIndex(table, HEADER_DT);
+    const brIdx = headerIndex(table, HEADER_BRUTO);
+    if (dtIdx === -1 || brIdx === -1) continue;
+    const minCells = Math.max(dtIdx, brIdx) + 1;
+
+    for (const body of table.tBodies) {
+      const rows = body.rows;
+      for (let r = 0; r < rows.length; r++) {
+        const cells = rows[r].cells;
+        if (cells.length < minCells) continue;
+
+        const dt = cells[dtIdx].textContent.replace(/\s+/g, " ").trim();
+        if (!DT.test(dt)) continue;
+        if (since) {
+          const key = dt.slice(6, 10) + dt.slice(3, 5) + dt.slice(0, 2) + (dt.slice(11).replace(/:/g, "") || "000000");
+          if (key < since) { antigas++; continue; }
+        }
+
+        let m = BRL.exec(cells[brIdx].textContent);
+        // Células mescladas deslocam a coluna: procura o valor nas vizinhas
+        for (let d = 1; !m && d <= 4; d++) {
+          if (brIdx + d < cells.length) m = BRL.exec(cells[brIdx + d].textContent);
+          if (!m && brIdx - d >= 0) m = BRL.exec(cells[brIdx - d].textContent);
+        }
+        if (!m) continue;
+        const val = /,\d$/.test(m[1]) ? m[1] + "0" : m[1];
+        out.push(dt + "\x1f" + val);
+      }
+    }
+  }
+  return out.length || antigas ? { rows: out.join("\x1e"), antigas: antigas } : "";
+}
+"""
+
+
+def decode_columnar(payload: Union[None, str, Dict]) -> List[Dict[str, str]]:
+    """
+    Converte o retorno de JS_EXTRACT_COLUMNAR (ou a string de
+    JS_COLLECTOR_PULL) em [{"dt", "bruto"}].
+    """
+    if isinstance(payload, dict):
+        payload = payload.get("rows")
+    if not payload:
+        return []
+    out = []
+    for line in payload.split(ROW_SEP):
+        dt, sep, bruto = line.partition(FIELD_SEP)
+        if sep:
+            out.append({"dt": dt, "bruto": bruto})
+    return out
+
+
+# Coletor contínuo para tabelas virtualizadas (só as linhas visíveis existem no
+# DOM). Instala window.__acCollector: um MutationObserver lê cada linha que
+# aparece (tabelas <table> ou grades role=grid/row/gridcell), guarda as chaves
+# "dt\x1fbruto" sem repetição e, opcionalmente, rola a lista sozinho até o
+# fim. O Python busca tudo de uma vez com JS_COLLECTOR_PULL.
+# Parâmetro: {autoScroll: bool, intervalMs: number}. Retorna a contagem atual.
+JS_COLLECTOR_INSTALL = r"""
+(opts) => {
+  opts = opts || {};
+  const existing = window.__acCollector;
+  if (existing) {
+    existing.scanAll();
+    if (opts.autoScroll) existing.startScroll(opts.intervalMs);
+    return existing.keys.size;
+  }
+
+  const HEADER_DT = "data / hora";
+  const HEADER_BRUTO = "valor bruto da transação";
+  const BRL = /R\$\s*(\d{1,3}(?:\.\d{3})*,\d{1,2})/;
+  const DT = /^\d{2}\/\d{2}\/\d{4}(?: \d{2}:\d{2}:\d{2})?$/;
+  const ROW_SEL = "tr, [role=row]";
+  const GRID_SEL = "table, [role=grid], [role=table], [role=treegrid]";
+
+  const norm = s => (s || "").replace(/\s+/g, " ").trim();
+  const layouts = new WeakMap();
+  const keys = new Set();
+
+  function headerIndexes(headers) {
+    let dt = -1, br = -1;
+    for (let i = 0; i < headers.length; i++) {
+      const t = norm(headers[i].textContent).toLowerCase();
+      if (dt === -1 && t.includes(HEADER_DT)) dt = i;
+      if (br === -1 && t.includes(HEADER_BRUTO)) br = i;
+    }
+    return dt !== -1 && br !== -1 ? { dt, br } : null;
+  }
+
+  function layoutOf(grid) {
+    let lay = layouts.get(grid);
+    if (lay) return lay;
+    if (grid.tagName === "TABLE") {
+      for (const tr of (grid.tHead ? grid.tHead.rows : [])) {
+        lay = headerIndexes(tr.cells);
+        if (lay) break;
+      }
+    } else {
+      lay = headerIndexes(grid.querySelectorAll("[role=columnheader]"));
+    }
+    // Só guarda layouts encontrados: o cabeçalho pode ser renderizado depois
+    if (lay) layouts.set(grid, lay);
+    return lay;
+  }
+
+  function readRow(row) {
+    const grid = row.closest(GRID_SEL);
+    if (!grid) return;
+    const lay = layoutOf(grid);
+    if (!lay) return;
+    const cells = row.tagName === "TR" ? row.cells : row.querySelectorAll("[role=gridcell], [role=cell]");
+    if (cells.length <= Math.max(lay.dt, lay.br)) return;
+
+    const dt = norm(cells[lay.dt].textContent);
+    if (!DT.test(dt)) return;
+    let m = BRL.exec(cells[lay.br].textContent);
+    for (let d = 1; !m && d <= 4; d++) {
+      if (lay.br + d < cells.length) m = BRL.exec(cells[lay.br + d].textContent);
+      if (!m && lay.br - d >= 0) m = BRL.exec(cells[lay.br - d].textContent);
+    }
+    if (m) keys.add(dt + "\x1f" + m[1]);
+  }
+
+  function scan(node) {
+    if (!node || node.nodeType !== 1) return;
+    const row = node.closest(ROW_SEL);
+    if (row) { readRow(row); return; }
+    for (const r of node.querySelectorAll(ROW_SEL)) readRow(r);
+  }
+
+  function scanAll() { scan(document.body || document.documentElement); }
+
+  // Lê os nós adicionados; linhas recicladas trocam só o texto das células,
+  // então a linha que contém o alvo da mutação também é relida.
+  const observer = new MutationObserver(mutations => {
+    const seen = new Set();
+    for (const mu of mutations) {
+      const target = mu.type === "characterData" ? mu.target.parentElement : mu.target;
+      const row = target && target.closest ? target.closest(ROW_SEL) : null;
+      if (row && !seen.has(row)) { seen.add(row); readRow(row); }
+      for (const n of mu.addedNodes) {
+        if (n.nodeType !== 1 || seen.has(n)) continue;
+        seen.add(n);
+        scan(n);
+      }
+    }
+  });
+
+  let timer = null;
+  let still = 0;
+  const state = { done: false };
+
+  function scroller() {
+    for (const grid of document.querySelectorAll(GRID_SEL)) {
+      if (!layoutOf(grid)) continue;
+      // Sobe a partir de uma célula: o contêiner rolável pode estar dentro da grade
+      const start = grid.querySelector("tbody tr, [role=gridcell], [role=cell]") || grid;
+      for (let box = start; box && box !== document.body; box = box.parentElement) {
+        const oy = getComputedStyle(box).overflowY;
+        if ((oy === "auto" || oy === "scroll") && box.scrollHeight > box.clientHeight) return box;
+      }
+      return document.scrollingElement || document.documentElement;
+    }
+    return null;
+  }
+
+  function stopScroll() {
+    if (timer) clearInterval(timer);
+    timer = null;
+  }
+
+  function startScroll(intervalMs) {
+    if (timer) return;
+    state.done = false;
+    still = 0;
+    timer = setInterval(() => {
+      const box = scroller();
+      if (!box) { stopScroll(); state.done = true; return; }
+      const before = box.scrollTop;
+      box.scrollTop = before + Math.max(50, Math.floor(box.clientHeight * 0.8));
+      scanAll();
+      // Parado no fim por ~8 ciclos: dá tempo de a lista carregar mais linhas
+      if (box.scrollTop === before) {
+        if (++still >= 8) { stopScroll(); state.done = true; }
+      } else {
+        still = 0;
+      }
+    }, intervalMs || 200);
+  }
+
+  const collector = {
+    keys,
+    scanAll,
+    startScroll,
+    stopScroll,
+    status: () => ({ count: keys.size, scrolling: !!timer, done: state.done }),
+    pull: () => Array.from(keys).join("\x1e"),
+    stop: () => {
+      observer.disconnect();
+      stopScroll();
+      delete window.__acCollector;
+    },
+  };
+  window.__acCollector = collector;
+
+  observer.observe(document.body || document.documentElement, { childList: true, subtree: true, characterData: true });
+  scanAll();
+  if (opts.autoScroll) startScroll(opts.intervalMs);
+  return keys.size;
+}
+"""
+
+JS_COLLECTOR_STATUS = r"""
+() => window.__acCollector ? window.__acCollector.status() : null
+"""
+
+# Devolve tudo o que foi coletado (mesmo formato de JS_EXTRACT_COLUMNAR).
+# Com stop=true, desliga o observador e remove o coletor da página.
+JS_COLLECTOR_PULL = r"""
+(stop) => {
+  const c = window.__acCollector;
+  if (!c) return "";
+  c.scanAll();
+  const out = c.pull();
+  if (stop) c.stop();
+  return out;
+}
+"""
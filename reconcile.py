@@ -0,0 +1,274 @@
+"""
+Conciliação offline: capturas unificadas x grid do EMSYS.
+
+Em vez de descobrir as diferenças só ao final da marcação automática, o grid
+do EMSYS pode ser exportado (ou copiado com Ctrl+A / Ctrl+C) como texto
+separado por tabulação e comparado aqui com as capturas, sem tocar no teclado
+nem no mouse.
+
+O casamento é um "hash join" por valor em centavos que respeita repetições:
+cada venda do portal casa com no máximo uma linha do EMSYS de mesmo valor.
+Com tolerância de dias, dentro de cada valor as duas listas são ordenadas por
+data e casadas da mais antiga para a mais recente, aceitando pares cuja
+diferença de datas não passe da tolerância.
+"""
+
+import gc
+import re
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from robo_cartoes_emsys_v3 import BRL_NUM_RE, TITULO_RE, brl_to_cents
+
+# Coluna "R$ Original" no grid copiado (a mesma usada por extract_rs_original_from_row)
+EMSYS_VALUE_COL = 6
+EMSYS_MIN_COLS = 8
+
+_DATE_RE = re.compile(r"\b(\d{2})/(\d{2})/(\d{4})\b")
+
+
+def _cents(bruto: str) -> int:
+    """
+    Centavos de um valor já normalizado ("1.234,50"); outros formatos caem
+    em brl_to_cents.
+    """
+    if len(bruto) > 3 and bruto[-3] == ",":
+        try:
+            return int(bruto.replace(".", "").replace(",", ""))
+        except ValueError:
+            pass
+    return brl_to_cents(bruto)
+
+
+def _day_ordinals(dates: Iterable[str]) -> Dict[str, Optional[int]]:
+    """
+    Dia (ordinal) de cada data distinta "dd/mm/aaaa" (os 10 primeiros
+    caracteres de cada texto). Poucas datas se repetem em milhares de linhas,
+    então a conversão é feita uma vez por data e o resto é consulta ao dict.
+    """
+    out: Dict[str, Optional[int]] = {}
+    for key in set(dates):
+        m = _DATE_RE.match(key)
+        day = None
+        if m:
+            d, mo, y = m.groups()
+            try:
+                day = date(int(y), int(mo), int(d)).toordinal()
+            except ValueError:
+                pass
+        out[key] = day
+    return out
+
+
+def parse_emsys_export(text: str, value_col: int = EMSYS_VALUE_COL, date_col: Optional[int] = None) -> List[Dict]:
+    """
+    Lê o texto do grid do EMSYS (TSV exportado ou colado da área de
+    transferência). Retorna [{bruto, cents, data, titulo, linha}] para cada
+    linha com valor; cabeçalho e linhas vazias são ignorados.
+
+    O valor vem da coluna value_col quando a linha tem as colunas do grid
+    (coluna vazia = linha sem valor, ignorada); senão, do primeiro valor em
+    reais da linha. A data vem de date_col ou,
+    sem ela, da primeira data encontrada na linha.
+    """
+    out: List[Dict] = []
+    cents_of: Dict[str, int] = {}
+    brl_search = BRL_NUM_RE.search
+    date_search = _DATE_RE.search
+    titulo_search = TITULO_RE.search
+    for n, line in enumerate((text or "").replace("\r", "").split("\n"), start=1):
+        parts = line.split("\t")
+        # Linha com as colunas do grid: só vale a coluna de valor (vazia = sem
+        # valor); a busca na linha inteira é só para texto fora do grid.
+        m = brl_search(parts[value_col] if len(parts) >= EMSYS_MIN_COLS else line)
+        if not m:
+            continue
+        bruto = m.group(0)
+        if bruto[-2] == ",":
+            bruto += "0"
+        cents = cents_of.get(bruto)
+        if cents is None:
+            cents = cents_of[bruto] = _cents(bruto)
+
+        data_txt = parts[date_col] if date_col is not None and date_col < len(parts) else line
+        d = date_search(data_txt)
+        t = titulo_search(line)
+        out.append(
+            {
+                "bruto": bruto,
+                "cents": cents,
+                "data": d.group(0) if d else "",
+                "titulo": t.group(0) if t else "",
+                "linha": n,
+            }
+        )
+    return out
+
+
+def read_emsys_export(path: str, **kwargs) -> List[Dict]:
+    """
+    Lê um arquivo exportado do EMSYS (UTF-8, com ou sem BOM, ou cp1252).
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = raw.decode("cp1252", errors="replace")
+    return parse_emsys_export(text, **kwargs)
+
+
+# Chave de ordenação num único inteiro: centavos | dia (ordinal) | posição.
+# Ordenar inteiros é bem mais rápido que ordenar tuplas.
+_DAY_SHIFT = 24
+_CENTS_SHIFT = 44
+_POS_MASK = (1 << _DAY_SHIFT) - 1
+
+
+def _match_by_date(
+    portal: List[Dict],
+    portal_cents: List[int],
+    emsys: List[Dict],
+    tolerance_days: int,
+) -> Tuple[List[Tuple[Dict, Dict]], List[int], List[Dict]]:
+    """
+    Casamento com janela de datas. As duas listas são ordenadas uma única vez
+    por (centavos, dia) e percorridas juntas; para cada linha do EMSYS fica a
+    venda mais antiga do mesmo valor dentro da janela. Linhas sem data casam
+    depois, por valor, com o que sobrar do outro lado.
+
+    Retorna (pares, posições das vendas que sobraram, linhas do EMSYS que sobraram).
+    """
+    p_dates = [(r.get("dt") or "")[:10] for r in portal]
+    days = _day_ordinals(p_dates + [e["data"] for e in emsys])
+
+    p_keys: List[int] = []
+    p_undated: List[int] = []
+    for i, d in enumerate(p_dates):
+        day = days[d]
+        if day is None:
+            p_undated.append(i)
+        else:
+            p_keys.append((portal_cents[i] << _CENTS_SHIFT) | (day << _DAY_SHIFT) | i)
+    e_keys: List[int] = []
+    e_undated: List[Dict] = []
+    for j, e in enumerate(emsys):
+        day = days[e["data"]]
+        if day is None:
+            e_undated.append(e)
+        else:
+            e_keys.append((e["cents"] << _CENTS_SHIFT) | (day << _DAY_SHIFT) | j)
+    p_keys.sort()
+    e_keys.sort()
+
+    matched: List[Tuple[Dict, Dict]] = []
+    leftover: List[int] = []
+    extra: List[Dict] = []
+    day_mask = ~((1 << _DAY_SHIFT) - 1)
+    i = 0
+    n = len(p_keys)
+    for key in e_keys:
+        e_row = emsys[key & _POS_MASK]
+        base = key & day_mask
+        # Vendas de valor menor, ou antigas demais para esta linha, também
+        # não servem para as próximas
+        lower = base - (tolerance_days << _DAY_SHIFT)
+        while i < n and p_keys[i] < lower:
+            leftover.append(p_keys[i] & _POS_MASK)
+            i += 1
+        if i < n and p_keys[i] < base + ((tolerance_days + 1) << _DAY_SHIFT):
+            matched.append((portal[p_keys[i] & _POS_MASK], e_row))
+            i += 1
+        else:
+            extra.append(e_row)
+    leftover.extend(k & _POS_MASK for k in p_keys[i:])
+    leftover.extend(p_undated)
+
+    if e_undated:
+        by_cents: Dict[int, List[int]] = defaultdict(list)
+        for pos in leftover:
+            by_cents[portal_cents[pos]].append(pos)
+        for e in e_undated:
+            bucket = by_cents.get(e["cents"])
+            if bucket:
+                matched.append((portal[bucket.pop()], e))
+            else:
+                extra.append(e)
+        leftover = [pos for bucket in by_cents.values() for pos in bucket]
+    return matched, leftover, extra
+
+
+def reconcile(
+    portal_rows: List[Dict[str, str]],
+    emsys_rows: List[Dict],
+    tolerance_days: Optional[int] = None,
+) -> Dict:
+    """
+    Concilia as capturas ({dt, bruto, ...}) com as linhas do EMSYS
+    (parse_emsys_export). Sem tolerance_days, só o valor importa.
+
+    Retorna:
+    - matched: [(linha_portal, linha_emsys)]
+    - missing: vendas do portal sem linha no EMSYS
+    - extra: linhas do EMSYS sem venda no portal
+    - totais: quantidades e somas (em centavos) de cada grupo
+    """
+    # O casamento cria centenas de milhares de listas e tuplas que vivem até o
+    # fim; com o coletor de lixo ligado, metade do tempo iria em varrê-las.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _reconcile(portal_rows, emsys_rows, tolerance_days)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _reconcile(
+    portal_rows: List[Dict[str, str]],
+    emsys_rows: List[Dict],
+    tolerance_days: Optional[int] = None,
+) -> Dict:
+    cents_of: Dict[str, int] = {}
+    portal_cents: List[int] = []
+    for r in portal_rows:
+        bruto = r.get("bruto", "")
+        cents = cents_of.get(bruto)
+        if cents is None:
+            cents = cents_of[bruto] = _cents(bruto)
+        portal_cents.append(cents)
+
+    if tolerance_days is None:
+        by_cents: Dict[int, List[Dict]] = defaultdict(list)
+        for cents, r in zip(portal_cents, portal_rows):
+            by_cents[cents].append(r)
+        matched: List[Tuple[Dict, Dict]] = []
+        extra: List[Dict] = []
+        for e in emsys_rows:
+            bucket = by_cents.get(e["cents"])
+            if bucket:
+                matched.append((bucket.pop(), e))
+            else:
+                extra.append(e)
+        missing = [r for bucket in by_cents.values() for r in bucket]
+        soma_faltando = sum(cents * len(bucket) for cents, bucket in by_cents.items())
+    else:
+        matched, left, extra = _match_by_date(portal_rows, portal_cents, emsys_rows, max(0, int(tolerance_days)))
+        left.sort()
+        missing = [portal_rows[pos] for pos in left]
+        soma_faltando = sum(portal_cents[pos] for pos in left)
+
+    totais = {
+        "portal": len(portal_rows),
+        "emsys": len(emsys_rows),
+        "conciliadas": len(matched),
+        "faltando": len(missing),
+        "sobrando": len(extra),
+        "soma_portal": sum(portal_cents),
+        "soma_emsys": sum(e["cents"] for e in emsys_rows),
+        "soma_conciliadas": sum(e["cents"] for _, e in matched),
+        "soma_faltando": soma_faltando,
+        "soma_sobrando": sum(e["cents"] for e in extra),
+    }
+    return {"matched": matched, "missing": missing, "extra": extra, "totais": totais}
@@ -29,8 +29,8 @@ import traceback
 from datetime import datetime
 from collections import Counter
 
-import pyautogui
-import pyperclip
+# pyautogui/pyperclip são importados sob demanda (só a marcação no EMSYS usa,
+# e pyautogui exige uma tela disponível já no import).
 
 # =====================
 # CONFIG
@@ -42,8 +42,6 @@ VALE_DESP_FILE = "valecard_despesas.json"
 
 GOODCARD_FALLBACK_URL = "about:blank"
 
-pyautogui.FAILSAFE = True
-
 BRL_NUM_RE = re.compile(r"\d{1,3}(?:\.\d{3})*,\d{1,2}")
 BRL_SIGNED_RE = re.compile(r"-?\d{1,3}(?:\.\d{3})*,\d{1,2}")
 TITULO_RE = re.compile(r"\b\d+/\d+\b")
@@ -82,6 +80,17 @@ def brl_to_float_signed(s: str) -> float:
         num += "0"
     return float(num.replace(".", "").replace(",", "."))
 
+def brl_to_cents(s: str) -> int:
+    s = (s or "").strip().replace("R$", "").strip()
+    m = BRL_SIGNED_RE.search(s)
+    if not m:
+        return 0
+    num = m.group(0)
+    neg = num.startswith("-")
+    inteiro, _, frac = num.lstrip("-").partition(",")
+    cents = int(inteiro.replace(".", "")) * 100 + int(frac.ljust(2, "0"))
+    return -cents if neg else cents
+
 def float_to_brl(v: float) -> str:
     s = f"{v:,.2f}"
     s = s.replace(",", "X").replace(".", ",").replace("X", ".")
@@ -177,17 +186,24 @@ def read_all_captures():
 # =====================
 # EMSYS helpers
 # =====================
+def get_pyautogui():
+    import pyautogui
+    pyautogui.FAILSAFE = True
+    return pyautogui
+
 def capture_point(name):
     print(f"\n👉 Posicione o mouse em: {name}")
     input("   Quando estiver em cima, pressione ENTER aqui...")
-    x, y = pyautogui.position()
+    x, y = get_pyautogui().position()
     print(f"   OK: {name} = ({x}, {y})")
     return {"x": x, "y": y}
 
 def click(p):
-    pyautogui.click(p["x"], p["y"])
+    get_pyautogui().click(p["x"], p["y"])
 
 def copy_current_row_text() -> str:
+    import pyperclip
+    pyautogui = get_pyautogui()
     pyperclip.copy("")
     pyautogui.hotkey("ctrl", "c")
     time.sleep(0.15)
@@ -259,6 +275,8 @@ def run_emsys_marking(unified_rows):
     print("FAILSAFE: mova o mouse pro canto superior esquerdo para parar.\n")
     time.sleep(1.0)
 
+    pyautogui = get_pyautogui()
+
     click(cfg["grid_cell"])
     time.sleep(0.2)
 
@@ -0,0 +1,197 @@
+"""
+Abertura rápida da janela: importação sob demanda e perfil de inicialização.
+
+lazy_import() devolve o módulo sem executá-lo; o código roda no primeiro
+acesso a um atributo. Assim Playwright/CDP, leitura de PDFs e a automação do
+EMSYS só custam quando são usados, e não antes da janela aparecer.
+
+O perfil de inicialização (variável de ambiente AUTOMACAO_PERFIL_INICIO=1
+ou argumento --perfil-inicio) mede cada importação, como o "-X importtime",
+mas soma os tempos por subsistema: um módulo da biblioteca padrão entra na
+conta de quem o importou (asyncio puxado pelo cdp_session conta como Good
+Card / CDP). Ao desenhar a primeira janela, grava o relatório em
+logs/perfil_inicio.txt e o imprime no stderr.
+"""
+
+import builtins
+import importlib
+import importlib.util
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+PROFILE_ENV = "AUTOMACAO_PERFIL_INICIO"
+PROFILE_FLAG = "--perfil-inicio"
+PROFILE_FILE = os.path.join("logs", "perfil_inicio.txt")
+
+OTHER = "Python / outros"
+
+# Primeiro nome do módulo -> subsistema
+SUBSYSTEMS: Dict[str, str] = {}
+for _name, _mods in (
+    ("Interface (Tk)", "tkinter _tkinter ttkbootstrap PIL ui_components unified_index"),
+    ("Good Card / CDP", "cdp_client cdp_session goodcard_json portal_js html_importer playwright greenlet"),
+    ("PDF", "pdf_parsers statement_registry expense_classifier pdfplumber pdfminer pypdfium2"),
+    ("EMSYS", "robo_cartoes_emsys_v3 reconcile pyautogui pyperclip pyscreeze pymsgbox pytweening mouseinfo"),
+    ("Núcleo", "core storage config_service task_executor worker_host startup"),
+):
+    for _mod in _mods.split():
+        SUBSYSTEMS[_mod] = _name
+
+
+def lazy_import(name: str):
+    """
+    Módulo carregado só no primeiro uso (importlib.util.LazyLoader). Se já
+    estiver importado, ou se o carregador não permitir, importa na hora.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        spec = None
+    if spec is None or spec.loader is None or not hasattr(spec.loader, "exec_module"):
+        return importlib.import_module(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class StartupProfiler:
+    """
+    Envolve builtins.__import__ enquanto a janela abre. Cada importação
+    registra o tempo próprio (descontando as importações internas) no
+    subsistema do módulo ou, se ele não for de nenhum, no de quem o importou.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.marks: List[Tuple[str, float]] = []
+        self.by_subsystem: Dict[str, float] = {}
+        self.by_module: Dict[str, float] = {}
+        self.module_count: Dict[str, int] = {}
+        # Pilha: [subsistema, tempo e módulos das importações internas]
+        self._stack: List[list] = []
+        self._orig_import = None
+
+    def install(self):
+        if self._orig_import is None:
+            self._orig_import = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._orig_import is not None:
+            builtins.__import__ = self._orig_import
+            self._orig_import = None
+
+    def mark(self, label: str):
+        self.marks.append((label, time.perf_counter()))
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        orig = self._orig_import
+        if not level and not fromlist and name in sys.modules:
+            return orig(name, globals, locals, fromlist, level)
+
+        full = name
+        if level and globals:
+            # Importação relativa: nome completo a partir do pacote de quem importa
+            package = globals.get("__package__") or ""
+            full = f"{package}.{name}" if name else package
+        top = full.partition(".")[0]
+        subsystem = SUBSYSTEMS.get(top) or (self._stack[-1][0] if self._stack else OTHER)
+
+        before = len(sys.modules)
+        frame = [subsystem, 0.0, 0]
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            return orig(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            loaded = len(sys.modules) - before
+            # Sem módulo novo, o (pouco) tempo fica na conta de quem chamou
+            if loaded > 0:
+                own = elapsed - frame[1]
+                self.by_subsystem[subsystem] = self.by_subsystem.get(subsystem, 0.0) + own
+                self.module_count[subsystem] = self.module_count.get(subsystem, 0) + loaded - frame[2]
+                self.by_module[full] = self.by_module.get(full, 0.0) + own
+                if self._stack:
+                    self._stack[-1][1] += elapsed
+                    self._stack[-1][2] += loaded
+
+    def report(self, top_modules: int = 15) -> str:
+        end = self.marks[-1][1] if self.marks else time.perf_counter()
+        lines = [
+            "Perfil de inicialização",
+            f"Tempo até a primeira janela: {(end - self.t0) * 1000:.0f} ms",
+            "",
+            "Etapas (ms desde o início / duração):",
+        ]
+        prev = self.t0
+        for label, t in self.marks:
+            lines.append(f"  {label:<32} {(t - self.t0) * 1000:>7.0f} {(t - prev) * 1000:>7.0f}")
+            prev = t
+
+        total_imports = sum(self.by_subsystem.values())
+        lines += ["", f"Importações por subsistema (total {total_imports * 1000:.0f} ms):"]
+        for subsystem, secs in sorted(self.by_subsystem.items(), key=lambda kv: -kv[1]):
+            lines.append(
+                f"  {subsystem:<32} {secs * 1000:>7.0f} ms  ({self.module_count.get(subsystem, 0)} módulo(s))"
+            )
+
+        lines += ["", f"Importações mais lentas (tempo próprio, top {top_modules}):"]
+        for module, secs in sorted(self.by_module.items(), key=lambda kv: -kv[1])[:top_modules]:
+            lines.append(f"  {module:<32} {secs * 1000:>7.1f} ms")
+        return "\n".join(lines) + "\n"
+
+    def finish(self, path: str = PROFILE_FILE) -> str:
+        """
+        Para de medir e grava o relatório (o texto também vai para o stderr).
+        """
+        self.uninstall()
+        text = self.report()
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        except Exception:
+            pass
+        try:
+            sys.stderr.write(text)
+        except Exception:
+            pass
+        return text
+
+
+_profiler: Optional[StartupProfiler] = None
+
+
+def profiling_requested(argv: Optional[List[str]] = None) -> bool:
+    argv = sys.argv if argv is None else argv
+    return PROFILE_FLAG in argv or os.environ.get(PROFILE_ENV, "").strip() not in ("", "0")
+
+
+def install_profiler_if_requested(argv: Optional[List[str]] = None) -> Optional[StartupProfiler]:
+    global _profiler
+    if _profiler is None and profiling_requested(argv):
+        _profiler = StartupProfiler()
+        _profiler.install()
+    return _profiler
+
+
+def get_profiler() -> Optional[StartupProfiler]:
+    return _profiler
+
+
+def mark(label: str):
+    """
+    Marca uma etapa da abertura (sem efeito se o perfil estiver desligado).
+    """
+    if _profiler is not None:
+        _profiler.mark(label)
@@ -0,0 +1,126 @@
+"""
+Registro de parsers de extratos em PDF.
+
+Cada parser declara uma "impressão digital" barata, calculada sobre o texto
+da primeira página, e uma função de parse. Ao importar um PDF, o arquivo é
+aberto uma única vez, a primeira página decide o parser e somente ele roda.
+
+Novas operadoras podem ser adicionadas como plug-ins: basta colocar um .py na
+pasta PLUGINS_DIR chamando register_statement_parser().
+"""
+
+import importlib.util
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+PLUGINS_DIR = "parsers_plugins"
+
+# fingerprint(texto_primeira_pagina) -> pontuação (0 = não reconhece)
+FingerprintFn = Callable[[str], int]
+# parse(pdf_aberto, caminho_pdf) -> {"rows": [...], ...extras}
+ParseFn = Callable[[Any, str], Dict[str, Any]]
+
+
+class StatementParser:
+    def __init__(self, name: str, origem: str, fingerprint: FingerprintFn, parse: ParseFn):
+        self.name = name
+        self.origem = origem
+        self.fingerprint = fingerprint
+        self.parse = parse
+
+    def __repr__(self) -> str:
+        return f"StatementParser({self.name!r}, origem={self.origem!r})"
+
+
+_REGISTRY: Dict[str, StatementParser] = {}
+_plugins_loaded = False
+
+
+def register_statement_parser(name: str, origem: str, fingerprint: FingerprintFn, parse: ParseFn) -> StatementParser:
+    """
+    Registra (ou substitui) um parser de extrato.
+    origem é o rótulo gravado nos arquivos de captura (ex.: "ValeCard").
+    """
+    parser = StatementParser(name, origem, fingerprint, parse)
+    _REGISTRY[name] = parser
+    return parser
+
+
+def registered_parsers() -> List[StatementParser]:
+    return list(_REGISTRY.values())
+
+
+def get_parser(name: str) -> Optional[StatementParser]:
+    return _REGISTRY.get(name)
+
+
+def load_plugins(base_dir: str) -> List[str]:
+    """
+    Importa os arquivos .py de base_dir/PLUGINS_DIR (uma vez por processo).
+    Retorna a lista de erros de carregamento, para exibição ao usuário.
+    """
+    global _plugins_loaded
+    if _plugins_loaded:
+        return []
+    _plugins_loaded = True
+
+    errors: List[str] = []
+    plugins_dir = os.path.join(base_dir, PLUGINS_DIR)
+    if not os.path.isdir(plugins_dir):
+        return errors
+
+    for fn in sorted(os.listdir(plugins_dir)):
+        if not fn.endswith(".py") or fn.startswith("_"):
+            continue
+        path = os.path.join(plugins_dir, fn)
+        mod_name = f"{PLUGINS_DIR}.{fn[:-3]}"
+        try:
+            spec = importlib.util.spec_from_file_location(mod_name, path)
+            module = importlib.util.module_from_spec(spec)  # type: ignore[arg-type]
+            spec.loader.exec_module(module)  # type: ignore[union-attr]
+        except Exception as e:
+            errors.append(f"{fn}: {e}")
+    return errors
+
+
+def detect_statement(first_page_text: str) -> Optional[StatementParser]:
+    """
+    Escolhe o parser com maior pontuação para o texto da primeira página.
+    """
+    best: Optional[StatementParser] = None
+    best_score = 0
+    for parser in _REGISTRY.values():
+        try:
+            score = int(parser.fingerprint(first_page_text) or 0)
+        except Exception:
+            continue
+        if score > best_score:
+            best, best_score = parser, score
+    return best
+
+
+def parse_statement_pdf(pdf_path: str) -> Dict[str, Any]:
+    """
+    Abre o PDF uma vez, detecta o tipo de extrato e roda o parser escolhido.
+    Retorna {"tipo", "origem", "rows", ...extras do parser}.
+    Lança RuntimeError se nenhum parser reconhecer o arquivo.
+    """
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        if not pdf.pages:
+            raise RuntimeError("PDF sem páginas.")
+        first_text = pdf.pages[0].extract_text() or ""
+        if not first_text.strip():
+            raise RuntimeError("Esse PDF parece ser escaneado (imagem). Não dá pra ler sem OCR.")
+
+        parser = detect_statement(first_text)
+        if parser is None:
+            raise RuntimeError("Tipo de extrato não reconhecido.")
+
+        result = dict(parser.parse(pdf, pdf_path) or {})
+
+    result.setdefault("rows", [])
+    result["tipo"] = parser.name
+    result["origem"] = parser.origem
+    return result
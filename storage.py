@@ -1,12 +1,15 @@
-import json
 import os
 from typing import Any, Dict
 
+import config_service
+
 
 SETTINGS_FILE = "app_settings.json"
 
 _DEFAULT_SETTINGS: Dict[str, Any] = {
     "goodcard_fallback_url": "",
+    # "cdp": cliente CDP embutido (rápido, sem Playwright); "playwright": backend completo
+    "goodcard_backend": "cdp",
 }
 
 
@@ -21,33 +24,40 @@ def _get_settings_path() -> str:
 
 def load_settings() -> Dict[str, Any]:
     """
-    Lê o arquivo de configurações da aplicação.
-    Se não existir, retorna um dicionário com valores padrão.
+    Configurações da aplicação (valores padrão completados), lidas pelo
+    config_service: sem reler o disco enquanto o arquivo não mudar.
+    Se o arquivo não existir ou estiver inválido, retorna os valores padrão;
+    o erro fica em config_service.errors() para a interface avisar.
     """
-    path = _get_settings_path()
-    if not os.path.exists(path):
-        return dict(_DEFAULT_SETTINGS)
-
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception:
-        return dict(_DEFAULT_SETTINGS)
+        data = config_service.read_json(_get_settings_path(), {})
+    except config_service.ConfigError:
+        data = {}
 
     out = dict(_DEFAULT_SETTINGS)
-    out.update(data or {})
+    if isinstance(data, dict):
+        out.update(data)
     return out
 
 
 def save_settings(data: Dict[str, Any]) -> None:
     """
-    Salva o dicionário de configurações em disco.
+    Salva o dicionário de configurações em disco (gravação atômica).
+    Levanta config_service.ConfigError se não conseguir gravar.
     """
-    path = _get_settings_path()
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except Exception:
-        # Não quebrar a aplicação se não conseguir salvar; apenas falhar silenciosamente.
-        pass
+    config_service.write_json(_get_settings_path(), data)
+
+
+def update_settings(**changes: Any) -> Dict[str, Any]:
+    """
+    Altera só as chaves informadas, mantendo as demais configurações do
+    arquivo. Retorna as configurações gravadas.
+    """
+
+    def apply(current):
+        out = current if isinstance(current, dict) else {}
+        out.update(changes)
+        return out
 
+    config_service.update_json(_get_settings_path(), apply, {})
+    return load_settings()
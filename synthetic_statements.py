@@ -0,0 +1,248 @@
+"""
+Gerador de extratos sintéticos (Vale Card e Rede Frota) em PDF.
+
+Os PDFs seguem os layouts que os parsers esperam (mesmas colunas e formatos
+de linha das regex) e são escritos com um gerador de PDF mínimo, só com a
+biblioteca padrão, para rodar offline em qualquer máquina. A tabela do Vale
+Card é desenhada com linhas de grade, como nos extratos reais, para que
+extract_tables() encontre (e pague o custo de) uma tabela em cada página.
+
+Uso:
+    python synthetic_statements.py --tipo valecard --paginas 100 --saida extrato.pdf
+"""
+
+import argparse
+import random
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from robo_cartoes_emsys_v3 import float_to_brl
+
+PAGE_W = 595  # A4 em pontos
+PAGE_H = 842
+FONT_SIZE = 8
+LINE_H = 12
+TOP_Y = PAGE_H - 60
+BOTTOM_Y = 50
+
+VALECARD_COLS = (("Data", 40), ("Tipo", 110), ("Código", 150), ("Descrição", 230), ("Valor", 480))
+REDEFROTA_COLS = (("Transação", 40), ("Descrição", 110), ("Data", 240), ("Hora", 310), ("Valor", 380))
+
+VALECARD_DESPESAS = ("TAXA ADMINISTRATIVA", "TARIFA DE ANTECIPACAO", "MENSALIDADE", "ENCARGOS")
+
+# (texto, x, y) de uma página
+PageItems = List[Tuple[str, float, float]]
+# Segmentos de reta (x0, y0, x1, y1) de uma página
+PageRules = List[Tuple[float, float, float, float]]
+
+
+# =====================
+# Escrita de PDF mínima
+# =====================
+def _pdf_str(text: str) -> bytes:
+    raw = text.encode("cp1252", errors="replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _page_stream(items: PageItems, rules: PageRules = ()) -> bytes:
+    parts = []
+    if rules:
+        parts.append(b"0.5 w")
+        for x0, y0, x1, y1 in rules:
+            parts.append(f"{x0:.2f} {y0:.2f} m {x1:.2f} {y1:.2f} l S".encode())
+    parts += [b"BT", f"/F1 {FONT_SIZE} Tf".encode()]
+    for text, x, y in items:
+        parts.append(f"1 0 0 1 {x:.2f} {y:.2f} Tm ".encode() + _pdf_str(text) + b" Tj")
+    parts.append(b"ET")
+    return b"\n".join(parts)
+
+
+def write_pdf(path: str, pages: List[PageItems], rules: Optional[List[PageRules]] = None) -> None:
+    """
+    Grava um PDF com uma fonte Helvetica e um conteúdo de texto por página.
+    rules traz, por página, os segmentos de reta a desenhar (grade de tabela).
+    """
+    # 1: Catalog, 2: Pages, 3: Font, depois pares (Page, Contents)
+    objects: List[bytes] = [b"", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    kids = []
+    for idx, items in enumerate(pages):
+        stream = zlib.compress(_page_stream(items, rules[idx] if rules else ()))
+        page_num = len(objects) + 1
+        kids.append(f"{page_num} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_W} {PAGE_H}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_num + 1} 0 R >>".encode()
+        )
+        objects.append(
+            f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{num} 0 obj\n".encode() + body + b"\nendobj\n"
+
+    xref_pos = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for off in offsets:
+        out += f"{off:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_pos}\n%%EOF\n".encode()
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+# =====================
+# Layouts
+# =====================
+def _brl(cents: int) -> str:
+    return float_to_brl(cents / 100.0)
+
+
+def _paginate(lines_per_page: int, total_pages: int, make_line, header_items) -> List[PageItems]:
+    pages: List[PageItems] = []
+    for page_idx in range(total_pages):
+        items: PageItems = list(header_items(page_idx))
+        y = TOP_Y - 3 * LINE_H
+        for _ in range(lines_per_page):
+            items.extend((text, x, y) for text, x in make_line(page_idx))
+            y -= LINE_H
+        pages.append(items)
+    return pages
+
+
+def _table_grid(col_xs: Sequence[float], right: float, top_y: float, rows: int) -> PageRules:
+    """
+    Grade de uma tabela: uma faixa por linha, a partir da linha de baseline
+    top_y (o cabeçalho), descendo LINE_H por linha; colunas começando em col_xs.
+    """
+    edges = [top_y + LINE_H - 3 - LINE_H * i for i in range(rows + 1)]
+    xs = [x - 4 for x in col_xs] + [right]
+    grid: PageRules = [(xs[0], y, right, y) for y in edges]
+    grid += [(x, edges[-1], x, edges[0]) for x in xs]
+    return grid
+
+
+def generate_valecard(path: str, pages: int, seed: int = 1) -> Dict[str, int]:
+    """
+    Gera um extrato Vale Card com cabeçalho repetido em cada página, vendas (V),
+    estornos (T) e despesas negativas, numa tabela com grade. A descrição das
+    vendas traz a data/hora da compra (o que o parser de texto do core lê).
+    Retorna os totais esperados.
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    lines_per_page = (TOP_Y - 3 * LINE_H - BOTTOM_Y) // LINE_H
+    expected = {
+        "paginas": pages,
+        "vendas": 0,
+        "vendas_centavos": 0,
+        "despesas_centavos": 0,
+        "taxa_adm_centavos": 0,
+    }
+    seq = [0]
+
+    def header(page_idx: int):
+        yield ("VALE CARD - Extrato de Transações", 40, TOP_Y)
+        yield (f"Página {page_idx + 1} de {pages}", 480, TOP_Y)
+        for label, x in VALECARD_COLS:
+            yield (label, x, TOP_Y - 2 * LINE_H)
+
+    def line(page_idx: int):
+        seq[0] += 1
+        quando = start + timedelta(minutes=17 * seq[0])
+        data = quando.strftime("%d/%m/%Y")
+        sorteio = rng.random()
+        if sorteio < 0.85:
+            cents = rng.randint(500, 250000)
+            expected["vendas"] += 1
+            expected["vendas_centavos"] += cents
+            desc = f"COMPRA POSTO {quando.strftime('%d/%m/%Y %H:%M')}"
+            return [(data, 40), ("V", 112), (f"{100000 + seq[0]}", 150), (desc, 230), (_brl(cents), 480)]
+        if sorteio < 0.90:
+            cents = rng.randint(500, 50000)
+            return [(data, 40), ("T", 112), (f"{100000 + seq[0]}", 150), ("ESTORNO", 230), (_brl(cents), 480)]
+        cents = rng.randint(100, 5000)
+        desc = rng.choice(VALECARD_DESPESAS)
+        expected["despesas_centavos"] += cents
+        if desc == "TAXA ADMINISTRATIVA":
+            expected["taxa_adm_centavos"] += cents
+        return [(data, 40), ("D", 112), (f"{100000 + seq[0]}", 150), (desc, 230), ("-" + _brl(cents), 480)]
+
+    page_items = _paginate(lines_per_page, pages, line, header)
+    page_items[-1].append(("TOTAL GERAL", 230, BOTTOM_Y - LINE_H))
+    page_items[-1].append(("-" + _brl(expected["despesas_centavos"]), 480, BOTTOM_Y - LINE_H))
+    grid = _table_grid([x for _, x in VALECARD_COLS], PAGE_W - 35, TOP_Y - 2 * LINE_H, lines_per_page + 1)
+    write_pdf(path, page_items, [grid] * pages)
+    return expected
+
+
+def generate_redefrota(path: str, pages: int, seed: int = 1) -> Dict[str, int]:
+    """
+    Gera um extrato Rede Frota: preâmbulo, cabeçalho RESUMO na primeira página
+    e transações seguindo pelas páginas seguintes até a linha de TOTAL.
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, 6, 0, 0)
+    lines_per_page = (TOP_Y - 3 * LINE_H - BOTTOM_Y) // LINE_H
+    expected = {"paginas": pages, "transacoes": 0, "total_centavos": 0}
+    seq = [0]
+
+    def header(page_idx: int):
+        yield ("REDE FROTA - Extrato do Estabelecimento", 40, TOP_Y)
+        yield (f"Página {page_idx + 1} de {pages}", 480, TOP_Y)
+        if page_idx == 0:
+            yield ("Estabelecimento: POSTO SINTETICO LTDA", 40, TOP_Y - LINE_H)
+            yield ("RESUMO", 40, TOP_Y - 2 * LINE_H)
+        else:
+            for label, x in REDEFROTA_COLS:
+                yield (label, x, TOP_Y - 2 * LINE_H)
+
+    def line(page_idx: int):
+        seq[0] += 1
+        quando = start + timedelta(minutes=7 * seq[0], seconds=seq[0] % 60)
+        cents = rng.randint(1000, 90000)
+        expected["transacoes"] += 1
+        expected["total_centavos"] += cents
+        return [
+            (f"{900000 + seq[0]}", 40),
+            ("ABASTECIMENTO", 110),
+            (quando.strftime("%d/%m/%Y"), 240),
+            (quando.strftime("%H:%M:%S"), 310),
+            (_brl(cents), 380),
+        ]
+
+    page_items = _paginate(lines_per_page, pages, line, header)
+    page_items[-1].append(("TOTAL", 40, BOTTOM_Y - LINE_H))
+    page_items[-1].append((_brl(expected["total_centavos"]), 380, BOTTOM_Y - LINE_H))
+    write_pdf(path, page_items)
+    return expected
+
+
+GENERATORS = {
+    "valecard": generate_valecard,
+    "redefrota": generate_redefrota,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera extratos sintéticos em PDF para testes de desempenho.")
+    parser.add_argument("--tipo", choices=sorted(GENERATORS), required=True)
+    parser.add_argument("--paginas", type=int, default=10, help="1 a 1000 páginas")
+    parser.add_argument("--saida", required=True, help="Caminho do PDF a gerar")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if not 1 <= args.paginas <= 1000:
+        parser.error("--paginas deve estar entre 1 e 1000")
+
+    expected = GENERATORS[args.tipo](args.saida, args.paginas, seed=args.seed)
+    print(f"{args.saida}: {expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Executor de tarefas da GUI: número fixo de threads, uma tarefa por tipo e
+cancelamento cooperativo.
+
+Cada clique vira uma tarefa (Job) com um "tipo" (ex.: "unificar") e,
+quando a ação tem entrada, uma chave (ex.: o caminho do PDF). Enquanto
+houver uma tarefa do mesmo tipo e mesma chave na fila ou rodando, um novo
+pedido é juntado a ela em vez de rodar o mesmo trabalho duas vezes; com
+outra chave (outro arquivo, outra aba) vira uma tarefa nova. Toda tarefa tem um
+CancelToken; quem roda trabalho longo consulta o token (is_set/wait) e
+encerra sozinho quando ele é acionado.
+"""
+
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+FILA = "na fila"
+RODANDO = "rodando"
+CONCLUIDA = "concluída"
+CANCELADA = "cancelada"
+ERRO = "erro"
+
+
+class Cancelled(BaseException):
+    """
+    Levantada por quem espera trabalho de uma tarefa cancelada (ex.:
+    worker_host.call). Deriva de BaseException para atravessar os
+    "except Exception" das ações e encerrar a tarefa como cancelada.
+    """
+
+
+class CancelToken(threading.Event):
+    """
+    Event com nomes de cancelamento. Pode ser passado onde o código espera
+    um threading.Event (ex.: cancel_event da marcação do EMSYS).
+    """
+
+    def cancel(self):
+        self.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.is_set()
+
+
+class Job:
+    def __init__(
+        self, job_id: int, kind: str, label: str, fn: Callable, args: tuple, kwargs: Dict[str, Any], key: str = ""
+    ):
+        self.id = job_id
+        self.kind = kind
+        self.key = key
+        self.label = label or kind
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.token = CancelToken()
+        self.state = FILA
+        self.error = ""
+        self.created = time.monotonic()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        # Pedidos repetidos juntados a esta tarefa
+        self.merged = 0
+
+    def elapsed(self) -> float:
+        if self.started is None:
+            return (self.finished or time.monotonic()) - self.created
+        return (self.finished or time.monotonic()) - self.started
+
+    def __repr__(self) -> str:
+        return f"Job({self.id}, {self.kind!r}, {self.state!r})"
+
+
+_current = threading.local()
+
+
+def current_job() -> Optional[Job]:
+    """
+    Tarefa em execução na thread atual (None fora do executor).
+    """
+    return getattr(_current, "job", None)
+
+
+class TaskExecutor:
+    """
+    Pool fixo de threads (daemon) com fila única. on_change é chamado, da
+    thread que mudou o estado, sempre que uma tarefa entra, começa ou termina.
+    """
+
+    def __init__(self, max_workers: int = 4, on_change: Optional[Callable[[], None]] = None, history: int = 20):
+        self.max_workers = max_workers
+        self.on_change = on_change
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._active: Dict[int, Job] = {}
+        self._history: Deque[Job] = deque(maxlen=history)
+        self._threads: List[threading.Thread] = []
+        for i in range(max_workers):
+            t = threading.Thread(target=self._worker_loop, name=f"tarefa-{i + 1}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _notify(self):
+        if self.on_change is not None:
+            try:
+                self.on_change()
+            except Exception:
+                pass
+
+    def find(self, kind: str) -> Optional[Job]:
+        """
+        Tarefa ativa (na fila ou rodando, não cancelada) do tipo indicado.
+        """
+        with self._lock:
+            for job in self._active.values():
+                if job.kind == kind and not job.token.is_set():
+                    return job
+        return None
+
+    def submit(self, kind: str, fn: Callable, *args, label: str = "", key: str = "", **kwargs) -> Job:
+        """
+        Enfileira fn(*args, **kwargs). Se já houver tarefa ativa do mesmo
+        tipo e da mesma chave (key: a entrada da ação, ex.: caminho do
+        arquivo ou URL da aba), nada é enfileirado: o pedido é contado em
+        job.merged e a tarefa existente é devolvida.
+        """
+        with self._lock:
+            for job in self._active.values():
+                if job.kind == kind and job.key == key and not job.token.is_set():
+                    job.merged += 1
+                    return job
+            job = Job(next(self._ids), kind, label, fn, args, kwargs, key)
+            self._active[job.id] = job
+        self._queue.put(job)
+        self._notify()
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        Aciona o token da tarefa. Na fila, ela nem chega a rodar; rodando,
+        para quando o código dela consultar o token.
+        """
+        with self._lock:
+            job = self._active.get(job_id)
+        if job is None:
+            return False
+        job.token.cancel()
+        self._notify()
+        return True
+
+    def cancel_all(self):
+        with self._lock:
+            jobs = list(self._active.values())
+        for job in jobs:
+            job.token.cancel()
+        self._notify()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Tarefas rodando, na fila e as últimas terminadas, para exibição.
+        """
+        with self._lock:
+            jobs = list(self._active.values()) + list(reversed(self._history))
+        out = []
+        for job in jobs:
+            state = job.state
+            if state in (FILA, RODANDO) and job.token.is_set():
+                state = f"{state} (cancelando)"
+            out.append(
+                {
+                    "id": job.id,
+                    "tipo": job.kind,
+                    "tarefa": job.label,
+                    "estado": state,
+                    "tempo": job.elapsed(),
+                    "ativa": job.finished is None,
+                    "erro": job.error,
+                }
+            )
+        return out
+
+    def shutdown(self):
+        self.cancel_all()
+        for _ in self._threads:
+            self._queue.put(None)
+
+    def _finish(self, job: Job, state: str):
+        job.state = state
+        job.finished = time.monotonic()
+        with self._lock:
+            self._active.pop(job.id, None)
+            self._history.append(job)
+        self._notify()
+
+    def _worker_loop(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if job.token.is_set():
+                self._finish(job, CANCELADA)
+                continue
+
+            job.state = RODANDO
+            job.started = time.monotonic()
+            self._notify()
+            _current.job = job
+            try:
+                job.fn(*job.args, **job.kwargs)
+            except Cancelled:
+                self._finish(job, CANCELADA)
+                continue
+            except Exception as e:
+                job.error = str(e)
+                self._finish(job, ERRO)
+                continue
+            finally:
+                _current.job = None
+            self._finish(job, CANCELADA if job.token.is_set() else CONCLUIDA)
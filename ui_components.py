@@ -1,6 +1,15 @@
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
 import tkinter as tk
+from collections import deque
 from tkinter import ttk
-from typing import Tuple
+from tkinter.scrolledtext import ScrolledText
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
 
 
 def create_card(
@@ -66,3 +75,412 @@ def setup_styles(root: tk.Misc):
         foreground="#006400",
     )
 
+
+# Funde um evento pendente (antigo) com o que acabou de chegar (novo)
+MergeFn = Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+
+
+class UIEventPump:
+    """
+    Fila de eventos threads -> Tk, com a mesma interface put() de queue.Queue.
+
+    Em vez de a UI consultar a fila de tempos em tempos, o put() acorda o loop
+    do Tk com um evento virtual. Cada rodada processa eventos até estourar
+    budget_ms e deixa o restante para a rodada seguinte, dando tempo ao Tk
+    para redesenhar a janela e atender cliques entre uma rodada e outra.
+
+    Eventos "coalescíveis" (ex.: progresso) que chegam logo atrás de outro do
+    mesmo tipo, ainda não processado, são fundidos nele: a UI só desenha o
+    estado mais recente e a ordem em relação aos demais eventos se mantém.
+    A chave de um evento é o "action" para eventos "ui" e o "type" para os
+    demais.
+    """
+
+    WAKE_EVENT = "<<UIEventPump>>"
+
+    def __init__(
+        self,
+        root: tk.Misc,
+        handler: Callable[[Dict[str, Any]], None],
+        budget_ms: float = 15.0,
+        coalesce: Optional[Dict[str, Optional[MergeFn]]] = None,
+        safety_poll_ms: int = 500,
+    ):
+        self.root = root
+        self.handler = handler
+        self.budget_s = budget_ms / 1000.0
+        # chave -> função de fusão (None = o mais novo substitui o antigo)
+        self.coalesce = dict(coalesce or {})
+        self.safety_poll_ms = safety_poll_ms
+
+        self._lock = threading.Lock()
+        # Eventos comuns (dict) ou células [chave, evento] dos coalescíveis
+        self._items: Deque[Any] = deque()
+        self._wake_sent = False
+        self._drain_scheduled = False
+
+        root.bind(self.WAKE_EVENT, self._on_wake, add="+")
+        # Rede de segurança: se um despertar se perder, a fila não fica parada
+        root.after(self.safety_poll_ms, self._safety_poll)
+
+    @staticmethod
+    def _key(ev: Dict[str, Any]) -> str:
+        return str(ev.get("action") if ev.get("type") == "ui" else ev.get("type"))
+
+    def put(self, ev: Dict[str, Any], block: bool = True, timeout: Optional[float] = None):
+        key = self._key(ev)
+        with self._lock:
+            if key in self.coalesce:
+                last = self._items[-1] if self._items else None
+                if isinstance(last, list) and last[0] == key:
+                    merge = self.coalesce[key]
+                    last[1] = merge(last[1], ev) if merge else ev
+                else:
+                    self._items.append([key, ev])
+            else:
+                self._items.append(ev)
+            if self._wake_sent:
+                return
+            self._wake_sent = True
+        self._wake()
+
+    put_nowait = put
+
+    def qsize(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def _wake(self):
+        try:
+            self.root.event_generate(self.WAKE_EVENT, when="tail")
+        except Exception:
+            # Tcl sem suporte a threads ou janela já destruída: fica a rede de segurança
+            with self._lock:
+                self._wake_sent = False
+
+    def _on_wake(self, _event=None):
+        self._schedule_drain(0)
+
+    def _schedule_drain(self, delay_ms: int):
+        if self._drain_scheduled:
+            return
+        self._drain_scheduled = True
+        self.root.after(delay_ms, self._drain)
+
+    def _safety_poll(self):
+        if not self.empty():
+            self._schedule_drain(0)
+        try:
+            self.root.after(self.safety_poll_ms, self._safety_poll)
+        except tk.TclError:
+            pass
+
+    def _pop(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if not self._items:
+                # Daqui em diante um novo put() precisa acordar a UI de novo
+                self._wake_sent = False
+                return None
+            item = self._items.popleft()
+            return item[1] if isinstance(item, list) else item
+
+    def _drain(self):
+        self._drain_scheduled = False
+        deadline = time.perf_counter() + self.budget_s
+        while True:
+            ev = self._pop()
+            if ev is None:
+                return
+            try:
+                self.handler(ev)
+            except Exception:
+                # Um evento com problema não pode travar os seguintes
+                self.root.report_callback_exception(*sys.exc_info())
+            if time.perf_counter() >= deadline:
+                break
+        # Sobrou trabalho: continua na próxima rodada, depois de o Tk respirar
+        self._schedule_drain(1)
+
+
+class LogView(ScrolledText):
+    """
+    Log rolável que mostra só as últimas max_lines linhas.
+
+    append() não mexe no widget: as linhas se acumulam e entram de uma vez só
+    na próxima rodada do Tk (um insert, um delete do excesso no topo e um
+    see). O log completo vai para um arquivo rotativo, gravado por uma thread
+    própria (QueueHandler + QueueListener), sem custo de disco na UI.
+    """
+
+    def __init__(
+        self,
+        master,
+        max_lines: int = 2000,
+        log_file: Optional[str] = None,
+        max_bytes: int = 2 * 1024 * 1024,
+        backup_count: int = 5,
+        flush_ms: int = 50,
+        **kwargs,
+    ):
+        kwargs.setdefault("state", "disabled")
+        super().__init__(master, **kwargs)
+        self.max_lines = max_lines
+        self.flush_ms = flush_ms
+        self._pending: Deque[str] = deque(maxlen=max_lines)
+        self._flush_scheduled = False
+        self._lines = 0
+
+        self._logger: Optional[logging.Logger] = None
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        if log_file:
+            self._start_file_log(log_file, max_bytes, backup_count)
+
+    def _start_file_log(self, log_file: str, max_bytes: int, backup_count: int):
+        try:
+            folder = os.path.dirname(log_file)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+        except Exception:
+            # Sem permissão de escrita: segue só com o log na tela
+            return
+        file_handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue()
+        self._listener = logging.handlers.QueueListener(log_queue, file_handler)
+        self._listener.start()
+
+        self._logger = logging.getLogger(f"logview.{id(self)}")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        self._logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    def append(self, text: str):
+        if self._logger is not None:
+            self._logger.info(text)
+        self._pending.append(text)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.after(self.flush_ms, self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        if not self._pending:
+            return
+        lines: List[str] = list(self._pending)
+        self._pending.clear()
+
+        self.configure(state="normal")
+        self.insert("end", "\n".join(lines) + "\n")
+        self._lines += len(lines)
+        excess = self._lines - self.max_lines
+        if excess > 0:
+            self.delete("1.0", f"{excess + 1}.0")
+            self._lines -= excess
+        self.see("end")
+        self.configure(state="disabled")
+
+    def clear(self):
+        self._pending.clear()
+        self.configure(state="normal")
+        self.delete("1.0", "end")
+        self.configure(state="disabled")
+        self._lines = 0
+
+    def close(self):
+        """
+        Grava o que ainda estiver na fila do arquivo e encerra a thread.
+        """
+        if self._logger is not None:
+            for h in list(self._logger.handlers):
+                self._logger.removeHandler(h)
+            self._logger = None
+        if self._listener is not None:
+            self._listener.stop()
+            for h in self._listener.handlers:
+                h.close()
+            self._listener = None
+
+
+class VirtualTable(ttk.Frame):
+    """
+    Grade (Treeview) que só cria itens para as linhas visíveis.
+
+    Os dados ficam fora do widget: a tabela conhece apenas a quantidade de
+    linhas (set_count) e pede os valores de cada linha exibida a row_fn(i).
+    Rolar só troca os valores dos poucos itens existentes, então 100 mil
+    linhas custam o mesmo que 20. Clique no cabeçalho chama on_sort(coluna).
+    """
+
+    def __init__(
+        self,
+        master,
+        columns: Sequence[Tuple[str, str, int, str]],
+        row_fn: Callable[[int], Sequence[Any]],
+        on_sort: Optional[Callable[[str], None]] = None,
+        height: int = 15,
+        **kwargs,
+    ):
+        super().__init__(master, **kwargs)
+        self.row_fn = row_fn
+        self.count = 0
+        self.top = 0
+        self._visible = height
+        self._headings = {col: text for col, text, _, _ in columns}
+
+        self.tree = ttk.Treeview(
+            self, columns=[c[0] for c in columns], show="headings", height=height, selectmode="browse"
+        )
+        for col, text, width, anchor in columns:
+            cmd = (lambda c=col: on_sort(c)) if on_sort else ""
+            self.tree.heading(col, text=text, command=cmd)
+            self.tree.column(col, width=width, anchor=anchor)
+        self.scroll = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scroll.grid(row=0, column=1, sticky="ns")
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(3))
+        self.tree.bind("<Prior>", lambda e: self.scroll_by(-self._visible))
+        self.tree.bind("<Next>", lambda e: self.scroll_by(self._visible))
+        self.tree.bind("<Home>", lambda e: self.scroll_to(0))
+        self.tree.bind("<End>", lambda e: self.scroll_to(self.count))
+
+    # ------------------------------------------------------------------ dados
+    def set_count(self, count: int):
+        self.count = max(0, count)
+        self.top = 0
+        self.render()
+
+    def set_sort_indicator(self, column: Optional[str], desc: bool = False):
+        for col, text in self._headings.items():
+            if col == column:
+                text += " ▼" if desc else " ▲"
+            self.tree.heading(col, text=text)
+
+    # ------------------------------------------------------------------ rolagem
+    def scroll_to(self, top: int):
+        top = max(0, min(int(top), self.count - self._visible))
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    def scroll_by(self, rows: int):
+        self.scroll_to(self.top + rows)
+        return "break"
+
+    def _on_scrollbar(self, *args):
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * self.count))
+        elif args[0] == "scroll":
+            step = self._visible if args[2] == "pages" else 1
+            self.scroll_by(int(args[1]) * step)
+
+    def _on_wheel(self, event):
+        # Windows/macOS: delta em múltiplos de 120 (ou ±1 no macOS)
+        notches = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll_by(-3 * notches)
+
+    def _on_resize(self, event):
+        style = ttk.Style(self)
+        try:
+            row_h = int(style.lookup("Treeview", "rowheight") or 20)
+        except (tk.TclError, ValueError):
+            row_h = 20
+        # Cabeçalho ocupa mais ou menos uma linha
+        visible = max(1, event.height // max(1, row_h) - 1)
+        if visible != self._visible:
+            self._visible = visible
+            self.top = max(0, min(self.top, self.count - visible))
+            self.render()
+
+    # ------------------------------------------------------------------ desenho
+    def render(self):
+        shown = max(0, min(self._visible, self.count - self.top))
+        existing = self.tree.get_children()
+        if len(existing) > shown:
+            self.tree.delete(*existing[shown:])
+        for i in range(shown):
+            values = self.row_fn(self.top + i)
+            if i < len(existing):
+                self.tree.item(existing[i], values=values)
+            else:
+                self.tree.insert("", "end", iid=str(i), values=values)
+        if self.count:
+            self.scroll.set(self.top / self.count, (self.top + shown) / self.count)
+        else:
+            self.scroll.set(0.0, 1.0)
+
+
+class FrameLatencyMonitor:
+    """
+    Mede quanto o loop do Tk atrasa para atender um after() agendado a cada
+    interval_ms. O atraso é o tempo em que a janela ficou sem redesenhar nem
+    responder a cliques.
+
+    Guarda as amostras da janela de window_s segundos e conta as que passam
+    de budget_ms, que é o limite prometido para a interface.
+    """
+
+    def __init__(self, root: tk.Misc, interval_ms: int = 50, budget_ms: float = 100.0, window_s: float = 10.0):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.budget_ms = budget_ms
+        self._samples: Deque[Tuple[float, float]] = deque()
+        self.window_s = window_s
+        self.max_ms = 0.0
+        self.violations = 0
+        self._expected = 0.0
+        self._running = False
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._expected = time.perf_counter() + self.interval_ms / 1000.0
+        self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        self._running = False
+
+    def _tick(self):
+        if not self._running:
+            return
+        now = time.perf_counter()
+        late_ms = max(0.0, (now - self._expected) * 1000.0)
+        self._samples.append((now, late_ms))
+        while self._samples and self._samples[0][0] < now - self.window_s:
+            self._samples.popleft()
+        self.max_ms = max(self.max_ms, late_ms)
+        if late_ms > self.budget_ms:
+            self.violations += 1
+        self._expected = now + self.interval_ms / 1000.0
+        try:
+            self.root.after(self.interval_ms, self._tick)
+        except tk.TclError:
+            self._running = False
+
+    def stats(self) -> Dict[str, float]:
+        """
+        p95 e máximo do atraso (ms) na janela recente, máximo desde o início
+        e quantas vezes o limite foi estourado.
+        """
+        lates = sorted(late for _, late in self._samples)
+        p95 = lates[min(len(lates) - 1, int(len(lates) * 0.95))] if lates else 0.0
+        return {
+            "p95_ms": p95,
+            "janela_max_ms": lates[-1] if lates else 0.0,
+            "max_ms": self.max_ms,
+            "estouros": self.violations,
+            "limite_ms": self.budget_ms,
+        }
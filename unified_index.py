@@ -0,0 +1,207 @@
+"""
+Índice da lista unificada de capturas para a grade da aba Relatórios.
+
+Montado uma vez a cada "Unificar": guarda cada coluna como lista de chaves
+inteiras (data/hora como aaaammddhhmmss, valor em centavos, origem como
+código) e, sob demanda, a ordem das linhas por coluna. Filtrar e ordenar
+devolvem só posições; a grade pede os valores apenas das linhas visíveis.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Sequence
+
+from robo_cartoes_emsys_v3 import brl_to_cents
+
+SORT_COLUMNS = ("dt", "bruto", "origem")
+
+# Acima desta fração das linhas, filtrar a ordem pronta sai mais barato que
+# reordenar os candidatos
+_RESORT_MAX_FRACTION = 0.5
+
+
+def _dt_key(dt: str) -> int:
+    # "dd/mm/aaaa hh:mm:ss" (normalize_dt) -> aaaammddhhmmss
+    try:
+        return int(dt[6:10] + dt[3:5] + dt[0:2] + dt[11:13] + dt[14:16] + dt[17:19])
+    except ValueError:
+        return 0
+
+
+def parse_date_filter(text: str, end: bool = False) -> Optional[int]:
+    """
+    "dd/mm/aaaa" (com hora opcional) na mesma escala de _dt_key. Sem hora,
+    o início vale 00:00:00 e o fim, 23:59:59. Texto vazio = sem limite.
+    """
+    text = (text or "").strip()
+    if not text:
+        return None
+    if len(text) == 10:
+        text += " 23:59:59" if end else " 00:00:00"
+    elif len(text) == 16:
+        text += ":59" if end else ":00"
+    key = _dt_key(text)
+    if len(text) != 19 or not key:
+        raise ValueError(f"Data inválida: {text[:10]} (use dd/mm/aaaa).")
+    return key
+
+
+def parse_value_filter(text: str) -> Optional[int]:
+    """
+    Valor em reais ("1.234,50", "1234,5", "12.50" ou "1234") em centavos.
+    """
+    text = (text or "").replace("R$", "").strip()
+    if not text:
+        return None
+    if "," in text:
+        inteiro, frac = text.rsplit(",", 1)
+        inteiro = inteiro.replace(".", "")
+    elif "." in text and len(text.rsplit(".", 1)[1]) <= 2:
+        inteiro, frac = text.rsplit(".", 1)
+    else:
+        inteiro, frac = text.replace(".", ""), ""
+    inteiro = inteiro or "0"
+    if not inteiro.isdigit() or len(frac) > 2 or (frac and not frac.isdigit()):
+        raise ValueError(f"Valor inválido: {text}")
+    return int(inteiro) * 100 + int(frac.ljust(2, "0"))
+
+
+class UnifiedIndex:
+    def __init__(self, items: List[Dict[str, str]], version: int = 0):
+        # version: do snapshot das capturas unificadas que originou o índice
+        self.version = version
+        self.items = items
+        self.dt_keys: List[int] = [_dt_key(it.get("dt", "")) for it in items]
+
+        cents_of: Dict[str, int] = {}
+        self.cents: List[int] = []
+        for it in items:
+            bruto = it.get("bruto", "")
+            c = cents_of.get(bruto)
+            if c is None:
+                c = cents_of[bruto] = brl_to_cents(bruto)
+            self.cents.append(c)
+
+        self.origens: List[str] = sorted({it.get("origem", "") for it in items})
+        code = {o: i for i, o in enumerate(self.origens)}
+        self.origem_codes: List[int] = [code[it.get("origem", "")] for it in items]
+
+        self._order: Dict[str, List[int]] = {}
+        self._rank: Dict[str, List[int]] = {}
+        self._sorted_keys: Dict[str, List[int]] = {}
+        self._by_origem: Optional[Dict[int, List[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    # ------------------------------------------------------------------ ordens
+    def _keys(self, column: str) -> List[int]:
+        if column == "dt":
+            return self.dt_keys
+        if column == "bruto":
+            return self.cents
+        if column == "origem":
+            return self.origem_codes
+        raise ValueError(f"Coluna desconhecida: {column}")
+
+    def order(self, column: str) -> List[int]:
+        """
+        Posições ordenadas pela coluna (desempate pela data e pela posição).
+        Calculada na primeira vez e reaproveitada.
+        """
+        order = self._order.get(column)
+        if order is None:
+            keys = self._keys(column)
+            if column == "dt":
+                order = sorted(range(len(keys)), key=keys.__getitem__)
+            else:
+                # sorted é estável: partindo da ordem por data, o empate já fica por data
+                order = sorted(self.order("dt"), key=keys.__getitem__)
+            self._order[column] = order
+        return order
+
+    def _ranks(self, column: str) -> List[int]:
+        rank = self._rank.get(column)
+        if rank is None:
+            rank = [0] * len(self.items)
+            for r, p in enumerate(self.order(column)):
+                rank[p] = r
+            self._rank[column] = rank
+        return rank
+
+    def _range(self, column: str, lo: Optional[int], hi: Optional[int]) -> List[int]:
+        # Fatia da ordem da coluna com as chaves em [lo, hi], por busca binária
+        order = self.order(column)
+        sorted_keys = self._sorted_keys.get(column)
+        if sorted_keys is None:
+            keys = self._keys(column)
+            sorted_keys = self._sorted_keys[column] = [keys[p] for p in order]
+        a = 0 if lo is None else bisect_left(sorted_keys, lo)
+        b = len(sorted_keys) if hi is None else bisect_right(sorted_keys, hi)
+        return order[a:b]
+
+    # ------------------------------------------------------------------ consulta
+    def query(
+        self,
+        origem: Optional[str] = None,
+        dt_min: Optional[int] = None,
+        dt_max: Optional[int] = None,
+        cents_min: Optional[int] = None,
+        cents_max: Optional[int] = None,
+        sort: str = "dt",
+        desc: bool = False,
+    ) -> Sequence[int]:
+        """
+        Posições das linhas que passam nos filtros, na ordem pedida. Os
+        limites são inclusivos e usam as escalas de parse_date_filter /
+        parse_value_filter.
+        """
+        # Candidatos: o filtro mais seletivo sai direto de uma ordem pronta
+        candidates: List[List[int]] = []
+        if origem:
+            if origem not in self.origens:
+                return []
+            if self._by_origem is None:
+                self._by_origem = {}
+                for p, c in enumerate(self.origem_codes):
+                    self._by_origem.setdefault(c, []).append(p)
+            candidates.append(self._by_origem[self.origens.index(origem)])
+        if dt_min is not None or dt_max is not None:
+            candidates.append(self._range("dt", dt_min, dt_max))
+        if cents_min is not None or cents_max is not None:
+            candidates.append(self._range("bruto", cents_min, cents_max))
+
+        if not candidates:
+            rows: Sequence[int] = self.order(sort)
+            return rows[::-1] if desc else rows
+
+        base = min(candidates, key=len)
+        if len(candidates) > 1:
+            code = self.origens.index(origem) if origem else None
+            dt, cents, codes = self.dt_keys, self.cents, self.origem_codes
+            lo_d = dt_min if dt_min is not None else -1
+            hi_d = dt_max if dt_max is not None else 1 << 62
+            lo_c = cents_min if cents_min is not None else -(1 << 62)
+            hi_c = cents_max if cents_max is not None else 1 << 62
+            base = [
+                p
+                for p in base
+                if lo_d <= dt[p] <= hi_d and lo_c <= cents[p] <= hi_c and (code is None or codes[p] == code)
+            ]
+
+        if len(base) > len(self.items) * _RESORT_MAX_FRACTION:
+            keep = bytearray(len(self.items))
+            for p in base:
+                keep[p] = 1
+            rows = [p for p in self.order(sort) if keep[p]]
+        else:
+            rank = self._ranks(sort)
+            rows = sorted(base, key=rank.__getitem__)
+        return rows[::-1] if desc else rows
+
+    def total_cents(self, rows: Sequence[int]) -> int:
+        cents = self.cents
+        return sum(cents[p] for p in rows)
+
+    def row_values(self, pos: int):
+        it = self.items[pos]
+        return (it.get("dt", ""), it.get("bruto", ""), it.get("origem", ""), it.get("id", ""))
@@ -0,0 +1,357 @@
+"""
+Processo auxiliar para o trabalho pesado da GUI.
+
+Leitura de PDFs (pdfplumber), capturas do Good Card e a unificação das
+capturas rodam num processo separado, para não disputar o GIL com o loop do
+Tk. A GUI conversa com ele por um multiprocessing.Pipe usando tuplas curtas:
+
+    pedido:   (id, nome_da_funcao_do_core, args, kwargs, quer_progresso)
+    cancelar: (id,)
+    resposta: (id, OK, resultado) | (id, ERRO, (tipo, mensagem)) | (id, PROGRESSO, args)
+
+Só as funções de core listadas em ALLOWED_OPS podem ser chamadas. Se o
+processo não puder ser iniciado (ou morrer), as chamadas rodam no próprio
+processo da GUI, como antes.
+
+call() feita de dentro de uma tarefa do executor acompanha o CancelToken
+dela: ao cancelar, a GUI para de esperar na hora (task_executor.Cancelled) e
+o processo auxiliar recebe o pedido de cancelamento, repassado às funções de
+core que aceitam cancel_event.
+"""
+
+import builtins
+import concurrent.futures
+import inspect
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+import task_executor
+
+OK = 0
+ERRO = 1
+PROGRESSO = 2
+
+# Intervalo em que call() confere o token de cancelamento enquanto espera
+CANCEL_POLL_S = 0.1
+
+ALLOWED_OPS = frozenset(
+    {
+        # PDFs
+        "valecard_capture_from_pdf",
+        "valecard_somar_despesas_pdf",
+        "redefrota_capture_from_pdf",
+        "import_statement_pdfs",
+        # Unificação, conciliação e gravação dos arquivos de captura
+        "summarize_unified_captures",
+        "reconcile_with_emsys",
+        "save_capture_txt",
+        "save_valecard_despesas",
+        "save_goodcard_capture",
+        "clear_captures",
+        # Good Card: a sessão CDP persistente fica no processo auxiliar
+        "goodcard_check_cdp",
+        "goodcard_start_session",
+        "goodcard_shutdown_session",
+        "goodcard_list_tabs",
+        "goodcard_open_portal_tab",
+        "goodcard_capture_from_url",
+        "goodcard_crawl_from_url",
+        "goodcard_capture_from_network",
+        "goodcard_capture_tabs",
+        "goodcard_collector_start",
+        "goodcard_collector_status",
+        "goodcard_collector_collect",
+        "import_goodcard_html",
+    }
+)
+
+
+def _error_payload(e: BaseException):
+    return (type(e).__name__, str(e))
+
+
+def _rebuild_error(payload) -> Exception:
+    name, message = payload
+    exc_type = getattr(builtins, name, None)
+    if isinstance(exc_type, type) and issubclass(exc_type, Exception):
+        return exc_type(message)
+    return RuntimeError(message)
+
+
+def _accepts_cancel(fn: Callable) -> bool:
+    try:
+        return "cancel_event" in inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _worker_main(conn, base_dir: str, max_threads: int = 4):
+    """
+    Laço do processo auxiliar. Cada pedido roda numa thread do processo, para
+    que uma leitura longa (ex.: varredura de páginas) não segure as consultas
+    rápidas (ex.: status da coleta contínua).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    os.chdir(base_dir)
+    import core
+
+    send_lock = threading.Lock()
+    # id do pedido -> Event de cancelamento (só enquanto o pedido roda)
+    cancels: Dict[int, threading.Event] = {}
+    cancels_lock = threading.Lock()
+
+    def send(msg):
+        with send_lock:
+            conn.send(msg)
+
+    def run(req_id, op, args, kwargs, wants_progress, cancel_event):
+        kwargs = dict(kwargs)
+        if wants_progress:
+            kwargs["progress_cb"] = lambda *data: send((req_id, PROGRESSO, data))
+        try:
+            if op not in ALLOWED_OPS:
+                raise ValueError(f"Operação não permitida no processo auxiliar: {op}")
+            fn = getattr(core, op)
+            if _accepts_cancel(fn):
+                kwargs["cancel_event"] = cancel_event
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            send((req_id, ERRO, _error_payload(e)))
+            return
+        finally:
+            with cancels_lock:
+                cancels.pop(req_id, None)
+        try:
+            send((req_id, OK, result))
+        except Exception as e:
+            # Resultado que não pode ser enviado pelo pipe
+            send((req_id, ERRO, _error_payload(e)))
+
+    pool = ThreadPoolExecutor(max_workers=max_threads)
+    try:
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                break
+            if msg is None:
+                break
+            if len(msg) == 1:
+                with cancels_lock:
+                    ev = cancels.get(msg[0])
+                if ev is not None:
+                    ev.set()
+                continue
+            ev = threading.Event()
+            with cancels_lock:
+                cancels[msg[0]] = ev
+            pool.submit(run, *msg, ev)
+    finally:
+        pool.shutdown(wait=False)
+        try:
+            core.goodcard_shutdown_session()
+        except Exception:
+            pass
+
+
+class WorkerHost:
+    """
+    Lado da GUI. call() bloqueia só a thread que chamou (uma thread do
+    executor de tarefas), nunca o loop do Tk.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None):
+        self.base_dir = base_dir or os.getcwd()
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._progress: Dict[int, Callable[[Any], None]] = {}
+        self._conn = None
+        self._proc = None
+        self._disabled = False
+
+    # ------------------------------------------------------------------ processo
+    def start(self) -> bool:
+        """
+        Inicia o processo (se ainda não estiver rodando). Retorna False se
+        não foi possível; nesse caso as chamadas rodam localmente.
+        """
+        with self._lock:
+            return self._start_locked()
+
+    def _start_locked(self) -> bool:
+        if self._disabled:
+            return False
+        if self._proc is not None and self._proc.is_alive():
+            return True
+        try:
+            parent_conn, child_conn = self._ctx.Pipe()
+            proc = self._ctx.Process(
+                target=_worker_main, args=(child_conn, self.base_dir), name="automacao-worker", daemon=True
+            )
+            proc.start()
+            child_conn.close()
+        except Exception:
+            self._disabled = True
+            return False
+        self._conn, self._proc = parent_conn, proc
+        threading.Thread(target=self._reader_loop, args=(parent_conn,), daemon=True).start()
+        return True
+
+    def is_running(self) -> bool:
+        proc = self._proc
+        return proc is not None and proc.is_alive()
+
+    def stop(self, timeout: float = 5.0, wait: bool = True) -> Optional[threading.Thread]:
+        """
+        Pede ao processo para encerrar (ele fecha a sessão CDP) e o termina se
+        não sair em timeout segundos. Com wait=False, a espera fica numa
+        thread, para não travar quem chamou (ex.: o fechamento da janela), que
+        é devolvida.
+        """
+        with self._lock:
+            conn, proc = self._conn, self._proc
+            self._conn = self._proc = None
+        if conn is None:
+            return None
+        try:
+            conn.send(None)
+        except Exception:
+            pass
+        if proc is None:
+            return None
+
+        def join():
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+
+        if wait:
+            join()
+            return None
+        thread = threading.Thread(target=join, name="automacao-worker-stop", daemon=True)
+        thread.start()
+        return thread
+
+    def _reader_loop(self, conn):
+        while True:
+            try:
+                req_id, kind, payload = conn.recv()
+            except (EOFError, OSError):
+                break
+            if kind == PROGRESSO:
+                cb = self._progress.get(req_id)
+                if cb is not None:
+                    try:
+                        cb(*payload)
+                    except Exception:
+                        pass
+                continue
+            with self._lock:
+                fut = self._pending.pop(req_id, None)
+                self._progress.pop(req_id, None)
+            if fut is None:
+                continue
+            if kind == OK:
+                fut.set_result(payload)
+            else:
+                fut.set_exception(_rebuild_error(payload))
+
+        # Processo encerrado: quem esperava recebe erro; a próxima chamada reinicia
+        with self._lock:
+            if self._conn is conn:
+                self._conn = self._proc = None
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._progress.clear()
+        for fut in pending:
+            if not fut.done():
+                fut.set_exception(RuntimeError("O processo auxiliar foi encerrado durante a operação."))
+
+    # ------------------------------------------------------------------ chamadas
+    def call(self, op: str, *args, progress_cb: Optional[Callable[[Any], None]] = None, **kwargs):
+        """
+        Executa core.<op>(*args, **kwargs) no processo auxiliar e devolve o
+        resultado (ou levanta o erro). progress_cb, se informado, é chamado com
+        os mesmos argumentos que o core passaria, na thread de leitura do pipe.
+
+        Dentro de uma tarefa do executor, cancelar a tarefa levanta
+        task_executor.Cancelled e avisa o processo auxiliar.
+        """
+        if op not in ALLOWED_OPS:
+            raise ValueError(f"Operação não permitida no processo auxiliar: {op}")
+        job = task_executor.current_job()
+        token = job.token if job is not None else None
+
+        with self._lock:
+            if not self._start_locked():
+                conn = None
+            else:
+                conn = self._conn
+                req_id = next(self._ids)
+                fut: Future = Future()
+                self._pending[req_id] = fut
+                if progress_cb is not None:
+                    self._progress[req_id] = progress_cb
+                try:
+                    conn.send((req_id, op, args, kwargs, progress_cb is not None))
+                except Exception:
+                    self._pending.pop(req_id, None)
+                    self._progress.pop(req_id, None)
+                    conn = None
+
+        if conn is None:
+            # Sem processo auxiliar: roda aqui mesmo
+            import core
+
+            fn = getattr(core, op)
+            if progress_cb is not None:
+                kwargs["progress_cb"] = progress_cb
+            if token is not None and _accepts_cancel(fn):
+                kwargs["cancel_event"] = token
+            return fn(*args, **kwargs)
+
+        if token is None:
+            return fut.result()
+        while True:
+            try:
+                return fut.result(timeout=CANCEL_POLL_S)
+            except concurrent.futures.TimeoutError:
+                if token.is_set():
+                    self._cancel(conn, req_id)
+                    raise task_executor.Cancelled()
+
+    def _cancel(self, conn, req_id: int):
+        # A resposta que ainda chegar deste pedido é descartada pelo leitor
+        with self._lock:
+            self._pending.pop(req_id, None)
+            self._progress.pop(req_id, None)
+            try:
+                conn.send((req_id,))
+            except Exception:
+                pass
+
+
+_host: Optional[WorkerHost] = None
+
+
+def get_host() -> WorkerHost:
+    global _host
+    if _host is None:
+        _host = WorkerHost()
+    return _host
+
+
+def shutdown_host(wait: bool = True) -> Optional[threading.Thread]:
+    global _host
+    thread = None
+    if _host is not None:
+        thread = _host.stop(wait=wait)
+        _host = None
+    return thread